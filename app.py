@@ -1,1137 +1,612 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import pycountry
-from datetime import datetime, date
-import plotly.io as pio
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Image, Paragraph, Spacer, PageBreak, BaseDocTemplate, PageTemplate, Frame
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from reportlab.platypus import HRFlowable
-from reportlab.pdfgen import canvas
-from reportlab.platypus.doctemplate import PageTemplate
-from reportlab.platypus.frames import Frame
-import io
-import base64
-import tempfile
-import os
-from preprocessing import (
-    comprehensive_clean, extract_city_comprehensive,
-    clean_extracted_cities_df, CITIES_INDONESIA
+from datetime import datetime
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from functools import partial
+from engine import (
+    read_datasets, load_dataset, prepare_store_dataset, ingest_upload, select_period,
+    format_date_range, city_map_data, build_pdf_figures, create_period_excel,
+    REPORT_MIME, REPORT_PDF, REPORT_EXCEL
 )
+from reports import create_pdf_report
+from store import get_record_store
+from ingest import uploads_content_hash
+from dataset_cache import DATASET_CACHE
+from artifact_store import ARTIFACTS
+import telemetry
+from telemetry import phase, PHASE_FIGURES
+from metrics import start_metrics_export, UPLOADS, UPLOAD_CACHE_HITS
+from profiling import (
+    PROFILE_RERUN, PROFILE_PDF, PROFILE_EXCEL, parse_targets, start_profile, stop_profile, profiled,
+    recent_profiles
+)
+from charts import (
+    build_commodity_pie, build_country_bar, build_city_map, build_company_bar,
+    build_country_counts, build_country_map, build_trend_chart, DEFAULT_COUNTRY_LABELS
+)
+from timeseries import BUCKET_DAY, BUCKET_WEEK, BUCKET_MONTH, BUCKET_LABELS, trend_series
+from export_jobs import EXPORT_JOBS, JOB_DONE, JOB_FAILED
+from assets import LOGO_PATH, LOGO_DISPLAY_WIDTH, logo_thumbnail
 
 
 # ========================
-# FUNGSI BANTU
+# JOB EXPORT BACKGROUND
 # ========================
-def get_iso3(name):
-    try:
-        return pycountry.countries.lookup(name).alpha_3
-    except:
-        return name  # fallback kalau tidak ketemu
-
-def safe_write_image(fig, format="png", width=800, height=600, scale=2):
+def export_job_key(kind, df, date_range, revision=None, extra=()):
     """
-    Wrapper aman untuk pio.to_image.
-    Jika Kaleido error karena Chrome/Chromium tidak ada,
-    otomatis jalankan plotly_get_chrome untuk download Chromium portable.
+    Kunci dedup job export: jenis laporan + periode + hash isi data terfilter.
+    Untuk dataset dari store (df None) revision store menggantikan hash data.
+    extra: pengaturan lain yang mengubah isi laporan (mis. jumlah label peta dan
+    resolusi tren untuk PDF), supaya sesi dengan pengaturan berbeda tidak berbagi job.
     """
-    import subprocess, sys
-    try:
-        return pio.to_image(fig, format=format, width=width, height=height, scale=scale)
-    except RuntimeError as e:
-        if "Kaleido requires Google Chrome" in str(e):
-            print("⚠️ Chrome/Chromium tidak ditemukan. Menjalankan plotly_get_chrome...")
-            subprocess.check_call([sys.executable, "-m", "plotly.io._utils", "plotly_get_chrome"])
-            # coba ulangi export setelah Chromium terpasang
-            return pio.to_image(fig, format=format, width=width, height=height, scale=scale)
-        else:
-            raise
+    if df is None:
+        return hashlib.sha256(f"{kind}|{date_range}|{extra!r}|store:{revision}".encode("utf-8")).hexdigest()
+    digest = hashlib.sha256(f"{kind}|{date_range}|{extra!r}|{len(df)}".encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
 
-class LogoCanvas(canvas.Canvas):
-    """Canvas yang benar untuk menambahkan logo"""
-    
-    def __init__(self, *args, logo_path=None, **kwargs):
-        canvas.Canvas.__init__(self, *args, **kwargs)
-        self.logo_path = logo_path
-        self._saved = False  # Flag untuk mencegah duplikasi
-    
-    def save(self):
-        """Override save untuk memastikan logo digambar terakhir"""
-        if not self._saved:
-            self.draw_logo()
-            self._saved = True
-        canvas.Canvas.save(self)
-    
-    def showPage(self):
-        """Override showPage - ini yang paling penting"""
-        # Gambar logo SEBELUM showPage dipanggil
-        if self.logo_path and os.path.exists(self.logo_path):
-            self.draw_logo_immediate()
-        canvas.Canvas.showPage(self)
-    
-    def draw_logo_immediate(self):
-        """Menggambar logo langsung tanpa pengecekan berulang"""
-        try:
-            logo_x = 35  # Sedikit lebih ke kanan
-            logo_y = A4[1] - 85  # Sedikit lebih ke bawah
-            logo_width = 110
-            logo_height = 55
-            
-            # Gambar langsung
-            self.drawImage(
-                self.logo_path, 
-                logo_x, logo_y, 
-                width=logo_width, 
-                height=logo_height,
-                mask='auto'
-            )
-            print(f"Logo drawn at ({logo_x}, {logo_y})")
-            
-        except Exception as e:
-            print(f"Error drawing logo: {e}")
-    
-    def draw_logo(self):
-        """Metode fallback"""
-        if self.logo_path and os.path.exists(self.logo_path):
-            self.draw_logo_immediate()
-
-def create_logo_page_template(logo_path):
-    """Membuat page template dengan logo"""
-    def draw_logo_on_canvas(canvas, doc):
-        """Fungsi untuk menggambar logo pada setiap halaman"""
-        if logo_path and os.path.exists(logo_path):
-            try:
-                canvas.drawImage(
-                    logo_path,
-                    35, A4[1] - 85,  # Posisi
-                    width=110, height=55,
-                    mask='auto'
-                )
-            except Exception as e:
-                print(f"Template logo error: {e}")
-    
-    # Buat frame untuk konten (sisakan ruang untuk logo)
-    frame = Frame(
-        x1=72, y1=18, 
-        width=A4[0]-144, height=A4[1]-125,  # Kurangi tinggi untuk logo
-        leftPadding=0, rightPadding=0, 
-        topPadding=0, bottomPadding=0
-    )
-    
-    # Buat page template
-    template = PageTemplate(
-        id='logo_template',
-        frames=[frame],
-        onPage=draw_logo_on_canvas
-    )
-    
-    return template
 
-def create_pdf_report(figures_dict, date_range, total_records, filtered_records, logo_path=None):
+def count_upload(mode, content_hash, cached):
     """
-    Membuat laporan PDF dari semua chart yang ada di dashboard
+    Hitung upload sekali per file yang dipilih di sesi ini (bukan per rerun),
+    termasuk upload ulang file yang sama yang dilayani dari cache
     """
-    # Buffer untuk menyimpan PDF
-    buffer = io.BytesIO()
-
-    # DEBUG: Print info logo path
-    if logo_path:
-        print(f"DEBUG: Logo path yang diberikan: {logo_path}")
-        print(f"DEBUG: Logo file exists: {os.path.exists(logo_path)}")
-        if os.path.exists(logo_path):
-            print(f"DEBUG: Logo file size: {os.path.getsize(logo_path)} bytes")
-        else:
-            print(f"DEBUG: Current working directory: {os.getcwd()}")
-            print(f"DEBUG: Files in current directory: {os.listdir('.')}")
+    if st.session_state.get("counted_upload") == content_hash:
+        return
+    st.session_state.counted_upload = content_hash
+    UPLOADS.inc(mode=mode)
+    if cached:
+        UPLOAD_CACHE_HITS.inc(mode=mode)
 
-    # Buat dokumen PDF dengan custom canvas HANYA jika ada logo
-    if logo_path and os.path.exists(logo_path):
-        print("Using PageTemplate method for logo")
-        
-        # Gunakan BaseDocTemplate untuk kontrol penuh
-        doc = BaseDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=90,  # Beri ruang untuk logo
-            bottomMargin=18
-        )
-        
-        # Tambahkan page template dengan logo
-        logo_template = create_logo_page_template(logo_path)
-        doc.addPageTemplates([logo_template])
-        
-    else:
-        print("No logo - using standard template")
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=18
-        )
-    
-    # Style untuk dokumen
-    styles = getSampleStyleSheet()
-
-     # Style untuk header utama dengan emoji
-    header_style = ParagraphStyle(
-        'CustomHeader',
-        parent=styles['Heading1'],
-        fontSize=28,
-        spaceAfter=20,
-        spaceBefore=10,
-        alignment=TA_CENTER,
-        textColor='#3EADB3',
-        fontName='Helvetica-Bold'
-    )
-    
-    # Style untuk subtitle
-    subtitle_style = ParagraphStyle(
-        'SubtitleStyle',
-        parent=styles['Normal'],
-        fontSize=14,
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        textColor='#9E6B2B',
-        fontName='Helvetica-Oblique'
-    )
 
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor='#1f4e79'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=12,
-        spaceBefore=20,
-        textColor='#2c5aa0'
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=12,
-    )
-    
-    # Konten PDF
-    story = []
-    
-    # Judul laporan
-    story.append(Paragraph("Dashboard BBKK Surabaya", header_style))
-    story.append(Paragraph("Analisis Ekspor OMKABA BBKK Surabaya", subtitle_style))
-    story.append(Spacer(1, 30))
-
-    story.append(HRFlowable(width="100%", thickness=1, lineCap='round', color='#e9ecef'))
-    story.append(Spacer(1, 20))
-    
-    # Informasi laporan
-    info_text = f"""
-    <b>Tanggal Laporan:</b> {datetime.now().strftime('%d %B %Y, %H:%M WIB')}<br/>
-    <b>Periode Data:</b> {date_range}<br/>
-    <b>Total Records:</b> {filtered_records:,} dari {total_records:,} data
+def export_subscriber():
     """
-    story.append(Paragraph(info_text, normal_style))
-    story.append(Spacer(1, 30))
-    
-    # Tambahkan setiap chart ke PDF
-    for title, fig in figures_dict.items():
-        try:
-            # Konversi plotly figure ke gambar
-            if "Sebaran Kota Perusahaan Eksportir" in title:
-                # Extract lat, lon, kota dari fig scatter_mapbox
-                lats = fig.data[0].lat
-                lons = fig.data[0].lon
-                hovertext = getattr(fig.data[0], "hovertext", ["Kota"]*len(lats))
-            
-                df_geo = pd.DataFrame({
-                    "lat": lats,
-                    "lon": lons,
-                    "Kota": hovertext,
-                })
-                
-                fig_geo = px.scatter_geo(
-                    df_geo,
-                    lat="lat", lon="lon",
-                    hover_name="Kota",
-                    title="Sebaran Kota Perusahaan Eksportir"
-                )
-                img_bytes = safe_write_image(fig_geo, format="png", width=800, height=600, scale=2)
-            else:
-                img_bytes = safe_write_image(fig, format="png", width=800, height=600, scale=2)
-            
-            img_buffer = io.BytesIO(img_bytes)
-
-            # Tambahkan judul chart
-            story.append(Paragraph(title, heading_style))
-            story.append(Spacer(1, 12))
-            
-            # Tambahkan gambar ke PDF langsung dari buffer
-            img = Image(img_buffer, width=6.5*inch, height=4.875*inch)
-            story.append(img)
-            story.append(Spacer(1, 20))
-
-            # Page break kecuali untuk chart terakhir
-            if list(figures_dict.keys()).index(title) < len(figures_dict) - 1:
-                story.append(PageBreak())
-        
-        except Exception as e:
-            # Jika ada error, tambahkan pesan error
-            error_msg = f"Error saat memproses {title}: {str(e)}"
-            story.append(Paragraph(error_msg, normal_style))
-            story.append(Spacer(1, 20))
-
-            if "mapbox" in str(e).lower():
-                story.append(Paragraph(f"{title}: Tidak bisa diexport ke PDF karena membutuhkan Mapbox API.", normal_style))
-            else:
-                story.append(Paragraph(f"Error saat memproses {title}: {str(e)}", normal_style))
-            story.append(Spacer(1, 20))
-    
-    # Footer
-    story.append(Spacer(1, 30))
-    footer_text = "Laporan ini dibuat secara otomatis oleh Dashboard BBKK Surabaya"
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=9,
-        alignment=TA_CENTER,
-        textColor='gray'
-    )
-    story.append(Paragraph(footer_text, footer_style))
-    
-    # Build PDF
-    print("DEBUG: Membangun PDF...")
-    doc.build(story)
-    print("DEBUG: PDF selesai dibangun")
-    
-    # Return buffer
-    buffer.seek(0)
-    return buffer
-
-
-def get_download_link(buffer, filename):
+    Id sesi ini untuk job export bersama (satu sesi = satu subscriber)
     """
-    Membuat link download untuk file PDF
-    """
-    b64 = base64.b64encode(buffer.getvalue()).decode()
-    return f'<a href="data:application/pdf;base64,{b64}" download="{filename}">📄 Download PDF Report</a>'
+    if "export_subscriber" not in st.session_state:
+        st.session_state.export_subscriber = uuid.uuid4().hex
+    return st.session_state.export_subscriber
 
-# ========================
-# FUNGSI EXPORT EXCEL
-# ========================
-def create_excel_report(df_filtered, date_range, total_records, filtered_records):
+
+def export_job_panel(state_key, download_label):
     """
-    Membuat laporan Excel dari data yang sudah difilter dan dipreprocessing
+    Menampilkan progress + tombol batal selama job berjalan,
+    lalu tombol download setelah job selesai
     """
-    # Buffer untuk menyimpan Excel
-    buffer = io.BytesIO()
-    
-    # Buat Excel writer
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        # Sheet 1: Data Utama (hanya kolom yang relevan)
-        relevant_columns = [
-            'Diterbitkan Tanggal',
-            'Nama Exportir/Importir', 
-            'Alamat Perusahaan',
-            'Kota',
-            'Jenis Komoditi',
-            'Negara Tujuan'
-        ]
-        
-        # Filter hanya kolom yang ada di dataframe
-        available_columns = [col for col in relevant_columns if col in df_filtered.columns]
-        df_export = df_filtered[available_columns].copy()
-        
-        # Format tanggal untuk Excel
-        if 'Diterbitkan Tanggal' in df_export.columns:
-            df_export['Diterbitkan Tanggal'] = df_export['Diterbitkan Tanggal'].dt.strftime('%d-%m-%Y')
-        
-        # Urutkan berdasarkan tanggal
-        df_export = df_export.sort_values('Diterbitkan Tanggal', ascending=False)
-        
-        # Tulis ke sheet
-        df_export.to_excel(writer, sheet_name='Data_Ekspor', index=False)
-        
-        # Sheet 2: Summary Komoditas
-        if 'Jenis Komoditi' in df_filtered.columns:
-            commodity_summary = df_filtered['Jenis Komoditi'].value_counts().reset_index()
-            commodity_summary.columns = ['Jenis Komoditi', 'Jumlah']
-            commodity_summary['Persentase (%)'] = (commodity_summary['Jumlah'] / commodity_summary['Jumlah'].sum() * 100).round(2)
-            commodity_summary.to_excel(writer, sheet_name='Summary_Komoditas', index=False)
-        
-        # Sheet 3: Summary Negara Tujuan
-        if 'Negara Tujuan' in df_filtered.columns:
-            country_summary = df_filtered['Negara Tujuan'].value_counts().reset_index()
-            country_summary.columns = ['Negara Tujuan', 'Jumlah']
-            country_summary['Persentase (%)'] = (country_summary['Jumlah'] / country_summary['Jumlah'].sum() * 100).round(2)
-            country_summary.to_excel(writer, sheet_name='Summary_Negara', index=False)
-        
-        # Sheet 4: Summary Kota
-        if 'Kota' in df_filtered.columns:
-            city_summary = df_filtered['Kota'].value_counts().reset_index()
-            city_summary.columns = ['Kota', 'Jumlah']
-            city_summary['Persentase (%)'] = (city_summary['Jumlah'] / city_summary['Jumlah'].sum() * 100).round(2)
-            city_summary.to_excel(writer, sheet_name='Summary_Kota', index=False)
-        
-        # Sheet 5: Summary Perusahaan
-        if 'Nama Exportir/Importir' in df_filtered.columns:
-            company_summary = df_filtered['Nama Exportir/Importir'].value_counts().reset_index()
-            company_summary.columns = ['Nama Perusahaan', 'Jumlah']
-            company_summary['Persentase (%)'] = (company_summary['Jumlah'] / company_summary['Jumlah'].sum() * 100).round(2)
-            company_summary.to_excel(writer, sheet_name='Summary_Perusahaan', index=False)
-        
-        # Sheet 6: Info Laporan
-        info_data = {
-            'Keterangan': [
-                'Tanggal Generate',
-                'Periode Data',
-                'Total Records Asli',
-                'Records Setelah Filter',
-                'Persentase Data Ditampilkan (%)'
-            ],
-            'Nilai': [
-                datetime.now().strftime('%d %B %Y, %H:%M WIB'),
-                date_range,
-                f"{total_records:,}",
-                f"{filtered_records:,}",
-                f"{(filtered_records/total_records*100):.2f}%" if total_records > 0 else "0%"
-            ]
-        }
-        info_df = pd.DataFrame(info_data)
-        info_df.to_excel(writer, sheet_name='Info_Laporan', index=False)
-    
-    # Return buffer
-    buffer.seek(0)
-    return buffer
+    job = EXPORT_JOBS.get(st.session_state.get(state_key))
+    if job is None:
+        return
+
+    # Polling tiap detik hanya selama job masih berjalan; polling berhenti
+    # pada rerun berikutnya setelah job selesai, tanpa rerun penuh
+    @st.fragment(run_every=1.0 if not job.finished else None)
+    def _panel():
+        job = EXPORT_JOBS.get(st.session_state.get(state_key))
+        if job is None:
+            return
+        if not job.finished:
+            st.progress(job.progress, text=job.message)
+            if st.button("✖️ Batalkan", key=f"{state_key}_cancel"):
+                job.cancel(export_subscriber())
+                del st.session_state[state_key]
+                st.rerun(scope="fragment")
+        elif job.status == JOB_DONE:
+            if not EXPORT_JOBS.result_available(job):
+                st.warning("⚠️ File export sudah kedaluwarsa, silakan generate ulang")
+                return
+            # Isi file baru dibaca dari artifact store saat tombol diklik
+            st.download_button(
+                label=download_label,
+                data=partial(EXPORT_JOBS.open_result, job),
+                file_name=job.filename,
+                mime=job.mime,
+                type="secondary",
+                key=f"{state_key}_download"
+            )
+        elif job.status == JOB_FAILED:
+            st.error(f"❌ Export gagal: {job.error}")
+        else:
+            st.warning("⚠️ Export dibatalkan")
 
+    _panel()
 
 
 # ========================
-# DASHBOARD STREAMLIT
+# FRAGMENT DASHBOARD
 # ========================
-st.set_page_config(page_title="Dashboard OMKABA", layout="wide")
+# Setiap fragment hanya dijalankan ulang saat widget di dalamnya berubah,
+# jadi tombol export dan pengaturan satu chart tidak membangun ulang chart lain.
+TREND_OPTIONS = {"Otomatis": None}
+TREND_OPTIONS.update({BUCKET_LABELS[b]: b for b in (BUCKET_DAY, BUCKET_WEEK, BUCKET_MONTH)})
 
-col1, col2, col3 = st.columns([1, 4, 1])
 
-with col1:
-    st.image("bbkksby_upscaled.png", width=150)  # Uncomment jika menggunakan file lokal
-    pass
+# Pengaturan chart yang widget-nya hanya dirender saat tab chart-nya dibuka
+CHART_SETTING_KEYS = ("trend_choice", "n_country_labels")
 
-with col2:
-    st.markdown("""
-    <div style="text-align: center; padding: 20px 0; background: linear-gradient(90deg, #f8f9fa 0%, #e9ecef 50%, #f8f9fa 100%); border-radius: 10px; margin-bottom: 30px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-        <div style="font-size: 48px; margin-bottom: 10px;">
-            ✈️ 🚢 📦 🌍
-        </div>
-        <h1 style="color: #3EADB3; margin: 0; font-family: 'Arial', sans-serif; font-weight: bold; text-shadow: 1px 1px 2px rgba(0,0,0,0.1);">
-            📊 Dashboard BBKK Surabaya
-        </h1>
-        <p style="color: #9E6B2B; margin: 10px 0 0 0; font-style: italic; font-size: 20px;">
-            Analisis Ekspor OMKABA BBKK Surabaya
-        </p>
-        <div style="margin-top: 15px; font-size: 24px;">
-            📈 📋 🗺️
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
 
-with col3:
-    pass
+def keep_chart_settings():
+    """
+    Pertahankan pengaturan chart selama tab-nya tertutup (Streamlit membuang
+    state widget yang tidak dirender di sebuah run)
+    """
+    for key in CHART_SETTING_KEYS:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
 
-# Upload file
-uploaded_file = st.file_uploader("Upload file CSV/Excel", type=["csv", "xlsx"])
 
-# baca file koordinat kota bawaan (selalu ada di project)
-df_city = pd.read_excel("koordinat_kota.xlsx")
+# Figure per sesi: chart tetap (komoditas, negara, kota, perusahaan) ditambah beberapa
+# varian terakhir slider/pilihan chart; varian terlama dibuang lebih dulu (LRU)
+FIGURE_CACHE_SIZE = 8
 
-if uploaded_file is not None:
-    # Baca file
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-    else:
-        df = pd.read_excel(uploaded_file)
-    
-    # Preprocessing
-    if "Nama Exportir/Importir" in df.columns:
-        df["Nama Exportir/Importir"] = df["Nama Exportir/Importir"].apply(comprehensive_clean)
 
-    if "Alamat Perusahaan" in df.columns:
-        df["Kota"] = df["Alamat Perusahaan"].apply(
-            lambda x: extract_city_comprehensive(x, CITIES_INDONESIA)
-        )
-    
-    # Konversi kolom tanggal
-    df["Diterbitkan Tanggal"] = pd.to_datetime(df["Diterbitkan Tanggal"], dayfirst=True, errors="coerce")
-    
-    # Remove rows with NaT (Not a Time) values in date column
-    df = df.dropna(subset=["Diterbitkan Tanggal"])
-    
-    st.success("✅ File berhasil diupload!")
-    
-    # ========================
-    # FILTER TANGGAL
-    # ========================
-    st.sidebar.header("🗓️ Filter Tanggal")
-    
-    # Deteksi batas minimum dan maksimum tanggal
-    if df["Diterbitkan Tanggal"].empty:
-        st.error("❌ Tidak ada data valid pada kolom tanggal setelah preprocessing!")
-        st.stop()
-    
-    min_date = df["Diterbitkan Tanggal"].min().date()
-    max_date = df["Diterbitkan Tanggal"].max().date()
+def cached_figure(name, filter_state, build):
+    """
+    Figure chart untuk state filter saat ini. Figure yang sudah dibuat disimpan
+    di session state dan baru dibangun ulang setelah data/rentang tanggal berubah.
+    Jumlah figure per sesi dibatasi FIGURE_CACHE_SIZE.
+    """
+    cache = st.session_state.get("figure_cache")
+    if cache is None or cache["state"] != filter_state:
+        cache = st.session_state.figure_cache = {"state": filter_state, "figures": OrderedDict()}
+    figures = cache["figures"]
+    if name in figures:
+        figures.move_to_end(name)
+        return figures[name]
+    with phase(PHASE_FIGURES):
+        figures[name] = build()
+    while len(figures) > FIGURE_CACHE_SIZE:
+        figures.popitem(last=False)
+    return figures[name]
 
-    if pd.isna(min_date) or pd.isna(max_date):
-        st.sidebar.warning("⚠️ Rentang tanggal tidak dapat ditentukan (semua NaT)")
-    else:
-        st.sidebar.info(f"📅 Rentang data tersedia:\n{min_date.strftime('%d-%m-%y')} - {max_date.strftime('%d-%m-%y')}")
-    
-    # Checkbox untuk pilih semua rentang tanggal
-    select_all_dates = st.sidebar.checkbox("Pilih Semua Rentang Tanggal", value=True)
-    
-    if select_all_dates:
-        # Gunakan seluruh rentang tanggal
-        start_date = min_date
-        end_date = max_date
-        st.sidebar.success("✅ Menampilkan semua data")
-    else:
-        # Date picker untuk rentang tanggal
-        col_start, col_end = st.sidebar.columns(2)
-        
-        with col_start:
-            start_date = st.date_input(
-                "Tanggal Mulai",
-                value=min_date,
-                min_value=min_date,
-                max_value=max_date
-            )
-        
-        with col_end:
-            end_date = st.date_input(
-                "Tanggal Akhir",
-                value=max_date,
-                min_value=min_date,
-                max_value=max_date
-            )
-        
-        # Validasi rentang tanggal
-        if start_date > end_date:
-            st.sidebar.error("⚠️ Tanggal mulai tidak boleh lebih besar dari tanggal akhir!")
-            st.stop()
-    
-    # Filter data berdasarkan tanggal
-    df_filtered = df[
-        (df["Diterbitkan Tanggal"].dt.date >= start_date) & 
-        (df["Diterbitkan Tanggal"].dt.date <= end_date)
-    ]
-    
-    # Tampilkan informasi filter
-    total_records = len(df)
-    filtered_records = len(df_filtered)
-    
-    st.sidebar.metric(
-        label="📊 Data Ditampilkan",
-        value=f"{filtered_records:,}",
-        delta=f"{filtered_records - total_records:,} dari total {total_records:,}"
-    )
-    
-    # Jika tidak ada data setelah filter
-    if df_filtered.empty:
-        st.warning("⚠️ Tidak ada data dalam rentang tanggal yang dipilih. Silakan pilih rentang tanggal lain.")
-        st.stop()
-
-    # ========================
-    # TOMBOL EXPORT PDF
-    # ========================
-    st.sidebar.header("📄 Export Laporan")
-    
-    if st.sidebar.button("🔄 Generate PDF Report", type="primary"):
-        with st.spinner("Sedang membuat laporan PDF..."):
-            try:
-                # Dictionary untuk menyimpan semua figures
-                figures_dict = {}
-                
-                # Date range string
-                if start_date == min_date and end_date == max_date:
-                    date_range = f"{min_date.strftime('%d-%m-%Y')} - {max_date.strftime('%d-%m-%Y')} (Semua Data)"
-                else:
-                    date_range = f"{start_date.strftime('%d-%m-%Y')} - {end_date.strftime('%d-%m-%Y')}"
-
-                # ========================
-                # 1. PIE CHART KOMODITAS
-                # ========================
-                comodity = df_filtered['Jenis Komoditi'].value_counts().reset_index()
-                comodity.columns = ["Jenis Komoditi", "Jumlah"]
-
-                total = comodity["Jumlah"].sum()
-                comodity["Persentase"] = comodity["Jumlah"] / total * 100
-                comodity["Label"] = comodity.apply(
-                    lambda x: f"{x['Jenis Komoditi']} ({x['Jumlah']} unit, {x['Persentase']:.2f}%)", axis=1
-                )
 
-                n_categories = len(comodity)
-                base_size = 390
-                additional_size = n_categories * 15
-
-                fig1 = go.Figure(
-                    data=[
-                        go.Pie(
-                            labels=comodity["Jenis Komoditi"],
-                            values=comodity["Jumlah"],
-                            hole=0.35,
-                            textinfo="label+percent+value",
-                            texttemplate="<b>%{label}</b><br>%{value} unit<br>(%{percent})",
-                            hovertemplate="<b>%{label}</b><br>Jumlah: %{value}<br>Persen: %{percent}<extra></extra>",
-                            marker=dict(
-                                colors=px.colors.qualitative.Plotly, 
-                                line=dict(color="white", width=2)
-                            ),
-                            textposition="outside",
-                            textfont=dict(size=12, family="Arial", color="black"),
-                            insidetextorientation='radial',
-                            outsidetextfont=dict(size=11),
-                            pull=0.03,
-                        )
-                    ]
-                )
-            
-                fig1.update_layout(
-                    showlegend=False,
-                    annotations=[],
-                    uniformtext_minsize=10,
-                    uniformtext_mode='hide',
-                    
-                    margin=dict(l=5, r=5, t=90, b=35),  # Margin sangat ketat
-                    width=base_size + additional_size,  # Ukuran dinamis
-                    height=base_size + additional_size,
-                    autosize=False,
-                    
-                    # Hilangkan padding dan spacing yang tidak perlu
-                    paper_bgcolor='white',
-                    plot_bgcolor='white',
-                    
-                    # Hilangkan axis dan grid yang tidak diperlukan
-                    xaxis=dict(visible=False, showgrid=False, zeroline=False),
-                    yaxis=dict(visible=False, showgrid=False, zeroline=False),
-                )
-            
-                fig1.update_traces(
-                    marker_line_color='white',
-                    marker_line_width=2,
-                    textfont_size=11,
-                    textposition='outside',
-                    textfont_color='black',
-                    insidetextfont=dict(size=11, color='white', family='Arial'),
-                    outsidetextfont=dict(size=10, family='Arial'),
-                    pull=[0.15 if i == 0 else 0.05 for i in range(len(comodity))],
-                    rotation=30,
-                    hole=0.4
-                )
-                
-                # Atur layout agar lebih compact
-                fig1.update_layout(
-                    autosize=True,  # Auto-size untuk menyesuaikan konten
-                )
-                
-                figures_dict["1. Distribusi Komoditas"] = fig1
-
-                # ========================
-                # 2. BAR CHART NEGARA
-                # ========================
-                top_10_country = df_filtered['Negara Tujuan'].value_counts().head(10).reset_index()
-                top_10_country.columns = ["Negara", "Jumlah"]
-
-                fig2 = px.bar(
-                    top_10_country,
-                    x="Negara",
-                    y="Jumlah",
-                    text="Jumlah",
-                    color="Jumlah",
-                    color_continuous_scale=["#e69795", "#bc656d", "#b03031"],
-                    title="Top 10 Negara Tujuan"
-                )
+def timing_caption(label, started):
+    st.caption(f"⏱️ {label}: {(time.perf_counter() - started) * 1000:.0f} ms")
 
-                fig2.update_traces(texttemplate='%{text}', textposition='outside')
-                fig2.update_layout(
-                    xaxis_title="Negara", 
-                    yaxis_title="Jumlah",
-                    width=800,
-                    height=600
-                )
-                figures_dict["2. Top 10 Negara Tujuan"] = fig2
 
-                # ========================
-                # 3. BAR CHART KOTA PERUSAHAAN EKSPOR
-                # ========================
-                top_10_city = df_filtered['Kota'].value_counts().head(10).reset_index()
-                top_10_city.columns = ["Kota", "Jumlah"]
-                
-                fig = px.bar(
-                    top_10_city,
-                    x="Kota",
-                    y="Jumlah",
-                    text="Jumlah", 
-                    color="Kota", 
-                    color_discrete_sequence=px.colors.qualitative.Plotly,
-                    title="Top 10 Kota Perusahaan Eksportir"
-                )
-                
-                fig.update_traces(texttemplate='%{text}', textposition='outside', showlegend=False)
-                fig.update_layout(
-                    xaxis_title="Kota",
-                    yaxis_title="Jumlah",
-                    uniformtext_minsize=8,
-                    uniformtext_mode='hide',
-                    showlegend=False,
-                    width=800,
-                    height=600
-                )
-                
-                figures_dict["3. Top 10 Kota Perusahaan Eksportir"] = fig
+def selected_trend(daily_all, start_date, end_date):
+    """
+    Seri tren sesuai resolusi yang dipilih di chart tren (juga dipakai laporan PDF)
+    """
+    bucket = TREND_OPTIONS[st.session_state.get("trend_choice", "Otomatis")]
+    return trend_series(daily_all, start_date, end_date, bucket=bucket)
 
-                # ========================
-                # 4. BAR CHART PERUSAHAAN EXPORTIR
-                # ========================
-                top_10_company = df_filtered['Nama Exportir/Importir'].value_counts().head(10).reset_index()
-                top_10_company.columns = ["Perusahaan", "Jumlah"]
-                
-                fig4 = px.bar(
-                    top_10_company,
-                    x="Perusahaan",
-                    y="Jumlah",
-                    text="Jumlah", 
-                    color="Jumlah",
-                    color_continuous_scale="plasma",
-                    title="Top 10 Perusahaan Ekspor Paling Banyak"
-                )
-                
-                fig4.update_traces(texttemplate='%{text}', textposition='outside')
-                fig4.update_layout(
-                    xaxis_title="Perusahaan",
-                    yaxis_title="Jumlah",
-                    width=800,
-                    height=600
-                )
-                figures_dict["4. Top 10 Perusahaan Ekspor"] = fig4
-
-                # ========================
-                # 5. LINE CHART TIMELINE
-                # ========================
-                timeline = df_filtered.groupby("Diterbitkan Tanggal").size().reset_index(name="Jumlah")
-                timeline['Tanggal_Display'] = timeline["Diterbitkan Tanggal"].dt.strftime('%d-%m-%Y')
-                timeline['Bulan_Tahun'] = timeline["Diterbitkan Tanggal"].dt.strftime('%b %Y')
-
-                fig5 = px.line(
-                    timeline,
-                    x="Diterbitkan Tanggal",
-                    y="Jumlah",
-                    markers=True,
-                    title="Tren Jumlah Ekspor",
-                    hover_data={'Diterbitkan Tanggal': False}
-                )
 
-                fig5.update_traces(
-                    line=dict(color="royalblue", width=2),
-                    marker=dict(size=8, color="orange"),
-                    hovertemplate="<b>Tanggal:</b> %{customdata[0]}<br><b>Jumlah:</b> %{y}<extra></extra>",
-                    customdata=timeline[['Tanggal_Display']].values
-                )
+def selected_country_labels(n_destinations):
+    return st.session_state.get("n_country_labels", min(DEFAULT_COUNTRY_LABELS, n_destinations))
 
-                fig5.update_layout(
-                    xaxis=dict(
-                        title="Tanggal", 
-                        showgrid=True, 
-                        gridcolor="lightgrey",
-                        tickformat="%b %Y",
-                        dtick="M1",  # Tick setiap bulan
-                        tickangle=45  # Rotate label agar tidak overlap
-                    ),
-                    yaxis=dict(title="Jumlah", showgrid=True, gridcolor="lightgrey"),
-                    plot_bgcolor="white",
-                    hovermode="x unified",
-                    width=800,
-                    height=600,
-                    margin=dict(b=100)  # Tambah margin bawah untuk rotated labels
-                )
 
-                monthly_ticks = timeline.groupby(timeline["Diterbitkan Tanggal"].dt.to_period("M")).first()
+@st.fragment
+def trend_chart_fragment(daily_all, start_date, end_date, filter_state):
+    started = time.perf_counter()
+    st.selectbox(
+        "Resolusi tren",
+        list(TREND_OPTIONS),
+        key="trend_choice",
+        help="Otomatis memilih harian/mingguan/bulanan sesuai rentang tanggal dan meringkas seri yang padat. "
+             "Pilih resolusi tertentu untuk melihat data penuh (zoom lewat range slider)."
+    )
+    def build():
+        trend, trend_bucket = selected_trend(daily_all, start_date, end_date)
+        return build_trend_chart(trend, trend_bucket, rangeslider=True)
+
+    fig = cached_figure(("trend", st.session_state.trend_choice), filter_state, build)
+    st.plotly_chart(fig, use_container_width=True)
+    timing_caption("Chart tren", started)
+
+
+@st.fragment
+def country_map_fragment(country_counts, n_destinations, filter_state):
+    started = time.perf_counter()
+    n_country_labels = st.slider(
+        "Jumlah label negara",
+        min_value=0,
+        max_value=max(n_destinations, 1),
+        value=selected_country_labels(n_destinations),
+        key="n_country_labels",
+        help="Jumlah negara teratas yang diberi label kode ISO3 di peta (juga di laporan PDF)"
+    )
+    fig = cached_figure(
+        ("country_map", n_country_labels), filter_state,
+        lambda: build_country_map(country_counts, n_labels=n_country_labels)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    timing_caption("Peta negara", started)
 
-                fig5.update_xaxes(
-                    tickvals=monthly_ticks["Diterbitkan Tanggal"],
-                    ticktext=monthly_ticks["Bulan_Tahun"],
-                    tickangle=45
-                )
-                
-                figures_dict["5. Tren Jumlah Ekspor"] = fig5
-
-                # ========================
-                # 6. MAP NEGARA TUJUAN
-                # ========================
-                country_counts = df_filtered['Negara Tujuan'].value_counts().reset_index()
-                country_counts.columns = ["Negara", "Jumlah"]
-                country_counts["ISO3"] = country_counts["Negara"].apply(get_iso3)
-
-                top_labels = country_counts.head(10)
-
-                fig6 = px.choropleth(
-                    country_counts,
-                    locations="Negara",
-                    locationmode="country names",
-                    color="Jumlah",
-                    hover_name="Negara",
-                    color_continuous_scale=["#e69795", "#bc656d", "#b03031"],
-                    title="Sebaran Negara Tujuan"
-                )
 
-                for _, row in top_labels.iterrows():
-                    fig6.add_trace(go.Scattergeo(
-                        locationmode="country names",
-                        locations=[row["Negara"]],
-                        text=row["ISO3"],
-                        mode="text",
-                        showlegend=False,
-                        textfont=dict(size=9, color="black"),
-                        hoverinfo="skip"
-                    ))
-
-                fig6.update_layout(
-                    geo=dict(showframe=False, showcoastlines=True, projection_type='natural earth'),
-                    width=800,
-                    height=600
+@st.fragment
+def export_fragment(dataset, df_filtered, summaries, country_counts, start_date, end_date, date_range,
+                    filtered_records, store_revision):
+    """
+    Tombol export + panel job; klik tombol hanya menjalankan ulang fragment ini
+    """
+    total_records = dataset["total_records"]
+
+    if st.button("🔄 Generate PDF Report", type="primary"):
+        with st.spinner("Menyiapkan chart untuk laporan PDF..."):
+            try:
+                # Resolusi tren dan jumlah label mengikuti pengaturan di chart
+                trend, trend_bucket = selected_trend(dataset["daily"], start_date, end_date)
+                n_country_labels = selected_country_labels(len(set(dataset["country_iso3"].values())))
+                figures_dict = build_pdf_figures(
+                    summaries, trend, trend_bucket, country_counts, n_country_labels=n_country_labels
                 )
-                figures_dict["6. Peta Sebaran Negara Tujuan"] = fig6
 
-                # Generate PDF
-                logo_path = "bbkksby_upscaled.png"
-                print(f"DEBUG: Checking logo at: {logo_path}")
-                print(f"DEBUG: File exists: {os.path.exists(logo_path)}")
-                print(f"DEBUG: Current directory: {os.getcwd()}")
-                
-                pdf_buffer = create_pdf_report(figures_dict, date_range, total_records, filtered_records, logo_path=logo_path)
-                
-                # Nama file PDF
-                filename = f"Dashboard_OMKABA_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-                
-                # Simpan ke session state untuk download
-                st.session_state.pdf_buffer = pdf_buffer
-                st.session_state.pdf_filename = filename
+                # Generate PDF di background, UI tetap responsif
+                job = EXPORT_JOBS.submit(
+                    export_job_key(
+                        REPORT_PDF, df_filtered, date_range, revision=store_revision,
+                        extra=(n_country_labels, trend_bucket)
+                    ),
+                    REPORT_PDF,
+                    f"Dashboard_OMKABA_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                    REPORT_MIME[REPORT_PDF],
+                    profiled(PROFILE_PDF, create_pdf_report, requested_profiles()),
+                    figures_dict, date_range, total_records, filtered_records,
+                    logo_path=LOGO_PATH,
+                    subscriber=export_subscriber(),
+                )
                 
-                st.sidebar.success("✅ PDF Report berhasil dibuat!")
+                # Simpan job id ke session state untuk polling & download
+                st.session_state.pdf_job_id = job.id
                 
             except Exception as e:
-                st.sidebar.error(f"❌ Error saat membuat PDF: {str(e)}")
+                st.error(f"❌ Error saat membuat PDF: {str(e)}")
     
     # Tombol Export Excel
-    if st.sidebar.button("📊 Generate Excel Report", type="primary"):
-        with st.spinner("Sedang membuat laporan Excel..."):
-            try:
-                # Date range string
-                if start_date == min_date and end_date == max_date:
-                    date_range = f"{min_date.strftime('%d-%m-%Y')} - {max_date.strftime('%d-%m-%Y')} (Semua Data)"
-                else:
-                    date_range = f"{start_date.strftime('%d-%m-%Y')} - {end_date.strftime('%d-%m-%Y')}"
-                
-                # Generate Excel
-                excel_buffer = create_excel_report(df_filtered, date_range, total_records, filtered_records)
-                
-                # Nama file Excel
-                excel_filename = f"Data_Ekspor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                
-                # Simpan ke session state untuk download
-                st.session_state.excel_buffer = excel_buffer
-                st.session_state.excel_filename = excel_filename
-                
-                st.sidebar.success("✅ Excel Report berhasil dibuat!")
-                
-            except Exception as e:
-                st.sidebar.error(f"❌ Error saat membuat Excel: {str(e)}")
-
-    # Tombol download jika PDF sudah dibuat
-    if 'pdf_buffer' in st.session_state:
-        st.sidebar.download_button(
-            label="📥 Download PDF Report",
-            data=st.session_state.pdf_buffer.getvalue(),
-            file_name=st.session_state.pdf_filename,
-            mime="application/pdf",
-            type="secondary"
-        )
+    if st.button("📊 Generate Excel Report", type="primary"):
+        try:
+            # Generate Excel di background
+            job = EXPORT_JOBS.submit(
+                export_job_key(REPORT_EXCEL, df_filtered, date_range, revision=store_revision),
+                REPORT_EXCEL,
+                f"Data_Ekspor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                REPORT_MIME[REPORT_EXCEL],
+                profiled(PROFILE_EXCEL, create_period_excel, requested_profiles()),
+                dataset, start_date, end_date, date_range,
+                # summaries dari store dibatasi top-N, sheet summary dihitung ulang dari baris lengkap
+                summaries=summaries if df_filtered is not None else None,
+                subscriber=export_subscriber(),
+            )
+            
+            # Simpan job id ke session state untuk polling & download
+            st.session_state.excel_job_id = job.id
+            
+        except Exception as e:
+            st.error(f"❌ Error saat membuat Excel: {str(e)}")
 
-    # Tombol download Excel jika sudah dibuat (tambahkan setelah tombol download PDF)
-    if 'excel_buffer' in st.session_state:
-        st.sidebar.download_button(
-            label="📥 Download Excel Report",
-            data=st.session_state.excel_buffer.getvalue(),
-            file_name=st.session_state.excel_filename,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            type="secondary"
-        )
+    # Progress, tombol batal dan tombol download untuk job export sesi ini
+    export_job_panel("pdf_job_id", "📥 Download PDF Report")
+    export_job_panel("excel_job_id", "📥 Download Excel Report")
 
-    # ========================
-    # REGENERATE FIGURES FOR DISPLAY
-    # ========================
-    
-    # ========================
-    # 1. PIE CHART KOMODITAS
-    # ========================
-    comodity = df_filtered['Jenis Komoditi'].value_counts().reset_index()
-    comodity.columns = ["Jenis Komoditi", "Jumlah"]
-
-    total = comodity["Jumlah"].sum()
-    comodity["Persentase"] = comodity["Jumlah"] / total * 100
-    comodity["Label"] = comodity.apply(
-        lambda x: f"{x['Jenis Komoditi']} ({x['Jumlah']} unit, {x['Persentase']:.2f}%)", axis=1
-    )
 
-    n_categories = len(comodity)
-    base_size = 390
-    additional_size = n_categories * 15  # Tambahan size berdasarkan jumlah kategori
-
-    fig1 = go.Figure(
-        data=[
-            go.Pie(
-                labels=comodity["Jenis Komoditi"],
-                values=comodity["Jumlah"],
-                hole=0.35,
-                textinfo="label+percent+value",
-                texttemplate="<b>%{label}</b><br>%{value} unit<br>(%{percent})",
-                hovertemplate="<b>%{label}</b><br>Jumlah: %{value}<br>Persen: %{percent}<extra></extra>",
-                marker=dict(
-                    colors=px.colors.qualitative.Plotly, 
-                    line=dict(color="white", width=2)
-                ),
-                textposition="outside",
-                textfont=dict(size=12, family="Arial", color="black"),
-                insidetextorientation='radial',
-                outsidetextfont=dict(size=11),
-                pull=0.03,
-            )
-        ]
-    )
+# ========================
+# TELEMETRI
+# ========================
+def telemetry_panel(run):
+    """
+    Rincian waktu (dan puncak memori jika OMKABA_TRACEMALLOC aktif) per fase
+    untuk rerun ini dan job export terakhir sesi ini
+    """
+    st.sidebar.caption(f"⏱️ Rerun penuh terakhir: {run.total_ms:.0f} ms")
+    with st.sidebar.expander("⏱️ Telemetri"):
+        if telemetry.TRACEMALLOC:
+            st.caption("⚠️ peak_kb: puncak memori seluruh proses, hanya valid jika satu pengguna aktif")
+        st.caption("Rerun terakhir")
+        st.dataframe(pd.DataFrame(run.summary()), hide_index=True, use_container_width=True)
+
+        for state_key, label in (("pdf_job_id", "Export PDF terakhir"), ("excel_job_id", "Export Excel terakhir")):
+            job = EXPORT_JOBS.get(st.session_state.get(state_key))
+            if job is not None and job.telemetry:
+                st.caption(f"{label} ({job.telemetry['total_ms']:.0f} ms)")
+                st.dataframe(pd.DataFrame(job.telemetry["phases"]), hide_index=True, use_container_width=True)
+
+        if telemetry.TELEMETRY_LOG != "off":
+            st.caption(f"📝 Log: {telemetry.TELEMETRY_LOG}")
+
+    profiles = recent_profiles()
+    if profiles:
+        with st.sidebar.expander("🔬 Profil"):
+            for profile in profiles[:3]:
+                st.caption(
+                    f"{profile['target']} · {profile['started_at']:%d-%m-%Y %H:%M:%S} · "
+                    f"{profile['total_s']:.2f} s · {profile['path']}"
+                )
+                st.dataframe(pd.DataFrame(profile["top"]), hide_index=True, use_container_width=True)
 
-    fig1.update_layout(
-        showlegend=False,
-        annotations=[],
-        uniformtext_minsize=10,
-        uniformtext_mode='hide',
-        
-        margin=dict(l=5, r=5, t=90, b=35),  # Margin sangat ketat
-        width=base_size + additional_size,  # Ukuran dinamis
-        height=base_size + additional_size,
-        autosize=False,
-        
-        # Hilangkan padding dan spacing yang tidak perlu
-        paper_bgcolor='white',
-        plot_bgcolor='white',
-        
-        # Hilangkan axis dan grid yang tidak diperlukan
-        xaxis=dict(visible=False, showgrid=False, zeroline=False),
-        yaxis=dict(visible=False, showgrid=False, zeroline=False),
-    )
 
-    fig1.update_traces(
-        marker_line_color='white',
-        marker_line_width=2,
-        textfont_size=11,
-        textposition='outside',
-        textfont_color='black',
-        insidetextfont=dict(size=11, color='white', family='Arial'),
-        outsidetextfont=dict(size=10, family='Arial'),
-        pull=[0.15 if i == 0 else 0.05 for i in range(len(comodity))],
-        rotation=30,
-        hole=0.4
-    )
-    
-    # Atur layout agar lebih compact
-    fig1.update_layout(
-        autosize=True,  # Auto-size untuk menyesuaikan konten
-        title={
-        'text': "Persentase Jenis Komoditi",
-        'y': 0.97,
-        'x': 0.0,
-        'xanchor': 'left',
-        'yanchor': 'top'
-    },
-    title_font=dict(size=20, color="black", family="Arial Black"),
-    title_font_color="black"
-    )
+def requested_profiles():
+    """
+    Target profiling dari query parameter (?profile=rerun,pdf,excel atau all)
+    """
+    return parse_targets(st.query_params.get("profile"))
+
 
-    # ========================
-    # 2. BAR CHART NEGARA
-    # ========================
-    top_10_country = df_filtered['Negara Tujuan'].value_counts().head(10).reset_index()
-    top_10_country.columns = ["Negara", "Jumlah"]
-
-    fig2 = px.bar(
-        top_10_country,
-        x="Negara",
-        y="Jumlah",
-        text="Jumlah",
-        color="Jumlah",
-        color_continuous_scale=["#e69795", "#bc656d", "#b03031"],
-        title="Top 10 Negara Tujuan"
+# ========================
+# DASHBOARD STREAMLIT
+# ========================
+st.set_page_config(page_title="Dashboard OMKABA", layout="wide")
+# Endpoint /metrics dan/atau textfile Prometheus (sekali per proses, lihat metrics.py)
+start_metrics_export()
+# Semua fase (parsing, preprocessing, filter, chart) selama rerun ini dicatat di satu run telemetri
+rerun_telemetry = telemetry.start_run("rerun")
+# Profil cProfile opsional untuk rerun ini (OMKABA_PROFILE atau ?profile=rerun)
+rerun_profile = start_profile(PROFILE_RERUN, requested_profiles())
+# st.stop() dan st.rerun() menghentikan skrip lewat exception; profil dan run telemetri
+# tetap ditutup dan dicatat di finally, juga untuk rerun yang berhenti lebih awal
+try:
+    keep_chart_settings()
+
+    col1, col2, col3 = st.columns([1, 4, 1])
+
+    with col1:
+        logo_bytes = logo_thumbnail()
+        if logo_bytes is not None:
+            st.image(logo_bytes, width=LOGO_DISPLAY_WIDTH)
+        pass
+
+    with col2:
+        st.markdown("""
+        <div style="text-align: center; padding: 20px 0; background: linear-gradient(90deg, #f8f9fa 0%, #e9ecef 50%, #f8f9fa 100%); border-radius: 10px; margin-bottom: 30px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+            <div style="font-size: 48px; margin-bottom: 10px;">
+                ✈️ 🚢 📦 🌍
+            </div>
+            <h1 style="color: #3EADB3; margin: 0; font-family: 'Arial', sans-serif; font-weight: bold; text-shadow: 1px 1px 2px rgba(0,0,0,0.1);">
+                📊 Dashboard BBKK Surabaya
+            </h1>
+            <p style="color: #9E6B2B; margin: 10px 0 0 0; font-style: italic; font-size: 20px;">
+                Analisis Ekspor OMKABA BBKK Surabaya
+            </p>
+            <div style="margin-top: 15px; font-size: 24px;">
+                📈 📋 🗺️
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col3:
+        pass
+
+    # Upload file (bisa beberapa file sekaligus, mis. satu file per bulan/pelabuhan)
+    uploaded_files = st.file_uploader("Upload file CSV/Excel", type=["csv", "xlsx"], accept_multiple_files=True)
+    if not uploaded_files:
+        # File dilepas: upload berikutnya (juga file yang sama) dihitung lagi
+        st.session_state.pop("counted_upload", None)
+
+    # Store historis opsional (OMKABA_STORE_PATH): upload ditambahkan ke store,
+    # dashboard hanya memuat agregat hasil query SQL
+    record_store = get_record_store()
+    use_store = record_store is not None and st.sidebar.toggle(
+        "🗄️ Gunakan data historis",
+        value=True,
+        help="Upload disimpan ke data historis dan dashboard menampilkan seluruh data yang pernah diupload"
     )
 
-    fig2.update_traces(texttemplate='%{text}', textposition='outside')
+    dataset = None
+    data_version = None
+    if use_store:
+        if uploaded_files:
+            content_hash = uploads_content_hash(f.getvalue() for f in uploaded_files)
+            # File yang sama tidak dibaca ulang di setiap rerun; hasil ingest terakhir
+            # disimpan di session state untuk ditampilkan
+            already_ingested = record_store.has_ingest(content_hash)
+            count_upload("store", content_hash, cached=already_ingested)
+            if not already_ingested:
+                df_upload, _ = read_datasets(uploaded_files)
+                st.session_state.ingest_counts = ingest_upload(
+                    record_store, df_upload, content_hash, name=", ".join(f.name for f in uploaded_files)
+                )
+            counts = st.session_state.get("ingest_counts")
+            if counts:
+                st.success(
+                    f"✅ Data historis diperbarui: {counts['new']:,} record baru, "
+                    f"{counts['updated']:,} diperbarui, {counts['duplicate']:,} duplikat dilewati"
+                )
+                if counts["invalid"]:
+                    st.warning(f"⚠️ {counts['invalid']:,} baris tanpa tanggal valid tidak disimpan")
+        if record_store.count() > 0:
+            dataset = prepare_store_dataset(record_store)
+            data_version = record_store.revision()
+    elif uploaded_files:
+        # Semua file dibaca paralel, digabung lalu dipreprocessing sekali lewat engine
+        # yang sama dengan CLI. Hasilnya (termasuk lookup ISO3, seri harian dan rentang
+        # tanggal) di-cache per isi file dan dipakai bersama oleh semua sesi.
+        content_hash = uploads_content_hash(f.getvalue() for f in uploaded_files)
+        dataset, from_cache = DATASET_CACHE.get_or_build(content_hash, lambda: load_dataset(uploaded_files))
+        data_version = content_hash
+        count_upload("dataset", content_hash, cached=from_cache)
+        cache_note = " (⚡ dari cache)" if from_cache else ""
+        if len(uploaded_files) > 1:
+            st.success(f"✅ {len(uploaded_files)} file berhasil diupload dan digabung "
+                       f"({dataset['n_duplicates']:,} baris duplikat antar file dibuang){cache_note}")
+        else:
+            st.success(f"✅ File berhasil diupload!{cache_note}")
 
-    max_value = max(top_10_country["Jumlah"])
-    y_range_max = max_value * 1.2
+    if dataset is not None:
+        country_iso3 = dataset["country_iso3"]
+        unresolved_countries = dataset["unresolved_countries"]
+        daily_all = dataset["daily"]
     
-    fig2.update_layout(xaxis_title="Negara", yaxis_title="Jumlah", yaxis=dict(range=[0, y_range_max]))
+        # ========================
+        # FILTER TANGGAL
+        # ========================
+        st.sidebar.header("🗓️ Filter Tanggal")
+    
+        # Deteksi batas minimum dan maksimum tanggal
+        if dataset["min_date"] is None:
+            st.error("❌ Tidak ada data valid pada kolom tanggal setelah preprocessing!")
+            st.stop()
+    
+        min_date = dataset["min_date"]
+        max_date = dataset["max_date"]
 
-    # ========================
-    # 3. MAP KOTA PERUSAHAAN EKSPOR
-    # ========================
-    city_counts = df_filtered['Kota'].value_counts().reset_index()
-    city_counts.columns = ['Kota', 'Jumlah']
+        if pd.isna(min_date) or pd.isna(max_date):
+            st.sidebar.warning("⚠️ Rentang tanggal tidak dapat ditentukan (semua NaT)")
+        else:
+            st.sidebar.info(f"📅 Rentang data tersedia:\n{min_date.strftime('%d-%m-%y')} - {max_date.strftime('%d-%m-%y')}")
     
-    df_map = pd.merge(df_city, city_counts, on='Kota', how='inner')
+        # Checkbox untuk pilih semua rentang tanggal
+        select_all_dates = st.sidebar.checkbox("Pilih Semua Rentang Tanggal", value=True)
     
-    if not df_map.empty:
-        df_map["Kota_Label"] = df_map["Kota"] + " (" + df_map["Jumlah"].astype(str) + ")"
+        if select_all_dates:
+            # Gunakan seluruh rentang tanggal
+            start_date = min_date
+            end_date = max_date
+            st.sidebar.success("✅ Menampilkan semua data")
+        else:
+            # Date picker untuk rentang tanggal
+            col_start, col_end = st.sidebar.columns(2)
         
-        fig3 = px.scatter_mapbox(
-            df_map,
-            lat="lat",
-            lon="lon",
-            hover_name="Kota",
-            hover_data={"Jumlah": True, "lat": False, "lon": False},
-            color="Kota_Label",   
-            zoom=4,
-            title="Sebaran Kota Perusahaan Eksportir"
-        )
+            with col_start:
+                start_date = st.date_input(
+                    "Tanggal Mulai",
+                    value=min_date,
+                    min_value=min_date,
+                    max_value=max_date
+                )
         
-        fig3.update_traces(marker=dict(size=12, opacity=0.8))
+            with col_end:
+                end_date = st.date_input(
+                    "Tanggal Akhir",
+                    value=max_date,
+                    min_value=min_date,
+                    max_value=max_date
+                )
         
-        fig3.update_layout(
-            mapbox_style="carto-positron",
-            legend_title="Kota (Jumlah)",
-            margin={"r":0,"t":50,"l":0,"b":0},
-            title=dict(
-                text="Sebaran Kota Perusahaan Eksportir",
-                x=0.0,  # pojok kiri
-                xanchor="left"
-            )
+            # Validasi rentang tanggal
+            if start_date > end_date:
+                st.sidebar.error("⚠️ Tanggal mulai tidak boleh lebih besar dari tanggal akhir!")
+                st.stop()
+    
+        # Filter data berdasarkan tanggal; summaries (value_counts) dihitung sekali,
+        # dipakai bersama oleh chart, PDF dan Excel
+        df_filtered, filtered_records, summaries = select_period(dataset, start_date, end_date)
+    
+        # Tampilkan informasi filter
+        total_records = dataset["total_records"]
+    
+        st.sidebar.metric(
+            label="📊 Data Ditampilkan",
+            value=f"{filtered_records:,}",
+            delta=f"{filtered_records - total_records:,} dari total {total_records:,}"
         )
-    else:
-        # Jika tidak ada data kota yang cocok
-        fig3 = go.Figure()
-        fig3.add_annotation(text="Tidak ada data kota yang tersedia", 
-                          xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
-        fig3.update_layout(title="Sebaran Kota Perusahaan Eksportir")
-
-    # ========================
-    # 4. BAR CHART PERUSAHAAN EXPORTIR
-    # ========================
-    top_10_company = df_filtered['Nama Exportir/Importir'].value_counts().head(10).reset_index()
-    top_10_company.columns = ["Perusahaan", "Jumlah"]
-    
-    fig4 = px.bar(
-        top_10_company,
-        x="Perusahaan",
-        y="Jumlah",
-        text="Jumlah", 
-        color="Jumlah",
-        color_continuous_scale="plasma",
-        title="Top 10 Perusahaan Ekspor Paling Banyak"
-    )
     
-    fig4.update_traces(texttemplate='%{text}', textposition='outside')
+        # Jika tidak ada data setelah filter
+        if filtered_records == 0:
+            st.warning("⚠️ Tidak ada data dalam rentang tanggal yang dipilih. Silakan pilih rentang tanggal lain.")
+            st.stop()
 
-    max_value = max(top_10_company["Jumlah"])
-    y_range_max = max_value * 1.2
-    
-    fig4.update_layout(
-        xaxis_title="Perusahaan",
-        yaxis_title="Jumlah",
-        yaxis=dict(range=[0, y_range_max])
-    )
+        date_range = format_date_range(start_date, end_date, min_date, max_date)
 
-    # ========================
-    # 5. LINE CHART TIMELINE
-    # ========================
-    timeline = df_filtered.groupby("Diterbitkan Tanggal").size().reset_index(name="Jumlah")
-
-    fig5 = px.line(
-        timeline,
-        x="Diterbitkan Tanggal",
-        y="Jumlah",
-        markers=True,
-        title="Tren Jumlah Ekspor"
-    )
+        # ========================
+        # DIAGNOSTIK DATA
+        # ========================
+        # Koordinat kota lewat index ternormalisasi; kota tanpa koordinat dicatat
+        df_map, missing_cities = city_map_data(summaries)
+        country_counts = build_country_counts(summaries['Negara Tujuan'], country_iso3)
 
-    fig5.update_traces(
-        line=dict(color="royalblue", width=2),
-        marker=dict(size=8, color="orange"),
-        hovertemplate="<b>Tanggal:</b> %{x|%d %B %Y}<br><b>Jumlah:</b> %{y}<extra></extra>"
-    )
+        with st.sidebar.expander("🔧 Diagnostik Data"):
+            if unresolved_countries:
+                st.warning(f"⚠️ {len(unresolved_countries)} nama negara tidak dikenali dan tidak tampil di peta:")
+                st.write(", ".join(map(str, unresolved_countries)))
+            else:
+                st.caption("✅ Semua nama negara tujuan dikenali")
 
-    fig5.update_layout(
-        xaxis=dict(title="Tanggal", showgrid=True, gridcolor="lightgrey", tickformat="%b %Y"),
-        yaxis=dict(title="Jumlah", showgrid=True, gridcolor="lightgrey"),
-        plot_bgcolor="white",
-        hovermode="x unified"
-    )
+            if missing_cities:
+                st.warning(f"⚠️ {len(missing_cities)} kota belum punya koordinat dan tidak tampil di peta kota:")
+                st.write(", ".join(map(str, missing_cities)))
+            else:
+                st.caption("✅ Semua kota hasil ekstraksi punya koordinat")
+
+            memory = dataset.get("memory")
+            if memory:
+                saved = memory["before"] - memory["after"]
+                st.caption(
+                    f"💾 Memori data sesi: {memory['after'] / 2**20:.1f} MB "
+                    f"(hemat {saved / 2**20:.1f} MB / {saved / max(memory['before'], 1):.0%} dari hasil baca file "
+                    f"lewat kolom categorical dan arsip alamat; kolom di luar skema tidak dibaca sama sekali)"
+                )
+                if memory.get("archived"):
+                    st.caption(f"🗄️ Arsip alamat di disk: {memory['archived'] / 2**20:.1f} MB, dibaca saat export Excel")
+
+            cache_stats = DATASET_CACHE.stats()
+            st.caption(
+                f"🗃️ Cache dataset: {cache_stats['entries']} dataset, "
+                f"{cache_stats['bytes'] / 2**20:.1f} / {cache_stats['max_bytes'] / 2**20:.0f} MB "
+                f"({cache_stats['hits']} hit, {cache_stats['misses']} miss)"
+            )
 
-    # ========================
-    # 6. MAP NEGARA TUJUAN
-    # ========================
-    country_counts = df_filtered['Negara Tujuan'].value_counts().reset_index()
-    country_counts.columns = ["Negara", "Jumlah"]
-    country_counts["ISO3"] = country_counts["Negara"].apply(get_iso3)
-
-    top_labels = country_counts.head(10)
-
-    fig6 = px.choropleth(
-        country_counts,
-        locations="Negara",
-        locationmode="country names",
-        color="Jumlah",
-        hover_name="Negara",
-        color_continuous_scale=["#e69795", "#bc656d", "#b03031"],
-        title="Sebaran Negara Tujuan"
-    )
+            artifact_stats = ARTIFACTS.stats()
+            st.caption(
+                f"📦 File export: {artifact_stats['artifacts']} file, "
+                f"{artifact_stats['memory_bytes'] / 2**20:.1f} / {artifact_stats['max_bytes'] / 2**20:.0f} MB di memori, "
+                f"{artifact_stats['disk_bytes'] / 2**20:.1f} MB di disk"
+            )
 
-    for _, row in top_labels.iterrows():
-        fig6.add_trace(go.Scattergeo(
-            locationmode="country names",
-            locations=[row["Negara"]],
-            text=row["ISO3"],
-            mode="text",
-            showlegend=False,
-            textfont=dict(size=9, color="black"),
-            hoverinfo="skip"
-        ))
-
-    fig6.update_layout(geo=dict(showframe=False, showcoastlines=True, projection_type='natural earth'))
-
-    # ========================
-    # TAMPILKAN DI STREAMLIT
-    # ========================
-    st.plotly_chart(fig1, use_container_width=True)
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        st.plotly_chart(fig2, use_container_width=True)
-    with col2:
-        st.plotly_chart(fig4, use_container_width=True)
+        # ========================
+        # TOMBOL EXPORT PDF
+        # ========================
+        st.sidebar.header("📄 Export Laporan")
+        store_revision = record_store.revision() if use_store else None
+        with st.sidebar:
+            export_fragment(
+                dataset, df_filtered, summaries, country_counts, start_date, end_date, date_range,
+                filtered_records, store_revision
+            )
+
+        # ========================
+        # TAMPILKAN DI STREAMLIT
+        # ========================
+        # Chart dikelompokkan dalam tab; hanya tab yang dibuka yang figure-nya dibuat
+        # dan dikirim ke browser (peta kota/negara paling berat). Figure di-cache per
+        # state filter, jadi berpindah tab tidak membangun ulang chart yang sudah ada.
+        filter_state = (data_version, start_date, end_date)
+        tab_summary, tab_city, tab_country, tab_trend = st.tabs(
+            ["📦 Ringkasan", "🏙️ Peta Kota", "🌍 Peta Negara", "📈 Tren"],
+            key="chart_tab",
+            on_change="rerun"
+        )
 
-    st.plotly_chart(fig3, use_container_width=True)
-    st.plotly_chart(fig6, use_container_width=True)
-    st.plotly_chart(fig5, use_container_width=True)
+        if tab_summary.open:
+            with tab_summary:
+                started = time.perf_counter()
+                fig1 = cached_figure(
+                    "commodity", filter_state, lambda: build_commodity_pie(summaries['Jenis Komoditi'], show_title=True)
+                )
+                fig2 = cached_figure("country_bar", filter_state, lambda: build_country_bar(summaries['Negara Tujuan']))
+                fig4 = cached_figure(
+                    "company_bar", filter_state, lambda: build_company_bar(summaries['Nama Exportir/Importir'])
+                )
+
+                st.plotly_chart(fig1, use_container_width=True)
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.plotly_chart(fig2, use_container_width=True)
+                with col2:
+                    st.plotly_chart(fig4, use_container_width=True)
+                timing_caption("Ringkasan", started)
+
+        if tab_city.open:
+            with tab_city:
+                started = time.perf_counter()
+                fig3 = cached_figure("city_map", filter_state, lambda: build_city_map(df_map))
+                st.plotly_chart(fig3, use_container_width=True)
+                timing_caption("Peta kota", started)
+
+        if tab_country.open:
+            with tab_country:
+                country_map_fragment(country_counts, len(set(country_iso3.values())), filter_state)
+
+        if tab_trend.open:
+            with tab_trend:
+                trend_chart_fragment(daily_all, start_date, end_date, filter_state)
   
-else:
-    st.info("📥 Silakan upload file CSV/Excel untuk memulai.")
\ No newline at end of file
+    else:
+        st.info("📥 Silakan upload file CSV/Excel untuk memulai.")
+finally:
+    if rerun_profile is not None:
+        stop_profile(rerun_profile)
+    telemetry.finish_run(rerun_telemetry)
+    telemetry_panel(rerun_telemetry)
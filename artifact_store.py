@@ -0,0 +1,187 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ArtifactStore:
+    """
+    Penyimpanan file hasil export (PDF/Excel) per proses, dipakai bersama semua sesi.
+
+    Artifact disimpan di memori selama total ukurannya muat di max_bytes;
+    artifact paling lama dipindah (spill) ke file sementara supaya yang baru
+    tetap muat. Artifact yang lebih besar dari budget langsung ditulis ke disk.
+    Setiap artifact kedaluwarsa ttl_seconds setelah dibuat.
+
+    File spill ditulis di luar lock supaya get/put sesi lain tidak menunggu
+    penulisan file besar; selama ditulis, artifact tetap dibaca dari memori.
+
+    Download membaca artifact lewat read() saat tombol diklik, jadi bytes tidak
+    perlu disalin ke session state atau ke tombol download di setiap rerun.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl_seconds=3600, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._spill_dir = spill_dir
+        self._memory = OrderedDict()   # id -> bytes (urutan = paling lama dulu)
+        self._files = {}               # id -> path file spill
+        self._spilling = {}            # id -> bytes yang sedang ditulis ke disk
+        self._sizes = {}
+        self._created = {}
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.spilled = 0
+
+    def _ensure_spill_dir(self):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="omkaba-artifacts-")
+        return self._spill_dir
+
+    @staticmethod
+    def _write_file(spill_dir, artifact_id, data):
+        """
+        Tulis artifact ke file spill; dipanggil tanpa memegang lock
+        """
+        path = os.path.join(spill_dir, artifact_id)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def put(self, data):
+        """
+        Simpan hasil export (bytes atau BytesIO); mengembalikan id artifact
+        """
+        if isinstance(data, io.BytesIO):
+            data = data.getvalue()
+        artifact_id = uuid.uuid4().hex
+        size = len(data)
+        spill = []
+
+        with self._lock:
+            self._expire()
+            self._sizes[artifact_id] = size
+            self._created[artifact_id] = time.time()
+
+            if size > self.max_bytes:
+                spill.append((artifact_id, data))
+            else:
+                # Pindahkan artifact paling lama ke disk sampai artifact baru muat
+                while self._memory and self._memory_bytes + size > self.max_bytes:
+                    old_id, old_data = self._memory.popitem(last=False)
+                    self._memory_bytes -= len(old_data)
+                    spill.append((old_id, old_data))
+                self._memory[artifact_id] = data
+                self._memory_bytes += size
+
+            if not spill:
+                return artifact_id
+            self._spilling.update(spill)
+            spill_dir = self._ensure_spill_dir()
+
+        written = []
+        try:
+            for spill_id, spill_data in spill:
+                written.append((spill_id, self._write_file(spill_dir, spill_id, spill_data)))
+        finally:
+            with self._lock:
+                for spill_id, path in written:
+                    self._spilling.pop(spill_id, None)
+                    if spill_id in self._sizes:
+                        self._files[spill_id] = path
+                        self.spilled += 1
+                    else:
+                        # Sudah dihapus/kedaluwarsa selama file ditulis
+                        _remove_file(path)
+                # Gagal ditulis (mis. disk penuh): artifact dibuang
+                for spill_id, _ in spill[len(written):]:
+                    self._remove(spill_id)
+        return artifact_id
+
+    def exists(self, artifact_id):
+        with self._lock:
+            self._expire()
+            return artifact_id in self._sizes
+
+    def size(self, artifact_id):
+        with self._lock:
+            return self._sizes.get(artifact_id)
+
+    def read(self, artifact_id):
+        """
+        Bytes artifact; None jika sudah kedaluwarsa. File spill dibaca lalu langsung ditutup
+        """
+        with self._lock:
+            data = self._memory.get(artifact_id)
+            if data is None:
+                data = self._spilling.get(artifact_id)
+            path = self._files.get(artifact_id)
+        if data is not None:
+            return data
+        if path is not None:
+            try:
+                with open(path, "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                return None
+        return None
+
+    def remove(self, artifact_id):
+        with self._lock:
+            self._remove(artifact_id)
+
+    def _remove(self, artifact_id):
+        data = self._memory.pop(artifact_id, None)
+        if data is not None:
+            self._memory_bytes -= len(data)
+        self._spilling.pop(artifact_id, None)
+        path = self._files.pop(artifact_id, None)
+        if path is not None:
+            _remove_file(path)
+        self._sizes.pop(artifact_id, None)
+        self._created.pop(artifact_id, None)
+
+    def _expire(self):
+        """
+        Hapus artifact yang sudah lebih tua dari ttl_seconds
+        """
+        cutoff = time.time() - self.ttl_seconds
+        for artifact_id in [a for a, created in self._created.items() if created < cutoff]:
+            self._remove(artifact_id)
+
+    def clear(self):
+        with self._lock:
+            for artifact_id in list(self._sizes):
+                self._remove(artifact_id)
+            if self._spill_dir is not None:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+
+    def stats(self):
+        with self._lock:
+            self._expire()
+            return {
+                "artifacts": len(self._sizes),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": sum(self._sizes[a] for a in self._files),
+                "max_bytes": self.max_bytes,
+                "spilled": self.spilled,
+            }
+
+
+# Satu store per proses, dipakai bersama oleh semua sesi Streamlit
+ARTIFACTS = ArtifactStore(
+    max_bytes=int(os.environ.get("OMKABA_ARTIFACT_BUDGET_MB", "256")) * 1024 * 1024,
+    ttl_seconds=int(os.environ.get("OMKABA_ARTIFACT_TTL", "3600")),
+)
@@ -0,0 +1,85 @@
+import io
+import os
+from functools import lru_cache
+from typing import Optional
+
+from PIL import Image as PILImage
+from reportlab.lib.utils import ImageReader
+
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bbkksby_upscaled.png")
+
+# Ukuran logo di halaman PDF (points) dan resolusi cetak yang dibutuhkan
+LOGO_PDF_WIDTH = 110
+LOGO_PDF_HEIGHT = 55
+LOGO_PDF_DPI = 300
+
+# Lebar logo di header dashboard (pixel, sebelum dikali 2 untuk layar HiDPI)
+LOGO_DISPLAY_WIDTH = 150
+
+
+@lru_cache(maxsize=None)
+def _load_logo(path: str) -> Optional[PILImage.Image]:
+    """
+    Membaca file logo sekali per proses
+    """
+    try:
+        with PILImage.open(path) as img:
+            img.load()
+            return img.copy()
+    except OSError as e:
+        print(f"⚠️ Logo tidak bisa dibaca ({path}): {e}")
+        return None
+
+
+@lru_cache(maxsize=None)
+def logo_png_bytes(max_width_px: int, path: str = LOGO_PATH) -> Optional[bytes]:
+    """
+    Logo yang sudah diperkecil ke lebar tertentu (rasio dipertahankan), dalam bentuk PNG
+    """
+    img = _load_logo(path)
+    if img is None:
+        return None
+
+    img = img.copy()
+    img.thumbnail((max_width_px, max_width_px), PILImage.LANCZOS)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=None)
+def pdf_logo_reader(path: str = LOGO_PATH) -> Optional[ImageReader]:
+    """
+    ImageReader logo untuk PDF, dibuat sekali lalu dipakai ulang di semua halaman dan laporan
+    """
+    max_width_px = int(LOGO_PDF_WIDTH / 72 * LOGO_PDF_DPI)
+    png_bytes = logo_png_bytes(max_width_px, path)
+    if png_bytes is None:
+        return None
+    return ImageReader(io.BytesIO(png_bytes))
+
+
+def logo_thumbnail(path: str = LOGO_PATH) -> Optional[bytes]:
+    """
+    Varian kecil logo untuk st.image di header dashboard
+    """
+    return logo_png_bytes(LOGO_DISPLAY_WIDTH * 2, path)
+
+
+def draw_pdf_logo(canvas, x, y, path: str = LOGO_PATH):
+    """
+    Menggambar logo sebagai form XObject: gambar disimpan sekali di PDF
+    dan setiap halaman hanya mereferensikannya
+    """
+    reader = pdf_logo_reader(path)
+    if reader is None:
+        return
+
+    form_name = "omkaba_logo"
+    if not canvas.hasForm(form_name):
+        canvas.beginForm(form_name)
+        canvas.drawImage(reader, x, y, width=LOGO_PDF_WIDTH, height=LOGO_PDF_HEIGHT, mask='auto')
+        canvas.endForm()
+    canvas.doForm(form_name)
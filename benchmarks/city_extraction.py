@@ -0,0 +1,258 @@
+"""
+Harness regresi ekstraksi kota: akurasi + throughput per strategi dan per
+backend terdaftar (city_backends.CITY_BACKENDS), dan diff hasil dua
+implementasi pada korpus besar.
+
+Golden set (benchmarks/data/city_golden.csv) berisi alamat berlabel kota yang
+benar. Korpus throughput/diff diambil dari data sintetis (synthetic_data.py)
+atau dari kolom "Alamat Perusahaan" file upload asli.
+
+Jalankan dari root project:
+
+    # Akurasi golden set dan rows/detik semua backend dan strategi
+    python benchmarks/city_extraction.py accuracy --rows 20000
+
+    # Gagal (exit 1) jika akurasi implementasi utama turun di bawah batas
+    python benchmarks/city_extraction.py accuracy --min-accuracy 0.95
+
+    # Bandingkan dua implementasi (nama backend atau modul:fungsi) dan tulis setiap mapping yang berubah
+    python benchmarks/city_extraction.py diff --new token_index --rows 200000 --output-diff /tmp/diff.csv
+    python benchmarks/city_extraction.py diff --new kandidat:extract_city --input data.xlsx --fail-on-diff
+"""
+import argparse
+import importlib
+import inspect
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from city_backends import CITY_BACKENDS, DEFAULT_CITY_BACKEND, REFERENCE_BACKEND, clear_city_cache
+from engine import read_dataset
+from preprocessing import (
+    CITIES_INDONESIA, extract_city_comprehensive, extract_city_with_area_mapping, extract_city_regex_pattern,
+    extract_city_keyword_based, extract_city_last_part, extract_city_fallback
+)
+from synthetic_data import generate_permits
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(BENCH_DIR, "data", "city_golden.csv")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+UNKNOWN_CITY = "Tidak Diketahui"
+
+# Backend yang dipakai pipeline saat ini menjadi implementasi utama
+DEFAULT_IMPLEMENTATION = os.environ.get("OMKABA_CITY_BACKEND", DEFAULT_CITY_BACKEND)
+
+# Strategi per alamat: kaskade gabungan dan setiap metode penyusunnya
+STRATEGIES = {
+    "comprehensive": lambda address: extract_city_comprehensive(address, CITIES_INDONESIA),
+    "area_mapping": extract_city_with_area_mapping,
+    "regex_pattern": lambda address: extract_city_regex_pattern(address, CITIES_INDONESIA),
+    "keyword": extract_city_keyword_based,
+    "last_part": extract_city_last_part,
+    "fallback": lambda address: extract_city_fallback(address, CITIES_INDONESIA),
+}
+
+
+def as_batch(fn):
+    """
+    Fungsi per alamat -> fungsi batch (Series alamat -> Series kota) seperti backend
+    """
+    return lambda addresses: pd.Series([fn(address) for address in addresses], index=addresses.index, dtype=object)
+
+
+def all_strategies():
+    strategies = {f"backend:{name}": backend for name, backend in CITY_BACKENDS.items()}
+    strategies.update({name: as_batch(fn) for name, fn in STRATEGIES.items()})
+    return strategies
+
+
+def load_implementation(spec):
+    """
+    Nama backend terdaftar atau "modul:fungsi" -> fungsi batch. Fungsi yang juga
+    meminta daftar kota (seperti extract_city_comprehensive) diberi CITIES_INDONESIA.
+    """
+    if spec in CITY_BACKENDS:
+        return CITY_BACKENDS[spec]
+    module_name, _, function_name = spec.partition(":")
+    fn = getattr(importlib.import_module(module_name), function_name)
+    required = [
+        p for p in inspect.signature(fn).parameters.values()
+        if p.default is inspect.Parameter.empty and p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+    ]
+    if len(required) >= 2:
+        return as_batch(lambda address: fn(address, CITIES_INDONESIA))
+    return as_batch(fn)
+
+
+def load_golden(path=GOLDEN_PATH):
+    golden = pd.read_csv(path, dtype=object)
+    # Sel alamat kosong dibaca sebagai NaN, sama seperti di file upload
+    return golden["alamat"], golden["kota"].tolist()
+
+
+def load_corpus(input_path=None, rows=20000, seed=0):
+    """
+    Daftar alamat (dengan pengulangan seperti data asli) dari file upload atau data sintetis
+    """
+    if input_path:
+        addresses = read_dataset(input_path)["Alamat Perusahaan"]
+    else:
+        addresses = generate_permits(rows, seed=seed)["Alamat Perusahaan"]
+    return addresses.astype(object).reset_index(drop=True)
+
+
+def run_extraction(fn, addresses):
+    # Backend cached diukur dingin, tanpa sisa cache dari run sebelumnya
+    clear_city_cache()
+    started = time.perf_counter()
+    results = fn(addresses).tolist()
+    return results, time.perf_counter() - started
+
+
+def accuracy(fn, addresses, expected):
+    """
+    (akurasi, daftar salah) pada golden set; None dihitung sebagai "Tidak Diketahui"
+    """
+    clear_city_cache()
+    predicted = [city or UNKNOWN_CITY for city in fn(addresses).tolist()]
+    wrong = [
+        {"alamat": address, "expected": want, "got": got}
+        for address, want, got in zip(addresses, expected, predicted)
+        if got != want
+    ]
+    return 1 - len(wrong) / len(expected), wrong
+
+
+def evaluate_strategies(strategies, corpus, golden_addresses, golden_expected):
+    results = {}
+    for name, fn in strategies.items():
+        acc, wrong = accuracy(fn, golden_addresses, golden_expected)
+        outputs, seconds = run_extraction(fn, corpus)
+        results[name] = {
+            "accuracy": round(acc, 4),
+            "wrong": wrong,
+            "rows_per_sec": round(len(corpus) / seconds, 1) if seconds else None,
+            "seconds": round(seconds, 3),
+            "coverage": round(sum(o not in (None, UNKNOWN_CITY) for o in outputs) / len(outputs), 4),
+        }
+    return results
+
+
+def diff_implementations(old_fn, new_fn, addresses):
+    """
+    Jalankan dua implementasi pada alamat unik korpus. Mengembalikan
+    (DataFrame mapping yang berubah beserta jumlah baris terdampak, detik lama, detik baru).
+    """
+    counts = addresses.value_counts(dropna=False)
+    unique = pd.Series(counts.index, dtype=object)
+    old_out, old_seconds = run_extraction(old_fn, unique)
+    new_out, new_seconds = run_extraction(new_fn, unique)
+    changed = pd.DataFrame({"alamat": unique.tolist(), "rows": counts.to_numpy(), "old": old_out, "new": new_out})
+    changed = changed[changed["old"].fillna(UNKNOWN_CITY) != changed["new"].fillna(UNKNOWN_CITY)]
+    return changed.sort_values("rows", ascending=False, ignore_index=True), old_seconds, new_seconds
+
+
+def write_results(kind, payload, output=None):
+    output = output or os.path.join(RESULTS_DIR, f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(timespec="seconds"), **payload}, f, indent=2,
+                  default=str, ensure_ascii=False)
+    print(f"\nHasil: {output}")
+
+
+def cmd_accuracy(args):
+    golden_addresses, golden_expected = load_golden(args.golden)
+    corpus = load_corpus(args.input, args.rows, args.seed)
+    # Implementasi utama paling atas, lalu semua backend terdaftar dan strategi penyusun
+    main_name = args.implementation if args.implementation not in CITY_BACKENDS else f"backend:{args.implementation}"
+    strategies = {main_name: load_implementation(args.implementation), **all_strategies()}
+
+    results = evaluate_strategies(strategies, corpus, golden_addresses, golden_expected)
+
+    print(f"Golden set: {len(golden_expected)} alamat, korpus throughput: {len(corpus):,} baris\n")
+    print(f"{'strategi':<40} {'akurasi':>8} {'cakupan':>8} {'baris/detik':>12}")
+    for name, result in results.items():
+        print(f"{name:<40} {result['accuracy']:>8.1%} {result['coverage']:>8.1%} {result['rows_per_sec']:>12,.0f}")
+
+    for wrong in results[main_name]["wrong"]:
+        print(f"  ✗ {wrong['alamat']!r}: diharapkan {wrong['expected']}, hasil {wrong['got']}")
+
+    write_results("city_extraction", {"golden": args.golden, "corpus_rows": len(corpus), "strategies": results},
+                  args.output)
+
+    if args.min_accuracy is not None and results[main_name]["accuracy"] < args.min_accuracy:
+        print(f"❌ Akurasi {main_name} {results[main_name]['accuracy']:.1%} di bawah {args.min_accuracy:.1%}")
+        return 1
+    return 0
+
+
+def cmd_diff(args):
+    corpus = load_corpus(args.input, args.rows, args.seed)
+    changed, old_seconds, new_seconds = diff_implementations(
+        load_implementation(args.old), load_implementation(args.new), corpus
+    )
+    n_unique = corpus.nunique(dropna=False)
+
+    print(f"Korpus: {len(corpus):,} baris, {n_unique:,} alamat unik")
+    print(f"{args.old}: {old_seconds:.2f} s   {args.new}: {new_seconds:.2f} s "
+          f"({old_seconds / new_seconds if new_seconds else float('inf'):.1f}x)")
+    print(f"Mapping berubah: {len(changed):,} alamat unik, {int(changed['rows'].sum()):,} baris")
+    for row in changed.head(args.show).itertuples(index=False):
+        print(f"  {row.rows:>6,}x {row.alamat!r}: {row.old} -> {row.new}")
+
+    if args.output_diff:
+        changed.to_csv(args.output_diff, index=False)
+        print(f"Daftar lengkap: {args.output_diff}")
+
+    write_results("city_extraction_diff", {
+        "old": args.old, "new": args.new, "corpus_rows": len(corpus), "unique_addresses": n_unique,
+        "old_seconds": round(old_seconds, 3), "new_seconds": round(new_seconds, 3),
+        "changed_addresses": len(changed), "changed_rows": int(changed["rows"].sum()),
+        "changes": changed.to_dict(orient="records"),
+    }, args.output)
+
+    return 1 if args.fail_on_diff and len(changed) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_corpus_args(p):
+        p.add_argument("--input", help="File upload CSV/Excel sebagai korpus (default: data sintetis)")
+        p.add_argument("--rows", type=int, default=20000, help="Jumlah baris data sintetis")
+        p.add_argument("--seed", type=int, default=0)
+        p.add_argument("--output", help="File hasil JSON (default: benchmarks/results/...)")
+
+    p_acc = sub.add_parser("accuracy", help="Akurasi golden set dan throughput per strategi")
+    add_corpus_args(p_acc)
+    p_acc.add_argument("--golden", default=GOLDEN_PATH, help="CSV golden set (kolom alamat, kota)")
+    p_acc.add_argument("--implementation", default=DEFAULT_IMPLEMENTATION,
+                       help="Implementasi utama (nama backend atau modul:fungsi) yang diukur paling atas")
+    p_acc.add_argument("--min-accuracy", type=float, help="Exit 1 jika akurasi implementasi utama di bawah nilai ini")
+    p_acc.set_defaults(func=cmd_accuracy)
+
+    p_diff = sub.add_parser("diff", help="Bandingkan hasil dua implementasi pada korpus")
+    add_corpus_args(p_diff)
+    p_diff.add_argument("--old", default=REFERENCE_BACKEND, help="Implementasi acuan (nama backend atau modul:fungsi)")
+    p_diff.add_argument("--new", required=True, help="Implementasi kandidat (nama backend atau modul:fungsi)")
+    p_diff.add_argument("--show", type=int, default=20, help="Jumlah perubahan yang dicetak")
+    p_diff.add_argument("--output-diff", help="CSV berisi semua mapping yang berubah")
+    p_diff.add_argument("--fail-on-diff", action="store_true", help="Exit 1 jika ada mapping yang berubah")
+    p_diff.set_defaults(func=cmd_diff)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Ukuran JSON dan waktu serialisasi/render figure peta negara tujuan (figure 6):
+label per-negara (satu Scattergeo per negara, cara lama) dibandingkan
+satu trace teks gabungan, untuk beberapa jumlah label.
+
+Jalankan dari root project:
+
+    python benchmarks/country_map_labels.py
+    python benchmarks/country_map_labels.py --render   # ikut ukur render Kaleido (butuh Chrome)
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import pycountry
+
+from charts import COUNTRY_COLOR_SCALE, build_country_map
+from render_cache import safe_write_image
+
+
+def sample_country_counts(seed=0):
+    """
+    Jumlah ekspor acak untuk semua negara yang dikenal pycountry
+    """
+    rng = random.Random(seed)
+    rows = [
+        {"ISO3": c.alpha_3, "Negara": c.name, "Jumlah": rng.randint(1, 5000)}
+        for c in pycountry.countries
+    ]
+    return pd.DataFrame(rows).sort_values("Jumlah", ascending=False, ignore_index=True)
+
+
+def build_country_map_per_trace(country_counts, n_labels):
+    """
+    Implementasi lama: satu trace Scattergeo untuk setiap label negara
+    """
+    fig6 = px.choropleth(
+        country_counts,
+        locations="ISO3",
+        locationmode="ISO-3",
+        color="Jumlah",
+        hover_name="Negara",
+        color_continuous_scale=COUNTRY_COLOR_SCALE,
+        title="Sebaran Negara Tujuan"
+    )
+    for _, row in country_counts.head(n_labels).iterrows():
+        fig6.add_trace(go.Scattergeo(
+            locationmode="ISO-3",
+            locations=[row["ISO3"]],
+            text=row["ISO3"],
+            mode="text",
+            showlegend=False,
+            textfont=dict(size=9, color="black"),
+            hoverinfo="skip"
+        ))
+    fig6.update_layout(geo=dict(showframe=False, showcoastlines=True, projection_type='natural earth'))
+    return fig6
+
+
+def measure(builder, country_counts, n_labels, render):
+    t0 = time.perf_counter()
+    fig = builder(country_counts, n_labels)
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    fig_json = fig.to_json()
+    json_s = time.perf_counter() - t0
+
+    render_s = None
+    if render:
+        t0 = time.perf_counter()
+        safe_write_image(fig, format="png", width=800, height=600, scale=2, use_cache=False)
+        render_s = time.perf_counter() - t0
+
+    return len(fig.data), len(fig_json), build_s, json_s, render_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--render", action="store_true", help="Ukur juga waktu render PNG via Kaleido")
+    args = parser.parse_args()
+
+    country_counts = sample_country_counts()
+    label_counts = [10, 50, len(country_counts)]
+    builders = [
+        ("per-trace", build_country_map_per_trace),
+        ("batched", lambda counts, n: build_country_map(counts, n_labels=n)),
+    ]
+
+    print(f"{'mode':<10} {'label':>6} {'traces':>7} {'json (KB)':>10} {'build (ms)':>11} {'json (ms)':>10} {'render (s)':>11}")
+    for n_labels in label_counts:
+        for name, builder in builders:
+            n_traces, json_len, build_s, json_s, render_s = measure(builder, country_counts, n_labels, args.render)
+            render_text = f"{render_s:>11.2f}" if render_s is not None else f"{'-':>11}"
+            print(f"{name:<10} {n_labels:>6} {n_traces:>7} {json_len / 1024:>10.1f} "
+                  f"{build_s * 1000:>11.1f} {json_s * 1000:>10.1f} {render_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Perbandingan ukuran file dan waktu build PDF antara mode chart "raster" dan "vector"
+pada laporan standar enam chart.
+
+Figure dibuat oleh builder laporan yang sama dengan dashboard/CLI
+(engine.build_pdf_figures) dari data sintetis (synthetic_data.py), lalu:
+- setiap chart dirender sendiri: waktu, ukuran PDF satu halaman, dan mode
+  yang benar-benar dipakai (vector bisa fallback ke raster, geo bisa gagal);
+- laporan lengkap dibuat lewat reports.create_pdf_report.
+
+Jalankan dari root project:
+
+    python benchmarks/pdf_chart_modes.py --rows 5000
+
+Cache gambar dikosongkan sebelum setiap render agar Kaleido benar-benar merender ulang.
+
+Kaleido 1.x (versi di requirements) membutuhkan Chrome/Chromium terpasang. Tanpa
+Chrome, benchmark bisa dijalankan dengan Kaleido 0.2.1 yang membawa Chromium sendiri,
+dipasang terpisah lalu dipakai lewat PYTHONPATH:
+
+    pip install --target /tmp/kaleido021 kaleido==0.2.1
+    PYTHONPATH=/tmp/kaleido021 python benchmarks/pdf_chart_modes.py --rows 5000
+
+Hasil terakhir dengan perintah di atas: Kaleido 0.2.1, plotly 6.9.0, reportlab 5.0.1,
+svglib 2.3.0, Python 3.11.7, Linux x86_64. Lingkungan benchmark tidak punya akses ke
+CDN topojson plotly, sehingga chart peta gagal di kedua mode dan laporan lengkap
+berisi pesan error untuk chart 6. Angka ini belum diukur dengan Kaleido 1.x.
+
+    chart                                  raster            vector
+    1. Distribusi Komoditas                 109.5 KB 0.18 s     3.7 KB 0.13 s
+    2. Top 10 Negara Tujuan                 102.4 KB 0.15 s     3.7 KB 0.16 s
+    3. Top 10 Kota Perusahaan Eksportir      77.0 KB 0.17 s     2.8 KB 0.16 s
+    4. Top 10 Perusahaan Ekspor             127.5 KB 0.13 s     4.9 KB 0.20 s
+    5. Tren Jumlah Ekspor                   159.7 KB 0.10 s     4.0 KB 0.10 s
+    6. Peta Sebaran Negara Tujuan          gagal             gagal
+    laporan lengkap                         633.3 KB 1.23 s    78.8 KB 0.76 s
+
+Untuk chart 1-5 hasil vector sudah dicek secara visual terhadap raster.
+Vector belum diverifikasi untuk chart peta (choropleth/geo), jadi default
+OMKABA_PDF_CHART_MODE tetap "raster".
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate
+
+from assets import LOGO_PATH
+from charts import build_country_counts
+from engine import load_dataset, select_period, format_date_range, build_pdf_figures
+from pdf_charts import chart_flowable, CHART_MODE_RASTER, CHART_MODE_VECTOR, vector_supported
+from render_cache import IMAGE_CACHE
+from reports import create_pdf_report
+from timeseries import trend_series
+from synthetic_data import generate_permits, write_upload
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+CHART_WIDTH = 6.5 * inch
+CHART_HEIGHT = 4.875 * inch
+
+
+def build_report_inputs(n_rows, seed=0):
+    """
+    Figure laporan PDF + argumen create_pdf_report untuk seluruh periode data sintetis
+    """
+    with tempfile.TemporaryDirectory(prefix="omkaba-bench-") as tmp_dir:
+        path = write_upload(generate_permits(n_rows, seed=seed), os.path.join(tmp_dir, "izin.csv"))
+        dataset = load_dataset([path])
+
+    start, end = dataset["min_date"], dataset["max_date"]
+    _, filtered_records, summaries = select_period(dataset, start, end)
+    trend, trend_bucket = trend_series(dataset["daily"], start, end)
+    country_counts = build_country_counts(summaries["Negara Tujuan"], dataset["country_iso3"])
+    figures = build_pdf_figures(summaries, trend, trend_bucket, country_counts)
+    report_args = (format_date_range(start, end, start, end), dataset["total_records"], filtered_records)
+    return figures, report_args
+
+
+def measure_chart(fig, mode):
+    """
+    Render satu chart: {"mode" yang dipakai, "seconds", "bytes" PDF satu halaman} atau {"error"}
+    """
+    IMAGE_CACHE.clear()
+    started = time.perf_counter()
+    try:
+        flowable = chart_flowable(fig, width=CHART_WIDTH, height=CHART_HEIGHT, mode=mode)
+    except Exception as e:
+        return {"error": str(e).splitlines()[0]}
+    seconds = time.perf_counter() - started
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4).build([flowable])
+    return {
+        "mode": CHART_MODE_VECTOR if isinstance(flowable, Drawing) else CHART_MODE_RASTER,
+        "seconds": round(seconds, 3),
+        "bytes": buffer.getbuffer().nbytes,
+    }
+
+
+def measure_report(figures, report_args, mode, repeat):
+    timings = []
+    for _ in range(repeat):
+        IMAGE_CACHE.clear()
+        started = time.perf_counter()
+        pdf = create_pdf_report(figures, *report_args, logo_path=LOGO_PATH, chart_mode=mode)
+        timings.append(time.perf_counter() - started)
+    return {"seconds": round(min(timings), 3), "bytes": pdf.getbuffer().nbytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="Jumlah baris data sintetis")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Jumlah pengulangan laporan lengkap per mode")
+    parser.add_argument("--output", help="File hasil JSON (default: benchmarks/results/pdf_chart_modes_<waktu>.json)")
+    args = parser.parse_args()
+
+    figures, report_args = build_report_inputs(args.rows, args.seed)
+    modes = [CHART_MODE_RASTER]
+    if vector_supported():
+        modes.append(CHART_MODE_VECTOR)
+    else:
+        print("⚠️ svglib tidak terpasang, hanya mode raster yang diukur")
+
+    # Render pertama menanggung start-up Kaleido/Chromium; tidak ikut diukur
+    measure_chart(next(iter(figures.values())), CHART_MODE_RASTER)
+
+    charts = {title: {mode: measure_chart(fig, mode) for mode in modes} for title, fig in figures.items()}
+    reports = {mode: measure_report(figures, report_args, mode, args.repeat) for mode in modes}
+
+    print(f"{'chart':<38} " + " ".join(f"{mode:<17}" for mode in modes))
+    for title, results in charts.items():
+        cells = []
+        for mode in modes:
+            result = results[mode]
+            # Tanda * = mode vector diminta tetapi chart jatuh ke raster
+            fell_back = mode == CHART_MODE_VECTOR and result.get("mode") == CHART_MODE_RASTER
+            cell = "gagal" if "error" in result else f"{result['bytes'] / 1024:>6.1f} KB {result['seconds']:.2f} s"
+            cells.append(f"{cell + ('*' if fell_back else ''):<17}")
+        print(f"{title:<38} " + " ".join(cells))
+    print(f"{'laporan lengkap':<38} " + " ".join(
+        f"{reports[mode]['bytes'] / 1024:>6.1f} KB {reports[mode]['seconds']:.2f} s " for mode in modes
+    ))
+    for title, results in charts.items():
+        for mode, result in results.items():
+            if "error" in result:
+                print(f"  ⚠️ {title} ({mode}): {result['error']}")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"pdf_chart_modes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": args.rows,
+            "seed": args.seed,
+            "charts": charts,
+            "reports": reports,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\nHasil: {output}")
+
+
+if __name__ == "__main__":
+    main()
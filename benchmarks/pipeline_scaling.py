@@ -0,0 +1,183 @@
+"""
+Benchmark end-to-end pipeline dashboard pada beberapa ukuran data sintetis
+(lihat synthetic_data.py), tanpa Streamlit.
+
+Waktu per fase diambil dari instrumentasi telemetry yang sama dengan dashboard:
+parse, name_cleaning, city_extraction, date_parsing, filtering, aggregation,
+figures, kaleido_render, pdf_build dan excel_write. Hasil ditulis sebagai JSON
+supaya run sebelum/sesudah perubahan bisa dibandingkan.
+
+Jalankan dari root project:
+
+    python benchmarks/pipeline_scaling.py --sizes 10000 100000
+    python benchmarks/pipeline_scaling.py --sizes 1000000 --skip-pdf --skip-excel
+    python benchmarks/pipeline_scaling.py --sizes 10000 --baseline benchmarks/results/sebelum.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import telemetry
+from charts import build_country_counts
+from engine import (
+    load_dataset, select_period, city_map_data, format_date_range, build_display_figures, build_pdf_figures,
+    create_period_excel
+)
+from ingest import frame_nbytes
+from render_cache import IMAGE_CACHE
+from reports import create_pdf_report
+from timeseries import trend_series
+from synthetic_data import generate_permits, write_upload
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def run_pipeline(path, skip_pdf=False, skip_excel=False):
+    """
+    Jalankan pipeline satu file seperti satu sesi dashboard + export.
+    Mengembalikan (run telemetry, info tambahan).
+    """
+    info = {}
+    with telemetry.run("benchmark") as run:
+        dataset = load_dataset([path])
+        info["valid_rows"] = dataset["total_records"]
+        info["session_bytes"] = dataset["memory"]["after"]
+        start, end = dataset["min_date"], dataset["max_date"]
+
+        # Seluruh rentang (default dashboard) lalu satu bulan terakhir
+        _, filtered_records, summaries = select_period(dataset, start, end)
+        select_period(dataset, max(start, end - pd.Timedelta(days=30)), end)
+
+        trend, trend_bucket = trend_series(dataset["daily"], start, end)
+        country_counts = build_country_counts(summaries["Negara Tujuan"], dataset["country_iso3"])
+        df_map, _ = city_map_data(summaries)
+        build_display_figures(summaries, trend, trend_bucket, country_counts, df_map)
+        date_range = format_date_range(start, end, start, end)
+
+        if not skip_pdf:
+            IMAGE_CACHE.clear()
+            figures_dict = build_pdf_figures(summaries, trend, trend_bucket, country_counts)
+            try:
+                pdf = create_pdf_report(figures_dict, date_range, dataset["total_records"], filtered_records)
+                info["pdf_bytes"] = pdf.getbuffer().nbytes
+            except Exception as e:
+                info["pdf_error"] = str(e)
+
+        if not skip_excel:
+            excel = create_period_excel(dataset, start, end, date_range, summaries=summaries)
+            info["excel_bytes"] = excel.getbuffer().nbytes
+    return run, info
+
+
+def raw_read_bytes(path):
+    """
+    Memori DataFrame jika file dibaca utuh tanpa skema ingest (semua kolom, teks mentah)
+    """
+    df = pd.read_csv(path) if path.endswith(".csv") else pd.read_excel(path)
+    return frame_nbytes(df)
+
+
+def phase_table(run):
+    return {
+        entry["phase"]: {
+            "seconds": round(entry["ms"] / 1000, 4),
+            "calls": entry["calls"],
+            "peak_mb": None if entry["peak_kb"] is None else round(entry["peak_kb"] / 1024, 2),
+        }
+        for entry in run.summary()
+    }
+
+
+def compare(results, baseline_path):
+    """
+    Cetak rasio waktu per fase terhadap hasil benchmark sebelumnya (ukuran yang sama)
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["rows"]: r for r in json.load(f)["results"]}
+    for result in results:
+        before = baseline.get(result["rows"])
+        if before is None:
+            continue
+        print(f"\nPerbandingan {result['rows']:,} baris (sekarang / baseline):")
+        for name, now in result["phases"].items():
+            old = before["phases"].get(name)
+            if old and old["seconds"]:
+                print(f"  {name:<16} {now['seconds']:>9.3f} s / {old['seconds']:>9.3f} s "
+                      f"= {now['seconds'] / old['seconds']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Jumlah baris per run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=("csv", "xlsx"), default="csv", help="Format file upload sintetis")
+    parser.add_argument("--skip-pdf", action="store_true", help="Lewati export PDF (butuh Kaleido/Chrome)")
+    parser.add_argument("--skip-excel", action="store_true", help="Lewati export Excel")
+    parser.add_argument("--tracemalloc", action="store_true", help="Ukur puncak memori per fase (lebih lambat)")
+    parser.add_argument("--output", help="File hasil JSON (default: benchmarks/results/pipeline_scaling_<waktu>.json)")
+    parser.add_argument("--baseline", help="Hasil JSON sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    # Run benchmark tidak ikut ditulis ke log telemetri produksi
+    telemetry.TELEMETRY_LOG = "off"
+    telemetry.TRACEMALLOC = args.tracemalloc
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="omkaba-bench-") as tmp_dir:
+        for n_rows in args.sizes:
+            path = write_upload(
+                generate_permits(n_rows, seed=args.seed), os.path.join(tmp_dir, f"izin_{n_rows}.{args.format}")
+            )
+            t0 = time.perf_counter()
+            run, info = run_pipeline(path, skip_pdf=args.skip_pdf, skip_excel=args.skip_excel)
+            result = {
+                "rows": n_rows,
+                "file_bytes": os.path.getsize(path),
+                "total_seconds": round(time.perf_counter() - t0, 3),
+                "phases": phase_table(run),
+                "raw_read_bytes": raw_read_bytes(path),
+                **info,
+            }
+            results.append(result)
+
+            print(f"\n{n_rows:,} baris ({result['valid_rows']:,} valid): {result['total_seconds']:.2f} s, "
+                  f"memori {result['raw_read_bytes'] / 2**20:.1f} MB dibaca utuh -> "
+                  f"{result['session_bytes'] / 2**20:.1f} MB data sesi")
+            for name, phase in result["phases"].items():
+                peak = f"  puncak {phase['peak_mb']:.1f} MB" if phase["peak_mb"] is not None else ""
+                print(f"  {name:<16} {phase['seconds']:>9.3f} s  x{phase['calls']}{peak}")
+            if "pdf_error" in info:
+                print(f"  ⚠️ PDF gagal: {info['pdf_error']}")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"pipeline_scaling_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "format": args.format,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nHasil: {output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Generator data izin ekspor sintetis dengan bentuk yang sama dengan file export
+aplikasi perizinan: alamat Indonesia dari CITIES_INDONESIA dan AREA_TO_CITY_MAPPING
+(dengan variasi penulisan), nama perusahaan berulang dengan ejaan berbeda,
+format tanggal campuran serta distribusi negara tujuan dan komoditas yang timpang.
+
+Dipakai oleh benchmark lain, atau jalankan langsung untuk menulis file upload:
+
+    python benchmarks/synthetic_data.py --rows 100000 --output /tmp/izin_100k.csv
+    python benchmarks/synthetic_data.py --rows 20000 --output /tmp/izin_20k.xlsx
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import CITIES_INDONESIA, AREA_TO_CITY_MAPPING
+
+
+COMMODITIES = {
+    "Sarang Burung Walet": 30, "Udang Beku": 18, "Ikan Hias": 14, "Kepiting Bakau": 9,
+    "Rumput Laut Kering": 8, "Daging Rajungan": 7, "Ikan Tuna Beku": 5, "Cumi-cumi Beku": 4,
+    "Mutiara": 2, "Teripang Kering": 2, "Kerang Hijau": 1,
+}
+
+# Termasuk ejaan yang sering muncul di data (alias, huruf kecil, spasi berlebih)
+COUNTRIES = {
+    "China": 28, "Hong Kong": 12, "Japan": 10, "United States": 9, "Singapore": 7,
+    "Malaysia": 6, "Viet Nam": 5, "Korea, Republic of": 4, "Taiwan": 4, "Thailand": 3,
+    "Australia": 3, "Netherlands": 2, "USA": 2, "south korea": 1, " Vietnam ": 1,
+    "Saudi Arabia": 1, "United Arab Emirates": 1, "Canada": 1,
+}
+
+COMPANY_PREFIXES = ["PT", "PT.", "CV", "CV.", "UD", "PT"]
+COMPANY_WORDS = [
+    "Mina", "Bahari", "Samudra", "Jaya", "Makmur", "Sejahtera", "Abadi", "Sentosa", "Walet",
+    "Nusantara", "Indo", "Marine", "Sumber", "Rejeki", "Mutiara", "Laut", "Timur", "Perkasa",
+    "Global", "Lestari", "Karya", "Utama", "Mandiri", "Surya",
+]
+STREETS = [
+    "Raya", "Ahmad Yani", "Diponegoro", "Sudirman", "Gatot Subroto", "Pahlawan", "Industri",
+    "Pelabuhan", "Kenjeran", "Rungkut Industri", "Veteran", "Merdeka", "Kartini",
+]
+PROVINCES = ["Jawa Timur", "JAWA TIMUR", "Jatim", "Jawa Tengah", "Jawa Barat", "Bali", "DKI Jakarta"]
+
+# Format tanggal: mayoritas seperti export asli, sebagian kecil dengan format lain
+DATE_FORMATS = {"%d/%m/%Y": 0.9, "%d/%m/%Y %H:%M": 0.05, "%Y-%m-%d": 0.05}
+
+
+def _weighted_choice(rng, weights, size):
+    items = list(weights)
+    p = np.array(list(weights.values()), dtype=float)
+    return rng.choice(np.array(items, dtype=object), size=size, p=p / p.sum())
+
+
+def _noisy_case(rng, values):
+    """
+    Variasi huruf besar/kecil dan spasi seperti hasil input manual
+    """
+    mode = rng.integers(0, 10, size=len(values))
+    out = []
+    for value, m in zip(values, mode):
+        if m == 0:
+            value = value.upper()
+        elif m == 1:
+            value = value.lower()
+        elif m == 2:
+            value = f" {value}  "
+        out.append(value)
+    return out
+
+
+def company_pool(rng, n_companies):
+    """
+    Nama perusahaan unik beserta 1-3 variasi ejaannya
+    """
+    pool = []
+    for i in range(n_companies):
+        words = rng.choice(COMPANY_WORDS, size=rng.integers(1, 4), replace=False)
+        base = " ".join(words)
+        prefix = COMPANY_PREFIXES[i % len(COMPANY_PREFIXES)]
+        variants = [f"{prefix} {base}", f"{prefix.rstrip('.')}. {base.upper()}", f"{base}, {prefix.rstrip('.')}"]
+        pool.append(variants[:rng.integers(1, 4)])
+    return pool
+
+
+def build_address(rng, city_choices, area_choices):
+    street = STREETS[rng.integers(len(STREETS))]
+    number = rng.integers(1, 300)
+    kind = rng.integers(0, 6)
+    if kind == 0 and area_choices:
+        # Kecamatan/area saja, kota harus ditebak lewat AREA_TO_CITY_MAPPING
+        area = area_choices[rng.integers(len(area_choices))].title()
+        return f"Jl. {street} No. {number}, Kec. {area}, {PROVINCES[rng.integers(len(PROVINCES))]}"
+    city = city_choices[rng.integers(len(city_choices))]
+    if kind == 1:
+        return f"JL {street.upper()} NO {number} KAB. {city.upper()}"
+    if kind == 2:
+        return f"Desa Sukorejo RT 0{rng.integers(1, 9)}/RW 0{rng.integers(1, 9)} Kab. {city}"
+    if kind == 3:
+        return f"Jl. {street} {number} Kota {city} {rng.integers(60000, 69999)}"
+    return f"Jl. {street} No {number}, {city}, {PROVINCES[rng.integers(len(PROVINCES))]}"
+
+
+def generate_permits(n_rows, seed=0, start="2023-01-01", days=730, n_companies=None):
+    """
+    DataFrame izin mentah (kolom seperti file export) sebanyak n_rows baris
+    """
+    rng = np.random.default_rng(seed)
+    n_companies = n_companies or max(20, n_rows // 25)
+
+    # Kota dengan bobot timpang: sebagian besar perusahaan di sekitar Surabaya
+    cities = sorted(set(CITIES_INDONESIA))
+    city_weights = {city: 1.0 for city in cities}
+    for city, weight in (("Surabaya", 60), ("Sidoarjo", 40), ("Gresik", 20), ("Pasuruan", 10), ("Jakarta", 10)):
+        city_weights[city] = weight
+    areas = list(AREA_TO_CITY_MAPPING)
+
+    # Setiap perusahaan punya satu alamat; frekuensi perusahaan mengikuti Zipf
+    companies = company_pool(rng, n_companies)
+    company_cities = _weighted_choice(rng, city_weights, n_companies)
+    company_addresses = [build_address(rng, [city], areas) for city in company_cities]
+    company_rank = np.minimum(rng.zipf(1.3, size=n_rows), n_companies) - 1
+    company_idx = rng.permutation(n_companies)[company_rank]
+
+    names = [
+        companies[i][rng.integers(len(companies[i]))] for i in company_idx
+    ]
+
+    dates = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, size=n_rows), unit="D")
+    dates = dates + pd.to_timedelta(rng.integers(7 * 60, 17 * 60, size=n_rows), unit="min")
+    formats = _weighted_choice(rng, DATE_FORMATS, n_rows)
+    date_text = [d.strftime(fmt) for d, fmt in zip(dates, formats)]
+
+    return pd.DataFrame({
+        "No": np.arange(1, n_rows + 1),
+        "Diterbitkan Tanggal": date_text,
+        "Nama Exportir/Importir": _noisy_case(rng, names),
+        "Alamat Perusahaan": [company_addresses[i] for i in company_idx],
+        "Jenis Komoditi": _weighted_choice(rng, COMMODITIES, n_rows),
+        "Negara Tujuan": _weighted_choice(rng, COUNTRIES, n_rows),
+    })
+
+
+def write_upload(df, path):
+    """
+    Tulis data sebagai file upload (CSV atau XLSX sesuai ekstensi)
+    """
+    if path.lower().endswith(".xlsx"):
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Jumlah baris")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="Path file .csv atau .xlsx")
+    args = parser.parse_args()
+
+    write_upload(generate_permits(args.rows, seed=args.seed), args.output)
+    print(f"{args.rows:,} baris ditulis ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
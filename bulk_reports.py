@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from engine import REPORT_FORMATS, filter_by_date, generate_reports, month_periods
+
+
+# Dimensi segmen: nama di CLI -> kolom dataset (None = per bulan kalender)
+SEGMENT_MONTH = "bulan"
+SEGMENT_DIMENSIONS = {
+    "komoditi": "Jenis Komoditi",
+    "negara": "Negara Tujuan",
+    "kota": "Kota",
+    "perusahaan": "Nama Exportir/Importir",
+    SEGMENT_MONTH: None,
+}
+
+# Dataset hasil preprocessing yang dipakai bersama oleh worker.
+# Dengan start method "fork" worker mewarisi objek ini lewat copy-on-write,
+# jadi DataFrame tidak pernah di-pickle per segmen.
+_SHARED = {}
+
+
+def segment_slug(value, max_length=60):
+    """
+    Nilai segmen yang aman dipakai sebagai bagian nama file
+    """
+    slug = re.sub(r"[^\w-]+", "_", str(value)).strip("_")
+    return slug[:max_length] or "segmen"
+
+
+def list_segments(dataset, dimension, start_date, end_date, top=None):
+    """
+    Daftar segmen untuk rentang tanggal: (label file, segment, start, end).
+    Segmen kolom diurutkan dari yang datanya terbanyak; top membatasi jumlahnya.
+    """
+    column = SEGMENT_DIMENSIONS[dimension]
+    if column is None:
+        periods = month_periods(start_date, end_date)
+        periods = periods[:top] if top else periods
+        return [(f"{s:%Y-%m}", None, s, e) for s, e in periods]
+
+    counts = filter_by_date(dataset["df"], start_date, end_date)[column].value_counts()
+    # Kolom categorical tetap menghitung kategori tanpa baris di rentang ini
+    counts = counts[counts > 0]
+    values = counts.index[:top] if top else counts.index
+    return [
+        (f"{i:03d}_{segment_slug(value)}", (column, value), start_date, end_date)
+        for i, value in enumerate(values, start=1)
+    ]
+
+
+def _init_worker(dataset):
+    """
+    Initializer untuk start method selain fork: dataset dikirim sekali per worker
+    """
+    _SHARED["dataset"] = dataset
+
+
+def _render_segment(label, segment, start_date, end_date, output_dir, formats, options):
+    return generate_reports(
+        _SHARED["dataset"], start_date, end_date, output_dir,
+        formats=formats, segment=segment, label=label, **options
+    )
+
+
+def generate_bulk_reports(dataset, dimension, zip_path, start_date=None, end_date=None, formats=REPORT_FORMATS,
+                          max_workers=None, top=None, progress=None, **options):
+    """
+    Generate pasangan laporan PDF/Excel untuk setiap segmen di process pool
+    dan kumpulkan semuanya dalam satu file zip.
+
+    options diteruskan ke generate_reports (n_country_labels, chart_mode, logo_path).
+    progress: callback opsional progress(fraction, message).
+    Mengembalikan daftar nama file di dalam zip.
+    """
+    start_date = start_date or dataset["min_date"]
+    end_date = end_date or dataset["max_date"]
+    segments = list_segments(dataset, dimension, start_date, end_date, top=top)
+    if not segments:
+        return []
+
+    # fork berbagi dataset tanpa pickle; platform tanpa fork mengirim dataset sekali per worker
+    if "fork" in multiprocessing.get_all_start_methods():
+        _SHARED["dataset"] = dataset
+        pool_kwargs = {"mp_context": multiprocessing.get_context("fork")}
+    else:
+        pool_kwargs = {"initializer": _init_worker, "initargs": (dataset,)}
+
+    max_workers = max_workers or min(len(segments), os.cpu_count() or 1)
+    names = []
+    with tempfile.TemporaryDirectory(prefix="omkaba-bulk-") as tmp_dir, \
+            ProcessPoolExecutor(max_workers=max_workers, **pool_kwargs) as pool:
+        futures = {
+            pool.submit(_render_segment, label, segment, start, end, tmp_dir, tuple(formats), options): label
+            for label, segment, start, end in segments
+        }
+
+        # PDF dan xlsx sudah terkompresi, zip cukup menyimpan apa adanya
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+            for done, future in enumerate(as_completed(futures), start=1):
+                for path in future.result():
+                    name = os.path.basename(path)
+                    zf.write(path, arcname=name)
+                    os.remove(path)
+                    names.append(name)
+                if progress:
+                    progress(done / len(futures), f"Segmen {done}/{len(futures)}: {futures[future]}")
+
+    _SHARED.pop("dataset", None)
+    return sorted(names)
@@ -0,0 +1,332 @@
+import plotly.express as px
+import plotly.graph_objects as go
+
+from timeseries import BUCKET_DAY, BUCKET_WEEK, BUCKET_MONTH, BUCKET_LABELS
+
+
+# Jumlah negara teratas yang diberi label ISO3 di peta (default)
+DEFAULT_COUNTRY_LABELS = 10
+
+COUNTRY_COLOR_SCALE = ["#e69795", "#bc656d", "#b03031"]
+
+
+def build_country_counts(country_summary, country_iso3):
+    """
+    Jumlah ekspor per negara dengan kode ISO3 untuk choropleth.
+    Ejaan berbeda untuk negara yang sama digabung, negara yang tidak dikenali dilewati.
+    """
+    country_counts = country_summary.rename_axis("Negara").reset_index(name="Jumlah")
+    country_counts["ISO3"] = country_counts["Negara"].map(country_iso3)
+    country_counts = (
+        country_counts.dropna(subset=["ISO3"])
+        .groupby("ISO3", as_index=False, sort=False)
+        .agg(Negara=("Negara", "first"), Jumlah=("Jumlah", "sum"))
+        .sort_values("Jumlah", ascending=False, ignore_index=True)
+    )
+    return country_counts
+
+
+def add_country_labels(fig, country_counts, n_labels=DEFAULT_COUNTRY_LABELS):
+    """
+    Label ISO3 untuk n negara teratas sebagai SATU trace teks
+    (bukan satu Scattergeo per negara)
+    """
+    top_labels = country_counts.head(n_labels)
+    if top_labels.empty:
+        return fig
+
+    fig.add_trace(go.Scattergeo(
+        locationmode="ISO-3",
+        locations=top_labels["ISO3"].tolist(),
+        text=top_labels["ISO3"].tolist(),
+        mode="text",
+        showlegend=False,
+        textfont=dict(size=9, color="black"),
+        hoverinfo="skip"
+    ))
+    return fig
+
+
+def build_country_map(country_counts, n_labels=DEFAULT_COUNTRY_LABELS, width=None, height=None):
+    """
+    Choropleth sebaran negara tujuan (figure 6) beserta label negara teratas
+    """
+    fig6 = px.choropleth(
+        country_counts,
+        locations="ISO3",
+        locationmode="ISO-3",
+        color="Jumlah",
+        hover_name="Negara",
+        color_continuous_scale=COUNTRY_COLOR_SCALE,
+        title="Sebaran Negara Tujuan"
+    )
+
+    add_country_labels(fig6, country_counts, n_labels)
+
+    fig6.update_layout(geo=dict(showframe=False, showcoastlines=True, projection_type='natural earth'))
+    if width and height:
+        fig6.update_layout(width=width, height=height)
+    return fig6
+
+
+# Format hover tanggal untuk setiap granularitas tren
+TREND_HOVER_FORMATS = {
+    BUCKET_DAY: "%{x|%d %B %Y}",
+    BUCKET_WEEK: "minggu %{x|%d %B %Y}",
+    BUCKET_MONTH: "%{x|%B %Y}",
+}
+
+# Di atas jumlah titik ini marker tidak digambar (hanya garis)
+MAX_MARKER_POINTS = 120
+
+
+def trend_month_dtick(trend):
+    """
+    Jarak tick sumbu-x (bulan) supaya label tidak terlalu rapat
+    """
+    if trend.empty:
+        return "M1"
+    span_days = (trend.index.max() - trend.index.min()).days
+    if span_days <= 731:
+        return "M1"
+    if span_days <= 2192:
+        return "M3"
+    return "M12"
+
+
+def build_trend_chart(trend, bucket, width=None, height=None, rangeslider=False):
+    """
+    Line chart tren jumlah ekspor (figure 5) dari seri yang sudah di-bucket.
+    width/height diisi untuk versi PDF (ukuran tetap, label tick diputar).
+    """
+    mode = "lines+markers" if len(trend) <= MAX_MARKER_POINTS else "lines"
+
+    fig5 = go.Figure(go.Scatter(
+        x=trend.index,
+        y=trend.to_numpy(),
+        mode=mode,
+        line=dict(color="royalblue", width=2),
+        marker=dict(size=8, color="orange"),
+        hovertemplate=f"<b>Tanggal:</b> {TREND_HOVER_FORMATS[bucket]}<br><b>Jumlah:</b> %{{y}}<extra></extra>"
+    ))
+
+    fig5.update_layout(
+        title=f"Tren Jumlah Ekspor ({BUCKET_LABELS[bucket]})",
+        xaxis=dict(title="Tanggal", showgrid=True, gridcolor="lightgrey", tickformat="%b %Y"),
+        yaxis=dict(title="Jumlah", showgrid=True, gridcolor="lightgrey"),
+        plot_bgcolor="white",
+        hovermode="x unified"
+    )
+
+    if width and height:
+        fig5.update_layout(
+            width=width,
+            height=height,
+            margin=dict(b=100)  # Tambah margin bawah untuk rotated labels
+        )
+        fig5.update_xaxes(dtick=trend_month_dtick(trend), tickangle=45)
+
+    if rangeslider:
+        fig5.update_xaxes(rangeslider_visible=True)
+
+    return fig5
+
+
+def build_commodity_pie(commodity_summary, show_title=False):
+    """
+    Donut chart distribusi jenis komoditi (figure 1).
+    Ukuran bertambah sesuai jumlah kategori supaya label luar tidak bertumpuk.
+    """
+    comodity = commodity_summary.reset_index()
+    comodity.columns = ["Jenis Komoditi", "Jumlah"]
+
+    n_categories = len(comodity)
+    base_size = 390
+    additional_size = n_categories * 15  # Tambahan size berdasarkan jumlah kategori
+
+    fig1 = go.Figure(
+        data=[
+            go.Pie(
+                labels=comodity["Jenis Komoditi"],
+                values=comodity["Jumlah"],
+                hole=0.35,
+                textinfo="label+percent+value",
+                texttemplate="<b>%{label}</b><br>%{value} unit<br>(%{percent})",
+                hovertemplate="<b>%{label}</b><br>Jumlah: %{value}<br>Persen: %{percent}<extra></extra>",
+                marker=dict(
+                    colors=px.colors.qualitative.Plotly,
+                    line=dict(color="white", width=2)
+                ),
+                textposition="outside",
+                textfont=dict(size=12, family="Arial", color="black"),
+                insidetextorientation='radial',
+                outsidetextfont=dict(size=11),
+                pull=0.03,
+            )
+        ]
+    )
+
+    fig1.update_layout(
+        showlegend=False,
+        annotations=[],
+        uniformtext_minsize=10,
+        uniformtext_mode='hide',
+
+        margin=dict(l=5, r=5, t=90, b=35),  # Margin sangat ketat
+        width=base_size + additional_size,  # Ukuran dinamis
+        height=base_size + additional_size,
+        autosize=False,
+
+        # Hilangkan padding dan spacing yang tidak perlu
+        paper_bgcolor='white',
+        plot_bgcolor='white',
+
+        # Hilangkan axis dan grid yang tidak diperlukan
+        xaxis=dict(visible=False, showgrid=False, zeroline=False),
+        yaxis=dict(visible=False, showgrid=False, zeroline=False),
+    )
+
+    fig1.update_traces(
+        marker_line_color='white',
+        marker_line_width=2,
+        textfont_size=11,
+        textposition='outside',
+        textfont_color='black',
+        insidetextfont=dict(size=11, color='white', family='Arial'),
+        outsidetextfont=dict(size=10, family='Arial'),
+        pull=[0.15 if i == 0 else 0.05 for i in range(n_categories)],
+        rotation=30,
+        hole=0.4
+    )
+
+    # Atur layout agar lebih compact
+    fig1.update_layout(autosize=True)
+
+    if show_title:
+        fig1.update_layout(
+            title={
+                'text': "Persentase Jenis Komoditi",
+                'y': 0.97,
+                'x': 0.0,
+                'xanchor': 'left',
+                'yanchor': 'top'
+            },
+            title_font=dict(size=20, color="black", family="Arial Black"),
+            title_font_color="black"
+        )
+
+    return fig1
+
+
+def _finish_top_bar(fig, top_10, x_title, width=None, height=None):
+    """
+    Layout bersama bar chart top 10: ukuran tetap untuk PDF,
+    ruang kosong di atas bar untuk label angka di dashboard
+    """
+    if width and height:
+        fig.update_layout(xaxis_title=x_title, yaxis_title="Jumlah", width=width, height=height)
+    else:
+        y_range_max = top_10["Jumlah"].max() * 1.2
+        fig.update_layout(xaxis_title=x_title, yaxis_title="Jumlah", yaxis=dict(range=[0, y_range_max]))
+    return fig
+
+
+def build_country_bar(country_summary, width=None, height=None):
+    """
+    Bar chart 10 negara tujuan teratas (figure 2)
+    """
+    top_10_country = country_summary.head(10).reset_index()
+    top_10_country.columns = ["Negara", "Jumlah"]
+
+    fig2 = px.bar(
+        top_10_country,
+        x="Negara",
+        y="Jumlah",
+        text="Jumlah",
+        color="Jumlah",
+        color_continuous_scale=COUNTRY_COLOR_SCALE,
+        title="Top 10 Negara Tujuan"
+    )
+    fig2.update_traces(texttemplate='%{text}', textposition='outside')
+    return _finish_top_bar(fig2, top_10_country, "Negara", width, height)
+
+
+def build_city_bar(city_summary, width=None, height=None):
+    """
+    Bar chart 10 kota perusahaan eksportir teratas (versi PDF dari peta kota)
+    """
+    top_10_city = city_summary.head(10).reset_index()
+    top_10_city.columns = ["Kota", "Jumlah"]
+
+    fig = px.bar(
+        top_10_city,
+        x="Kota",
+        y="Jumlah",
+        text="Jumlah",
+        color="Kota",
+        color_discrete_sequence=px.colors.qualitative.Plotly,
+        title="Top 10 Kota Perusahaan Eksportir"
+    )
+    fig.update_traces(texttemplate='%{text}', textposition='outside', showlegend=False)
+    fig.update_layout(uniformtext_minsize=8, uniformtext_mode='hide', showlegend=False)
+    return _finish_top_bar(fig, top_10_city, "Kota", width, height)
+
+
+def build_company_bar(company_summary, width=None, height=None):
+    """
+    Bar chart 10 perusahaan eksportir teratas (figure 4)
+    """
+    top_10_company = company_summary.head(10).reset_index()
+    top_10_company.columns = ["Perusahaan", "Jumlah"]
+
+    fig4 = px.bar(
+        top_10_company,
+        x="Perusahaan",
+        y="Jumlah",
+        text="Jumlah",
+        color="Jumlah",
+        color_continuous_scale="plasma",
+        title="Top 10 Perusahaan Ekspor Paling Banyak"
+    )
+    fig4.update_traces(texttemplate='%{text}', textposition='outside')
+    return _finish_top_bar(fig4, top_10_company, "Perusahaan", width, height)
+
+
+def build_city_map(df_map):
+    """
+    Peta sebaran kota perusahaan eksportir (figure 3) dari hasil lookup koordinat
+    """
+    if df_map.empty:
+        # Jika tidak ada data kota yang cocok
+        fig3 = go.Figure()
+        fig3.add_annotation(text="Tidak ada data kota yang tersedia",
+                            xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
+        fig3.update_layout(title="Sebaran Kota Perusahaan Eksportir")
+        return fig3
+
+    df_map = df_map.assign(Kota_Label=df_map["Kota"] + " (" + df_map["Jumlah"].astype(str) + ")")
+
+    fig3 = px.scatter_mapbox(
+        df_map,
+        lat="lat",
+        lon="lon",
+        hover_name="Kota",
+        hover_data={"Jumlah": True, "lat": False, "lon": False},
+        color="Kota_Label",
+        zoom=4,
+        title="Sebaran Kota Perusahaan Eksportir"
+    )
+
+    fig3.update_traces(marker=dict(size=12, opacity=0.8))
+
+    fig3.update_layout(
+        mapbox_style="carto-positron",
+        legend_title="Kota (Jumlah)",
+        margin={"r": 0, "t": 50, "l": 0, "b": 0},
+        title=dict(
+            text="Sebaran Kota Perusahaan Eksportir",
+            x=0.0,  # pojok kiri
+            xanchor="left"
+        )
+    )
+    return fig3
@@ -0,0 +1,217 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import (
+    AREA_TO_CITY_MAPPING, CITIES_INDONESIA, clean_address_text, clean_extracted_city, prioritize_city,
+    extract_city_comprehensive, extract_city_keyword_based, extract_city_last_part, extract_city_fallback
+)
+
+
+# ========================
+# REGISTRY BACKEND
+# ========================
+# Setiap backend menerima Series alamat dan mengembalikan Series kota dengan indeks yang sama.
+# Backend dipilih lewat OMKABA_CITY_BACKEND; "reference" adalah kaskade asli di preprocessing.py.
+UNKNOWN_CITY = "Tidak Diketahui"
+REFERENCE_BACKEND = "reference"
+DEFAULT_CITY_BACKEND = "cached"
+
+CITY_BACKENDS = {}
+
+
+def register_backend(name):
+    def decorator(fn):
+        CITY_BACKENDS[name] = fn
+        return fn
+    return decorator
+
+
+def get_city_backend(name=None):
+    """
+    Fungsi batch backend ekstraksi kota (default: OMKABA_CITY_BACKEND atau "cached")
+    """
+    name = name or os.environ.get("OMKABA_CITY_BACKEND", DEFAULT_CITY_BACKEND)
+    try:
+        return CITY_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Backend ekstraksi kota tidak dikenal: {name!r} (pilihan: {', '.join(CITY_BACKENDS)})")
+
+
+def extract_cities(addresses, backend=None):
+    """
+    Kolom Kota untuk Series alamat memakai backend yang dipilih
+    """
+    return get_city_backend(backend)(addresses)
+
+
+def _map_unique(addresses, extract):
+    """
+    Jalankan extract(alamat) sekali per alamat unik lalu sebar ke semua baris
+    """
+    codes, uniques = pd.factorize(addresses, use_na_sentinel=True)
+    # Sentinel -1 (alamat kosong/NaN) diarahkan ke elemen terakhir
+    results = np.array([extract(address) for address in uniques] + [UNKNOWN_CITY], dtype=object)
+    return pd.Series(results[codes], index=addresses.index, dtype=object)
+
+
+# ========================
+# REFERENCE
+# ========================
+@register_backend(REFERENCE_BACKEND)
+def reference_backend(addresses):
+    """
+    Kaskade asli, satu pemanggilan per baris
+    """
+    return addresses.apply(lambda x: extract_city_comprehensive(x, CITIES_INDONESIA)).astype(object)
+
+
+# ========================
+# CACHED
+# ========================
+# Hasil reference per alamat, dipakai bersama antar upload/sesi dalam satu proses.
+# Alamat perusahaan berulang di setiap izin, jadi jumlah alamat unik jauh lebih kecil dari baris.
+CITY_CACHE_SIZE = int(os.environ.get("OMKABA_CITY_CACHE_SIZE", "100000"))
+
+_city_cache = OrderedDict()
+_city_cache_lock = threading.Lock()
+
+
+def _cached_extract(address):
+    with _city_cache_lock:
+        city = _city_cache.get(address)
+        if city is not None:
+            _city_cache.move_to_end(address)
+            return city
+
+    city = extract_city_comprehensive(address, CITIES_INDONESIA)
+    with _city_cache_lock:
+        _city_cache[address] = city
+        while len(_city_cache) > CITY_CACHE_SIZE:
+            _city_cache.popitem(last=False)
+    return city
+
+
+def clear_city_cache():
+    with _city_cache_lock:
+        _city_cache.clear()
+
+
+@register_backend("cached")
+def cached_backend(addresses):
+    """
+    Reference sekali per alamat unik + cache per proses; hasil identik dengan reference
+    """
+    return _map_unique(addresses, _cached_extract)
+
+
+# ========================
+# COMPILED REGEX
+# ========================
+# Kaskade yang sama dengan reference, tetapi pola area/kota dikompilasi sekali dan
+# alamat tanpa satu pun nama area/kota langsung dilewati lewat satu regex gabungan.
+def _word_pattern(name):
+    return re.compile(r'\b' + re.escape(name.lower()) + r'\b')
+
+
+def _any_pattern(names):
+    # Alternatif terpanjang dulu; cukup untuk menjawab "ada yang cocok atau tidak"
+    alternatives = sorted({re.escape(name.lower()) for name in names}, key=len, reverse=True)
+    return re.compile(r'\b(?:' + '|'.join(alternatives) + r')\b')
+
+
+_AREA_PATTERNS = [(_word_pattern(area), city) for area, city in AREA_TO_CITY_MAPPING.items()]
+_AREA_ANY = _any_pattern(AREA_TO_CITY_MAPPING)
+
+# Urutan sama dengan extract_city_regex_pattern (terpanjang dulu, stabil)
+_SORTED_CITIES = sorted(CITIES_INDONESIA, key=len, reverse=True)
+_CITY_PATTERNS = [(_word_pattern(city), city.title()) for city in _SORTED_CITIES]
+_CITY_ANY = _any_pattern(CITIES_INDONESIA)
+
+
+def _cascade_tail(address):
+    """
+    Metode 3-5 kaskade reference (keyword, bagian terakhir, fallback)
+    """
+    return (
+        extract_city_keyword_based(address)
+        or extract_city_last_part(address)
+        or extract_city_fallback(address, CITIES_INDONESIA)
+        or UNKNOWN_CITY
+    )
+
+
+def _compiled_extract(address):
+    if pd.isna(address) or not address:
+        return UNKNOWN_CITY
+    address_lower = clean_address_text(address).lower()
+
+    if _AREA_ANY.search(address_lower):
+        for pattern, city in _AREA_PATTERNS:
+            if pattern.search(address_lower):
+                return city
+
+    if _CITY_ANY.search(address_lower):
+        found = [city for pattern, city in _CITY_PATTERNS if pattern.search(address_lower)]
+        cleaned = clean_extracted_city(prioritize_city(found))
+        if cleaned and cleaned != UNKNOWN_CITY:
+            return cleaned
+
+    return _cascade_tail(address)
+
+
+@register_backend("compiled_regex")
+def compiled_regex_backend(addresses):
+    return addresses.apply(_compiled_extract).astype(object)
+
+
+# ========================
+# TOKEN INDEX
+# ========================
+# Nama area/kota dicari sebagai n-gram kata di alamat (lookup dict, tanpa regex per nama).
+# Berbeda dari reference hanya untuk nama yang di alamat dipisah tanda baca, mis.
+# "tambak-sawah" cocok dengan area "tambak sawah" di sini tetapi tidak di reference.
+_TOKEN_RE = re.compile(r'\w+')
+
+_AREA_INDEX = {}
+for _rank, (_area, _city) in enumerate(AREA_TO_CITY_MAPPING.items()):
+    _AREA_INDEX.setdefault(" ".join(_TOKEN_RE.findall(_area.lower())), (_rank, _city))
+
+_CITY_INDEX = {}
+for _rank, _city in enumerate(_SORTED_CITIES):
+    _CITY_INDEX.setdefault(" ".join(_TOKEN_RE.findall(_city.lower())), []).append((_rank, _city.title()))
+
+_MAX_NGRAM = max(len(key.split()) for key in list(_AREA_INDEX) + list(_CITY_INDEX))
+
+
+def _ngrams(tokens):
+    for n in range(1, _MAX_NGRAM + 1):
+        for i in range(len(tokens) - n + 1):
+            yield " ".join(tokens[i:i + n])
+
+
+def _token_extract(address):
+    if pd.isna(address) or not address:
+        return UNKNOWN_CITY
+    grams = set(_ngrams(_TOKEN_RE.findall(clean_address_text(address).lower())))
+
+    areas = [_AREA_INDEX[gram] for gram in grams if gram in _AREA_INDEX]
+    if areas:
+        return min(areas)[1]
+
+    cities = sorted(entry for gram in grams for entry in _CITY_INDEX.get(gram, ()))
+    if cities:
+        cleaned = clean_extracted_city(prioritize_city([city for _, city in cities]))
+        if cleaned and cleaned != UNKNOWN_CITY:
+            return cleaned
+
+    return _cascade_tail(address)
+
+
+@register_backend("token_index")
+def token_index_backend(addresses):
+    return addresses.apply(_token_extract).astype(object)
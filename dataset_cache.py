@@ -0,0 +1,122 @@
+import os
+import threading
+from collections import OrderedDict
+
+from metrics import register_cache
+
+
+def dataset_nbytes(dataset) -> int:
+    """
+    Perkiraan memori dataset (DataFrame + seri harian)
+    """
+    size = int(dataset["df"].memory_usage(index=True, deep=True).sum())
+    size += int(dataset["daily"].memory_usage(index=True, deep=True))
+    return size
+
+
+def _session_view(dataset):
+    """
+    Salinan dangkal untuk satu sesi: kolom tidak disalin (pandas copy-on-write),
+    tetapi penambahan/penggantian kolom di sesi tidak mengubah entri cache
+    """
+    return dict(dataset, df=dataset["df"].copy(deep=False))
+
+
+class DatasetCache:
+    """
+    Cache dataset hasil preprocessing per proses, dipakai bersama semua sesi.
+
+    Kunci cache adalah hash isi file upload, jadi upload file yang sama dari
+    sesi lain langsung memakai hasil yang sudah ada tanpa parsing dan
+    preprocessing ulang. Entri dibuang secara LRU sesuai batas byte. Selama
+    satu dataset sedang dibangun, sesi lain dengan file yang sama menunggu
+    hasilnya alih-alih ikut membangun.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._building = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            dataset = self._entries.get(key)
+            if dataset is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _session_view(dataset)
+
+    def put(self, key, dataset) -> None:
+        size = dataset_nbytes(dataset)
+        if size > self.max_bytes:
+            return  # Terlalu besar untuk budget cache
+
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+                self._size -= self._sizes.pop(key)
+
+            self._entries[key] = dataset
+            self._sizes[key] = size
+            self._size += size
+
+            # Buang entri paling lama tidak dipakai sampai muat di budget
+            while self._size > self.max_bytes:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._size -= self._sizes.pop(evicted_key)
+
+    def get_or_build(self, key, build):
+        """
+        Ambil dataset dari cache atau bangun dengan build() (sekali per key).
+        Mengembalikan (dataset, True jika dari cache).
+        """
+        dataset = self.get(key)
+        if dataset is not None:
+            return dataset, True
+
+        with self._lock:
+            key_lock = self._building.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Sesi lain mungkin sudah selesai membangun selama kita menunggu
+            dataset = self.get(key)
+            if dataset is not None:
+                return dataset, True
+
+            with self._lock:
+                self.misses += 1
+            try:
+                dataset = build()
+                self.put(key, dataset)
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+
+        return _session_view(dataset), False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Satu cache per proses, dipakai bersama oleh semua sesi Streamlit
+DATASET_CACHE = DatasetCache(max_bytes=int(os.environ.get("OMKABA_DATASET_CACHE_MB", "512")) * 1024 * 1024)
+register_cache("dataset", DATASET_CACHE.stats)
@@ -0,0 +1,457 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from preprocessing import (
+    comprehensive_clean, build_country_lookup, load_city_coordinate_index, lookup_city_coordinates
+)
+from city_backends import extract_cities
+from pdf_charts import DEFAULT_CHART_MODE
+from charts import (
+    build_commodity_pie, build_country_bar, build_city_bar, build_company_bar,
+    build_city_map, build_country_counts, build_country_map, build_trend_chart,
+    DEFAULT_COUNTRY_LABELS
+)
+from timeseries import daily_counts, trend_series
+from ingest import (
+    row_fingerprints, classify_rows, combine_frames, compact_frame, frame_nbytes, ingest_usecols, parse_dates,
+    with_archived_addresses
+)
+from assets import LOGO_PATH
+from reports import create_pdf_report, create_excel_report
+import telemetry
+from metrics import ROWS_PROCESSED, PREPROCESS_SECONDS
+from telemetry import (
+    phase, timed, PHASE_PARSE, PHASE_NAME_CLEANING, PHASE_CITY_EXTRACTION, PHASE_DATE_PARSING,
+    PHASE_FILTERING, PHASE_AGGREGATION, PHASE_FIGURES
+)
+
+
+# ========================
+# KONSTANTA
+# ========================
+CITY_COORDINATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "koordinat_kota.xlsx")
+
+DATE_COLUMN = "Diterbitkan Tanggal"
+
+# Kolom yang di-value_counts sekali per filter, dipakai bersama chart, PDF dan Excel
+SUMMARY_COLUMNS = ['Jenis Komoditi', 'Negara Tujuan', 'Kota', 'Nama Exportir/Importir']
+
+# Kolom summary yang di dashboard hanya dipakai top-N-nya; untuk dataset dari
+# store query-nya dibatasi LIMIT (sheet Excel tetap dihitung dari baris lengkap)
+STORE_SUMMARY_LIMITS = {'Nama Exportir/Importir': 10}
+
+# Ukuran render chart untuk laporan PDF
+PDF_FIGURE_WIDTH = 800
+PDF_FIGURE_HEIGHT = 600
+
+# Jumlah thread untuk membaca beberapa file upload sekaligus
+READ_WORKERS = int(os.environ.get("OMKABA_READ_WORKERS", "4"))
+
+REPORT_PDF = "pdf"
+REPORT_EXCEL = "excel"
+REPORT_FORMATS = (REPORT_PDF, REPORT_EXCEL)
+
+REPORT_MIME = {
+    REPORT_PDF: "application/pdf",
+    REPORT_EXCEL: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+# ========================
+# BACA & PREPROCESSING DATA
+# ========================
+def read_dataset(source, name=None):
+    """
+    Baca file CSV/Excel. source boleh path atau file-like (upload Streamlit);
+    jenis file ditentukan dari name (default: nama path).
+    Hanya kolom skema ingest yang dibaca (lihat ingest.INGEST_COLUMNS).
+    """
+    name = name or getattr(source, "name", None) or str(source)
+    if name.lower().endswith(".csv"):
+        return pd.read_csv(source, usecols=ingest_usecols)
+    return pd.read_excel(source, usecols=ingest_usecols)
+
+
+@timed(PHASE_PARSE)
+def read_datasets(sources, max_workers=READ_WORKERS):
+    """
+    Baca beberapa file sekaligus di thread pool lalu gabungkan (lihat ingest.combine_frames).
+    Mengembalikan (DataFrame gabungan, jumlah baris duplikat antar file).
+    """
+    if len(sources) == 1:
+        frames = [read_dataset(sources[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(sources))) as pool:
+            frames = list(pool.map(read_dataset, sources))
+    return combine_frames(frames)
+
+
+def preprocess_dataset(df):
+    """
+    Preprocessing data mentah: bersihkan nama perusahaan, ekstrak kota dari alamat,
+    parsing tanggal dan buang baris tanpa tanggal valid
+    """
+    with PREPROCESS_SECONDS.time():
+        df = _preprocess_dataset(df)
+    ROWS_PROCESSED.inc(len(df))
+    return df
+
+
+def _preprocess_dataset(df):
+    df = df.copy()
+
+    if "Nama Exportir/Importir" in df.columns:
+        with phase(PHASE_NAME_CLEANING):
+            df["Nama Exportir/Importir"] = df["Nama Exportir/Importir"].apply(comprehensive_clean)
+
+    if "Alamat Perusahaan" in df.columns:
+        # Backend ekstraksi dipilih lewat OMKABA_CITY_BACKEND (lihat city_backends.py)
+        with phase(PHASE_CITY_EXTRACTION):
+            df["Kota"] = extract_cities(df["Alamat Perusahaan"])
+
+    # Konversi kolom tanggal (per baris, lihat ingest.parse_dates)
+    with phase(PHASE_DATE_PARSING):
+        df[DATE_COLUMN] = parse_dates(df[DATE_COLUMN])
+
+    # Remove rows with NaT (Not a Time) values in date column
+    return df.dropna(subset=[DATE_COLUMN])
+
+
+def prepare_dataset(df):
+    """
+    Hitung turunan per dataset yang tidak bergantung pada filter tanggal.
+    Dataset dikembalikan sebagai dict supaya UI dan CLI memakai struktur yang sama.
+    """
+    # Resolusi nama negara -> ISO3 sekali per dataset (lookup di-cache per ejaan)
+    country_iso3, unresolved_countries = build_country_lookup(df["Negara Tujuan"])
+
+    dates = df[DATE_COLUMN]
+    return {
+        "df": df,
+        "store": None,
+        "address_archive": None,
+        "total_records": len(df),
+        "country_iso3": country_iso3,
+        "unresolved_countries": unresolved_countries,
+        # Seri jumlah harian sekali per dataset, dipakai ulang untuk setiap rentang filter
+        "daily": daily_counts(dates),
+        "min_date": dates.min().date() if not dates.empty else None,
+        "max_date": dates.max().date() if not dates.empty else None,
+    }
+
+
+def prepare_store_dataset(store):
+    """
+    Dataset dari store historis: hanya agregat yang dimuat, tanpa DataFrame mentah.
+    Strukturnya sama dengan prepare_dataset (df = None).
+    """
+    country_iso3, unresolved_countries = build_country_lookup(store.distinct("Negara Tujuan"))
+    min_date, max_date = store.date_range()
+    return {
+        "df": None,
+        "store": store,
+        "address_archive": None,
+        "total_records": store.count(),
+        "country_iso3": country_iso3,
+        "unresolved_countries": unresolved_countries,
+        "daily": store.daily_counts(),
+        "min_date": min_date,
+        "max_date": max_date,
+    }
+
+
+def ingest_upload(store, df_raw, content_hash, name=None):
+    """
+    Gabungkan data mentah hasil upload ke store secara inkremental: hanya baris
+    yang belum pernah dilihat atau isinya berubah yang dipreprocessing dan ditulis.
+    Mengembalikan dict jumlah baris {"new", "updated", "duplicate", "invalid"}.
+    """
+    counts = {"new": 0, "updated": 0, "duplicate": 0, "invalid": 0}
+    if store.has_ingest(content_hash):
+        # File yang sama persis sudah pernah diproses
+        counts["duplicate"] = len(df_raw)
+        return counts
+
+    fingerprints = row_fingerprints(df_raw)
+    classified = classify_rows(fingerprints, store.known_fingerprints(fingerprints["record_key"].unique()))
+    status = classified["status"]
+    counts["duplicate"] = int((status == "duplicate").sum())
+
+    pending = df_raw[(status != "duplicate").to_numpy()]
+    df_clean = preprocess_dataset(pending)
+
+    # Versi lama record yang diperbarui (hanya dengan kunci unik, lihat classify_rows)
+    # dihapus, kecuali versi barunya tidak valid
+    written = classified.loc[df_clean.index]
+    store.upsert(df_clean, fingerprints, replaced=written["replaces"].dropna())
+
+    counts["new"] = int((written["status"] == "new").sum())
+    counts["updated"] = int((written["status"] == "updated").sum())
+    counts["invalid"] = len(pending) - len(df_clean)
+    store.record_ingest(content_hash, name=name, n_rows=len(df_clean))
+    return counts
+
+
+def load_dataset(sources):
+    """
+    Baca, preprocessing dan siapkan dataset dari satu atau beberapa file
+    (path atau file-like). Jumlah baris duplikat antar file disimpan di "n_duplicates",
+    memori DataFrame hasil baca file dan DataFrame sesi di "memory".
+    """
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    df, n_duplicates = read_datasets(list(sources))
+    bytes_read = frame_nbytes(df)
+    df = preprocess_dataset(df)
+
+    # Dimensi sebagai categorical, alamat dipindah ke arsip setelah ekstraksi kota
+    df, address_archive = compact_frame(df)
+
+    dataset = prepare_dataset(df)
+    dataset["address_archive"] = address_archive
+    dataset["n_duplicates"] = n_duplicates
+    dataset["memory"] = {
+        "before": bytes_read,
+        "after": frame_nbytes(df),
+        "archived": address_archive.nbytes if address_archive is not None else 0,
+    }
+    return dataset
+
+
+# ========================
+# FILTER & AGREGASI
+# ========================
+def filter_by_date(df, start_date, end_date):
+    """
+    Baris dengan tanggal dalam rentang [start_date, end_date] (inklusif per hari)
+    """
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    dates = df[DATE_COLUMN]
+    return df[(dates >= start) & (dates < end)]
+
+
+def compute_summaries(df_filtered):
+    """
+    value_counts per kolom summary, dihitung sekali per filter
+    """
+    return {
+        col: _value_counts(df_filtered[col])
+        for col in SUMMARY_COLUMNS
+        if col in df_filtered.columns
+    }
+
+
+def _value_counts(values):
+    """
+    value_counts yang sama untuk kolom biasa dan categorical: kategori tanpa
+    data di periode ini dibuang dan indeks dikembalikan sebagai nilai biasa
+    """
+    counts = values.value_counts()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        counts = counts[counts > 0]
+        counts.index = pd.Index(counts.index.astype(object), name=counts.index.name)
+    return counts
+
+
+def select_period(dataset, start_date, end_date):
+    """
+    Data satu periode: (df_filtered, jumlah record, summaries).
+    Untuk dataset dari store, jumlah dan summaries dihitung lewat SQL
+    dan df_filtered None (baris mentah baru dibaca saat export).
+    """
+    store = dataset["store"]
+    if store is not None:
+        with phase(PHASE_AGGREGATION):
+            summaries = {
+                col: store.value_counts(col, start_date, end_date, limit=STORE_SUMMARY_LIMITS.get(col))
+                for col in SUMMARY_COLUMNS
+            }
+            return None, store.count(start_date, end_date), summaries
+
+    with phase(PHASE_FILTERING):
+        df_filtered = filter_by_date(dataset["df"], start_date, end_date)
+    with phase(PHASE_AGGREGATION):
+        summaries = compute_summaries(df_filtered)
+    return df_filtered, len(df_filtered), summaries
+
+
+def period_rows(dataset, start_date, end_date):
+    """
+    Baris mentah satu periode, dari DataFrame sesi (alamat dari arsip) atau dari store
+    """
+    store = dataset["store"]
+    if store is not None:
+        return store.fetch(start_date, end_date)
+    df_filtered = filter_by_date(dataset["df"], start_date, end_date)
+    return with_archived_addresses(df_filtered, dataset.get("address_archive"))
+
+
+def format_date_range(start_date, end_date, min_date=None, max_date=None):
+    """
+    Teks periode untuk laporan; ditandai "(Semua Data)" jika mencakup seluruh dataset
+    """
+    text = f"{start_date.strftime('%d-%m-%Y')} - {end_date.strftime('%d-%m-%Y')}"
+    if start_date == min_date and end_date == max_date:
+        text += " (Semua Data)"
+    return text
+
+
+def month_periods(start_date, end_date):
+    """
+    Daftar (awal, akhir) per bulan kalender yang beririsan dengan rentang,
+    dipotong pada start_date/end_date
+    """
+    periods = []
+    for month_start in pd.date_range(pd.Timestamp(start_date).replace(day=1), end_date, freq="MS"):
+        month_end = month_start + pd.offsets.MonthEnd(0)
+        periods.append((max(month_start.date(), start_date), min(month_end.date(), end_date)))
+    return periods
+
+
+def city_map_data(summaries):
+    """
+    Koordinat kota untuk peta kota + daftar kota tanpa koordinat
+    """
+    city_index = load_city_coordinate_index(CITY_COORDINATES_PATH)
+    return lookup_city_coordinates(city_index, summaries['Kota'])
+
+
+# ========================
+# FIGURE LAPORAN
+# ========================
+@timed(PHASE_FIGURES)
+def build_pdf_figures(summaries, trend, trend_bucket, country_counts, n_country_labels=DEFAULT_COUNTRY_LABELS):
+    """
+    Semua chart laporan PDF dengan ukuran render tetap, urut sesuai halaman
+    """
+    width, height = PDF_FIGURE_WIDTH, PDF_FIGURE_HEIGHT
+    return {
+        "1. Distribusi Komoditas": build_commodity_pie(summaries['Jenis Komoditi']),
+        "2. Top 10 Negara Tujuan": build_country_bar(summaries['Negara Tujuan'], width=width, height=height),
+        "3. Top 10 Kota Perusahaan Eksportir": build_city_bar(summaries['Kota'], width=width, height=height),
+        "4. Top 10 Perusahaan Ekspor": build_company_bar(
+            summaries['Nama Exportir/Importir'], width=width, height=height
+        ),
+        "5. Tren Jumlah Ekspor": build_trend_chart(trend, trend_bucket, width=width, height=height),
+        "6. Peta Sebaran Negara Tujuan": build_country_map(
+            country_counts, n_labels=n_country_labels, width=width, height=height
+        ),
+    }
+
+
+@timed(PHASE_FIGURES)
+def build_display_figures(summaries, trend, trend_bucket, country_counts, df_map,
+                          n_country_labels=DEFAULT_COUNTRY_LABELS):
+    """
+    Chart interaktif untuk dashboard (fig1..fig6)
+    """
+    return {
+        "fig1": build_commodity_pie(summaries['Jenis Komoditi'], show_title=True),
+        "fig2": build_country_bar(summaries['Negara Tujuan']),
+        "fig3": build_city_map(df_map),
+        "fig4": build_company_bar(summaries['Nama Exportir/Importir']),
+        "fig5": build_trend_chart(trend, trend_bucket, rangeslider=True),
+        "fig6": build_country_map(country_counts, n_labels=n_country_labels),
+    }
+
+
+# ========================
+# GENERATE LAPORAN (HEADLESS)
+# ========================
+def report_filename(kind, start_date, end_date, label=None):
+    """
+    Nama file laporan per periode (dan segmen), stabil untuk dijalankan ulang dari cron
+    """
+    period = f"{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}"
+    if label:
+        period = f"{label}_{period}"
+    if kind == REPORT_PDF:
+        return f"Dashboard_OMKABA_{period}.pdf"
+    return f"Data_Ekspor_{period}.xlsx"
+
+
+def generate_reports(dataset, start_date, end_date, output_dir, formats=REPORT_FORMATS,
+                     n_country_labels=DEFAULT_COUNTRY_LABELS, chart_mode=DEFAULT_CHART_MODE,
+                     logo_path=LOGO_PATH, segment=None, label=None):
+    """
+    Tulis laporan PDF/Excel satu periode ke output_dir tanpa Streamlit.
+    segment: (kolom, nilai) opsional untuk membatasi laporan ke satu segmen;
+    label: penanda segmen di nama file.
+    Mengembalikan daftar path yang ditulis (kosong jika periode tanpa data).
+    Setiap pemanggilan dicatat sebagai satu run telemetri "report".
+    """
+    with telemetry.run("report", start=start_date, end=end_date, label=label):
+        return _generate_reports(
+            dataset, start_date, end_date, output_dir, formats, n_country_labels, chart_mode, logo_path,
+            segment, label
+        )
+
+
+def _generate_reports(dataset, start_date, end_date, output_dir, formats, n_country_labels, chart_mode,
+                      logo_path, segment, label):
+    df = dataset["df"]
+    with phase(PHASE_FILTERING):
+        df_filtered = filter_by_date(df, start_date, end_date)
+        segment_text = None
+        if segment is not None:
+            column, value = segment
+            df_filtered = df_filtered[df_filtered[column] == value]
+            segment_text = f"{column}: {value}"
+    if df_filtered.empty:
+        return []
+
+    total_records = len(df)
+    filtered_records = len(df_filtered)
+    with phase(PHASE_AGGREGATION):
+        summaries = compute_summaries(df_filtered)
+    date_range = format_date_range(start_date, end_date, dataset["min_date"], dataset["max_date"])
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+
+    if REPORT_PDF in formats:
+        # Seri harian dataset penuh hanya berlaku tanpa segmen
+        daily = dataset["daily"] if segment is None else daily_counts(df_filtered[DATE_COLUMN])
+        trend, trend_bucket = trend_series(daily, start_date, end_date)
+        country_counts = build_country_counts(summaries['Negara Tujuan'], dataset["country_iso3"])
+        figures_dict = build_pdf_figures(summaries, trend, trend_bucket, country_counts, n_country_labels)
+        buffer = create_pdf_report(
+            figures_dict, date_range, total_records, filtered_records,
+            logo_path=logo_path, chart_mode=chart_mode, segment=segment_text
+        )
+        filename = report_filename(REPORT_PDF, start_date, end_date, label)
+        written.append(_write_report(buffer, output_dir, filename))
+
+    if REPORT_EXCEL in formats:
+        buffer = create_excel_report(
+            with_archived_addresses(df_filtered, dataset.get("address_archive")), date_range, total_records, filtered_records, summaries=summaries,
+            segment=segment_text
+        )
+        filename = report_filename(REPORT_EXCEL, start_date, end_date, label)
+        written.append(_write_report(buffer, output_dir, filename))
+
+    return written
+
+
+def create_period_excel(dataset, start_date, end_date, date_range, summaries=None, progress=None):
+    """
+    Laporan Excel satu periode; baris mentah dibaca di sini (di job background)
+    supaya sesi dashboard tidak perlu memuatnya
+    """
+    with phase(PHASE_FILTERING):
+        df_filtered = period_rows(dataset, start_date, end_date)
+    return create_excel_report(
+        df_filtered, date_range, dataset["total_records"], len(df_filtered),
+        summaries=summaries, progress=progress
+    )
+
+
+def _write_report(buffer, output_dir, filename):
+    path = os.path.join(output_dir, filename)
+    with open(path, "wb") as f:
+        f.write(buffer.getbuffer())
+    return path
+
@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import telemetry
+from artifact_store import ARTIFACTS
+from metrics import EXPORTS, EXPORT_SECONDS, EXPORT_QUEUE_SECONDS
+
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Dilempar dari callback progress ketika job dibatalkan"""
+
+
+class ExportJob:
+    """
+    Satu job export (PDF/Excel) yang berjalan di background thread.
+
+    Fungsi export menerima callback `progress(fraction, message)`; callback itu
+    sekaligus menjadi titik pembatalan karena melempar JobCancelled bila job
+    sudah dibatalkan.
+    """
+
+    def __init__(self, key, kind, filename, mime, subscriber=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.kind = kind
+        self.filename = filename
+        self.mime = mime
+        self.status = JOB_PENDING
+        self.progress = 0.0
+        self.message = "Menunggu antrian..."
+        self.result = None
+        self.artifact_id = None
+        self.size = None
+        self.telemetry = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Sesi yang memakai job ini; submit berulang dari sesi yang sama tetap satu
+        self.subscribers = {subscriber}
+        self._cancel_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    def update(self, fraction, message=None):
+        """
+        Callback progress untuk fungsi export
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        self.progress = max(0.0, min(1.0, float(fraction)))
+        if message:
+            self.message = message
+
+    def cancel(self, subscriber=None):
+        """
+        Batalkan job untuk satu sesi. Jika job dipakai bersama beberapa sesi (dedup),
+        job baru benar-benar dihentikan setelah semua sesi membatalkan.
+        """
+        self.subscribers.discard(subscriber)
+        if not self.subscribers:
+            self._cancel_event.set()
+
+
+class ExportJobRunner:
+    """
+    Menjalankan export di thread pool supaya script Streamlit tidak terblokir.
+    Request identik (key sama) yang masih berjalan digabung menjadi satu job.
+
+    Hasil export disimpan di artifact store (budget memori + spill ke disk)
+    alih-alih di objek job; job hanya memegang id artifact-nya.
+    """
+
+    def __init__(self, max_workers=2, retention_seconds=None, artifacts=ARTIFACTS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="omkaba-export")
+        self._jobs = {}
+        self._active_by_key = {}
+        self._lock = threading.Lock()
+        self.artifacts = artifacts
+        # Job disimpan selama artifact-nya masih ada
+        self.retention_seconds = retention_seconds or (artifacts.ttl_seconds if artifacts else 3600)
+
+    def submit(self, key, kind, filename, mime, fn, *args, subscriber=None, **kwargs) -> ExportJob:
+        """
+        Jadwalkan fn(*args, progress=job.update, **kwargs) dan kembalikan job-nya.
+        subscriber: id sesi yang meminta export (lihat ExportJob.cancel)
+        """
+        with self._lock:
+            self._prune()
+
+            existing = self._active_by_key.get(key)
+            if existing is not None and not existing.finished and not existing.cancel_requested:
+                existing.subscribers.add(subscriber)
+                return existing
+
+            job = ExportJob(key, kind, filename, mime, subscriber=subscriber)
+            self._jobs[job.id] = job
+            self._active_by_key[key] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id) -> Optional[ExportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def open_result(self, job):
+        """
+        Bytes hasil job yang sudah selesai; None jika sudah kedaluwarsa
+        """
+        if job.artifact_id is not None:
+            return self.artifacts.read(job.artifact_id)
+        if job.result is not None:
+            return job.result.getvalue()
+        return None
+
+    def result_available(self, job):
+        if job.artifact_id is not None:
+            return self.artifacts.exists(job.artifact_id)
+        return job.result is not None
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            self._finish(job, JOB_CANCELLED)
+            return
+
+        job.started_at = time.time()
+        EXPORT_QUEUE_SECONDS.observe(job.started_at - job.created_at, kind=job.kind)
+        job.status = JOB_RUNNING
+        job.message = "Sedang diproses..."
+        try:
+            with telemetry.run(f"export_{job.kind}", job=job.id) as run:
+                result = fn(*args, progress=job.update, **kwargs)
+            job.telemetry = run.to_record()
+            if self.artifacts is not None:
+                job.artifact_id = self.artifacts.put(result)
+                job.size = self.artifacts.size(job.artifact_id)
+            else:
+                job.result = result
+        except JobCancelled:
+            self._finish(job, JOB_CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, JOB_FAILED)
+        else:
+            job.progress = 1.0
+            job.message = "Selesai"
+            self._finish(job, JOB_DONE)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        EXPORTS.inc(kind=job.kind, status=status)
+        if status == JOB_DONE:
+            # Durasi kerja saja; waktu antri dicatat terpisah di EXPORT_QUEUE_SECONDS
+            EXPORT_SECONDS.observe(job.finished_at - job.started_at, kind=job.kind)
+        with self._lock:
+            if self._active_by_key.get(job.key) is job:
+                del self._active_by_key[job.key]
+
+    def _prune(self):
+        """
+        Hapus job yang sudah selesai lebih lama dari retention_seconds
+        """
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > self.retention_seconds
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if job.artifact_id is not None and self.artifacts is not None:
+                self.artifacts.remove(job.artifact_id)
+
+
+# Satu runner per proses, dipakai bersama oleh semua sesi Streamlit
+EXPORT_JOBS = ExportJobRunner(max_workers=int(os.environ.get("OMKABA_EXPORT_WORKERS", "2")))
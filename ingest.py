@@ -0,0 +1,320 @@
+import hashlib
+import os
+import re
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+
+
+def _env_columns(name):
+    return [col.strip() for col in os.environ.get(name, "").split(",") if col.strip()]
+
+
+# Identitas vs isi record izin:
+# - identitas (record_key): kolom kunci di bawah, yaitu tanggal terbit + perusahaan.
+# - isi (row_hash): semua kolom lain yang dibaca (alamat, komoditas, negara tujuan dan
+#   kolom tambahan), kecuali nomor urut.
+# Tanggal + perusahaan tidak unik: satu perusahaan sering mendapat beberapa izin di
+# hari yang sama dengan komoditas/negara tujuan berbeda. Dengan kunci bawaan, baris
+# yang isinya berbeda selalu dianggap record baru dan tidak pernah menimpa record lama.
+# Jika export punya kolom yang benar-benar unik (mis. nomor dokumen), set
+# OMKABA_ROW_KEY_COLUMNS (dipisah koma); koreksi pada kolom isi lalu membuat record
+# berstatus "updated" dan menimpa record lama (lihat classify_rows).
+DEFAULT_ROW_KEY_COLUMNS = [
+    "Diterbitkan Tanggal",
+    "Nama Exportir/Importir",
+]
+ROW_KEY_COLUMNS = _env_columns("OMKABA_ROW_KEY_COLUMNS") or DEFAULT_ROW_KEY_COLUMNS
+# Hanya kunci yang dikonfigurasi dianggap unik per record
+ROW_KEY_UNIQUE = bool(_env_columns("OMKABA_ROW_KEY_COLUMNS"))
+
+# Kolom nomor urut hasil export berubah setiap kali export diulang,
+# jadi tidak ikut menentukan apakah isi record berubah
+ROW_HASH_IGNORE_COLUMNS = ["No", "No."]
+
+DATE_COLUMN = "Diterbitkan Tanggal"
+
+# Format tanggal yang dikenal, dicoba berurutan per baris. Hari di depan seperti
+# export aplikasi perizinan; tanggal ISO (termasuk sel datetime Excel) dicoba
+# sebelum tebakan format="mixed" supaya "2024-01-05" tidak terbaca 1 Mei.
+DATE_FORMATS = [
+    "%d/%m/%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S",
+    "%d-%m-%Y", "%d-%m-%Y %H:%M", "%d-%m-%Y %H:%M:%S",
+    "ISO8601",
+]
+
+
+# ========================
+# SKEMA INGEST
+# ========================
+# Kolom yang dipakai dashboard/laporan; kolom lain di file tidak dibaca sama sekali.
+# Kolom tambahan (mis. untuk export) bisa diminta lewat OMKABA_INGEST_EXTRA_COLUMNS.
+REQUIRED_COLUMNS = [
+    DATE_COLUMN,
+    "Nama Exportir/Importir",
+    "Alamat Perusahaan",
+    "Jenis Komoditi",
+    "Negara Tujuan",
+]
+INGEST_COLUMNS = list(dict.fromkeys(REQUIRED_COLUMNS + ROW_KEY_COLUMNS + _env_columns("OMKABA_INGEST_EXTRA_COLUMNS")))
+
+# Kolom dimensi (nilai berulang) disimpan sebagai categorical
+DIMENSION_COLUMNS = ["Nama Exportir/Importir", "Kota", "Jenis Komoditi", "Negara Tujuan"]
+
+# Alamat hanya dibutuhkan untuk ekstraksi kota dan kolom export Excel:
+# "archive" = dipindah ke file arsip setelah kota diekstrak, dibaca lagi saat export Excel,
+# "category" = tetap di DataFrame sesi sebagai categorical,
+# "drop" = dibuang setelah kota diekstrak (Excel tanpa kolom alamat)
+ADDRESS_COLUMN = "Alamat Perusahaan"
+ADDRESS_STORAGE = os.environ.get("OMKABA_ADDRESS_STORAGE", "archive")
+ADDRESS_ARCHIVE_DIR = os.environ.get("OMKABA_ADDRESS_ARCHIVE_DIR") or None
+
+
+def normalize_column_name(col):
+    return re.sub(r"\s+", " ", str(col)).strip()
+
+
+def normalize_columns(df):
+    """
+    Samakan penulisan nama kolom antar file (spasi ganda/di tepi)
+    """
+    return df.rename(columns=normalize_column_name)
+
+
+def ingest_usecols(col):
+    """
+    Filter usecols untuk read_csv/read_excel: hanya kolom skema ingest yang dibaca
+    """
+    return normalize_column_name(col) in INGEST_COLUMNS
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _remove_file(path, owner_pid):
+    # Proses anak hasil fork (laporan massal) ikut memegang arsip tetapi tidak memilikinya
+    if os.getpid() != owner_pid:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class AddressArchive:
+    """
+    Kolom alamat di luar DataFrame sesi. Ditulis ke file sementara (categorical,
+    alamat berulang per perusahaan) dan hanya dibaca lagi untuk baris yang diexport.
+    File dihapus saat arsip tidak dipakai lagi oleh dataset mana pun.
+    """
+
+    def __init__(self, addresses, directory=ADDRESS_ARCHIVE_DIR):
+        fd, self.path = tempfile.mkstemp(prefix="omkaba-alamat-", suffix=".pkl", dir=directory)
+        os.close(fd)
+        addresses.astype("category").to_pickle(self.path)
+        self.n_rows = len(addresses)
+        self.nbytes = os.path.getsize(self.path)
+        self._finalizer = weakref.finalize(self, _remove_file, self.path, os.getpid())
+
+    def __getstate__(self):
+        # Salinan di proses worker (laporan massal) hanya membaca file, tidak menghapusnya
+        return {"path": self.path, "n_rows": self.n_rows, "nbytes": self.nbytes}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def load(self, index):
+        """
+        Alamat untuk baris dengan indeks DataFrame sesi tersebut
+        """
+        return pd.read_pickle(self.path).reindex(index).astype(object)
+
+
+def compact_frame(df):
+    """
+    Ringkas DataFrame hasil preprocessing: dimensi menjadi categorical dan
+    alamat diarsip ke file, disimpan sebagai categorical, atau dibuang sesuai
+    ADDRESS_STORAGE. Mengembalikan (DataFrame, AddressArchive atau None).
+    """
+    columns = {
+        col: df[col].astype("category")
+        for col in DIMENSION_COLUMNS
+        if col in df.columns
+    }
+    if ADDRESS_COLUMN in df.columns and ADDRESS_STORAGE == "category":
+        columns[ADDRESS_COLUMN] = df[ADDRESS_COLUMN].astype("category")
+    df = df.assign(**columns)
+
+    archive = None
+    if ADDRESS_COLUMN in df.columns and ADDRESS_STORAGE in ("archive", "drop"):
+        if ADDRESS_STORAGE == "archive":
+            archive = AddressArchive(df[ADDRESS_COLUMN])
+        df = df.drop(columns=[ADDRESS_COLUMN])
+    return df, archive
+
+
+def with_archived_addresses(df, archive):
+    """
+    Kembalikan kolom alamat dari arsip ke baris DataFrame (untuk export Excel)
+    """
+    if archive is None or ADDRESS_COLUMN in df.columns:
+        return df
+    return df.assign(**{ADDRESS_COLUMN: archive.load(df.index)})
+
+
+def parse_dates(values):
+    """
+    Parsing kolom tanggal per baris: hasil satu baris tidak bergantung pada baris
+    lain di file (pd.to_datetime tanpa format menebak satu format dari nilai pertama
+    sehingga string yang sama bisa valid di satu file dan NaT di file lain).
+    Nilai yang tidak cocok dengan format mana pun menjadi NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    text = pd.Series(values.astype(str).str.strip().to_numpy())
+    pending = pd.Series(values.notna().to_numpy())
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[us]")
+    for fmt in DATE_FORMATS + ["mixed"]:
+        if not pending.any():
+            break
+        extra = {"dayfirst": True} if fmt == "mixed" else {}
+        attempt = pd.to_datetime(text[pending], format=fmt, errors="coerce", **extra)
+        parsed = parsed.combine_first(attempt)
+        pending &= parsed.isna()
+    return pd.Series(parsed.to_numpy(), index=values.index, name=values.name)
+
+
+def _hash_frame(df):
+    """
+    Hash 64-bit per baris yang stabil antar proses dan antar file
+    (nilai dibandingkan sebagai teks supaya int/float/str hasil parsing berbeda tetap sama)
+    """
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+    # SQLite INTEGER bertanda 64-bit
+    return hashes.to_numpy().view("int64")
+
+
+def row_fingerprints(df, key_columns=None):
+    """
+    Sidik jari setiap baris data mentah (sebelum preprocessing):
+    - record_key: identitas record (kolom kunci, lihat ROW_KEY_COLUMNS)
+    - row_hash: isi record, yaitu kolom selain kunci dan nomor urut; berbeda jika
+      record diperbarui
+    - row_key: satu baris persis (identitas + isi + urutan di antara baris yang
+      identik, supaya baris kembar yang sah tetap dihitung terpisah)
+
+    Mengembalikan DataFrame [record_key, row_key, row_hash] dengan indeks yang sama dengan df.
+    """
+    key_columns = [col for col in (key_columns or ROW_KEY_COLUMNS) if col in df.columns]
+    if not key_columns:
+        key_columns = list(df.columns)
+
+    if DATE_COLUMN in df.columns:
+        # Tanggal dibandingkan sebagai tanggal: CSV (teks) dan Excel (datetime) menghasilkan
+        # sidik jari sama, baik tanggal menjadi bagian kunci maupun isi
+        raw_dates = df[DATE_COLUMN]
+        parsed = parse_dates(raw_dates)
+        df = df.assign(**{DATE_COLUMN: parsed.astype(str).where(parsed.notna(), raw_dates.astype(str))})
+
+    content_columns = [
+        col for col in df.columns if col not in key_columns and col not in ROW_HASH_IGNORE_COLUMNS
+    ]
+    record_key = pd.Series(_hash_frame(df[key_columns]))
+    if content_columns:
+        row_hash = pd.Series(_hash_frame(df[sorted(content_columns, key=str)]))
+    else:
+        row_hash = record_key
+
+    occurrence = row_hash.groupby([record_key, row_hash], sort=False).cumcount()
+    row_key = _hash_frame(pd.DataFrame({"key": record_key, "content": row_hash, "n": occurrence}))
+    return pd.DataFrame(
+        {"record_key": record_key.to_numpy(), "row_key": row_key, "row_hash": row_hash.to_numpy()}, index=df.index
+    )
+
+
+def classify_rows(fingerprints, known, unique_key=None):
+    """
+    Bandingkan sidik jari upload dengan record yang sudah tersimpan.
+    known: DataFrame [record_key, row_key, row_hash] berisi semua record tersimpan
+    yang record_key-nya ada di upload.
+
+    - Baris yang persis sama dengan record tersimpan (row_key) -> "duplicate".
+    - Hanya jika kunci unik dikonfigurasi (unique_key, default ROW_KEY_UNIQUE): baris
+      lain dengan identitas yang sudah ada dipasangkan dengan record tersimpan
+      beridentitas sama yang tidak ada di upload -> "updated" (record lama ditimpa).
+      Identitas yang jumlah recordnya di upload berbeda dengan di store tidak
+      dipasangkan. Dengan kunci bawaan (tanggal + perusahaan) tidak ada pemasangan:
+      izin lain perusahaan yang sama di hari yang sama tidak bisa dibedakan dari koreksi.
+    - Sisanya -> "new".
+
+    Mengembalikan DataFrame [status, replaces] per baris; replaces = row_key record
+    tersimpan yang ditimpa baris "updated" (None untuk status lain).
+    """
+    if unique_key is None:
+        unique_key = ROW_KEY_UNIQUE
+    status = np.full(len(fingerprints), "new", dtype=object)
+    replaces = np.full(len(fingerprints), None, dtype=object)
+
+    if len(known):
+        row_keys = fingerprints["row_key"].to_numpy()
+        is_duplicate = np.isin(row_keys, known["row_key"].to_numpy())
+        status[is_duplicate] = "duplicate"
+
+    if len(known) and unique_key:
+        # Record tersimpan yang tidak muncul persis di upload: kandidat versi lama
+        stale = known[~known["row_key"].isin(row_keys)]
+        pending = pd.DataFrame({
+            "record_key": fingerprints["record_key"].to_numpy(),
+            "row_hash": fingerprints["row_hash"].to_numpy(),
+            "pos": np.arange(len(fingerprints)),
+        })[~is_duplicate]
+        pending = pending[pending["record_key"].isin(stale["record_key"])]
+
+        if len(pending):
+            incoming_sizes = fingerprints["record_key"].value_counts()
+            stored_sizes = known["record_key"].value_counts()
+            stale_groups = dict(tuple(stale.groupby("record_key", sort=False)))
+            for record_key, rows in pending.groupby("record_key", sort=False):
+                if incoming_sizes[record_key] != stored_sizes[record_key]:
+                    continue
+                old = stale_groups[record_key].sort_values("row_hash")
+                rows = rows.sort_values("row_hash")
+                n = min(len(rows), len(old))
+                positions = rows["pos"].to_numpy()[:n]
+                status[positions] = "updated"
+                replaces[positions] = old["row_key"].to_numpy()[:n].tolist()
+
+    return pd.DataFrame({"status": status, "replaces": replaces}, index=fingerprints.index)
+
+
+def combine_frames(frames):
+    """
+    Gabungkan beberapa file upload menjadi satu DataFrame: nama kolom diselaraskan
+    (kolom yang tidak ada di satu file menjadi kosong) dan record yang muncul di
+    lebih dari satu file hanya disimpan sekali.
+    Mengembalikan (DataFrame gabungan, jumlah baris duplikat yang dibuang).
+    """
+    frames = [normalize_columns(df) for df in frames]
+    if len(frames) == 1:
+        return frames[0], 0
+
+    # Kunci dihitung per file, jadi baris kembar dalam satu file tetap dipertahankan
+    row_keys = np.concatenate([row_fingerprints(df)["row_key"].to_numpy() for df in frames])
+    combined = pd.concat(frames, ignore_index=True, sort=False)
+
+    duplicated = pd.Series(row_keys).duplicated().to_numpy()
+    return combined[~duplicated].reset_index(drop=True), int(duplicated.sum())
+
+
+def uploads_content_hash(contents):
+    """
+    Hash isi sekumpulan file upload (tidak bergantung urutan file)
+    """
+    file_hashes = sorted(hashlib.sha256(content).hexdigest() for content in contents)
+    if len(file_hashes) == 1:
+        return file_hashes[0]
+    return hashlib.sha256("|".join(file_hashes).encode("utf-8")).hexdigest()
@@ -0,0 +1,306 @@
+"""
+Metrik proses dashboard dalam format teks Prometheus.
+
+Metrik bisa diambil lewat endpoint HTTP lokal (OMKABA_METRICS_PORT) atau
+ditulis berkala ke file untuk textfile collector node_exporter
+(OMKABA_METRICS_TEXTFILE). Keduanya tidak membutuhkan layanan eksternal:
+
+    curl http://127.0.0.1:9108/metrics
+"""
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ========================
+# KONFIGURASI
+# ========================
+METRICS_PORT = os.environ.get("OMKABA_METRICS_PORT")
+METRICS_HOST = os.environ.get("OMKABA_METRICS_HOST", "127.0.0.1")
+METRICS_TEXTFILE = os.environ.get("OMKABA_METRICS_TEXTFILE")
+METRICS_INTERVAL = float(os.environ.get("OMKABA_METRICS_INTERVAL", "15"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket durasi (detik) untuk preprocessing dan export
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# ========================
+# JENIS METRIK
+# ========================
+class Counter:
+    """Nilai yang hanya bertambah, per kombinasi label"""
+
+    type = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self._values.items()]
+
+
+class Histogram:
+    """Distribusi nilai (mis. durasi) dalam bucket kumulatif, per kombinasi label"""
+
+    type = "histogram"
+
+    def __init__(self, name, help_text, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def time(self, **labels):
+        """
+        Context manager: durasi blok dicatat sebagai satu observasi
+        """
+        return _Timer(self, labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for labels, (counts, total) in self._values.items():
+                for bound, count in zip(self.buckets, counts):
+                    samples.append((f"{self.name}_bucket", labels + (("le", _format_value(bound)),), count))
+                samples.append((f"{self.name}_count", labels, counts[-1]))
+                samples.append((f"{self.name}_sum", labels, total))
+        return samples
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class CallbackMetric:
+    """
+    Metrik yang nilainya dibaca saat scrape, mis. statistik cache yang sudah
+    dihitung oleh objek cache itu sendiri. fn mengembalikan list (labels dict, nilai).
+    """
+
+    def __init__(self, name, help_text, type, fn):
+        self.name = name
+        self.help = help_text
+        self.type = type
+        self.fn = fn
+
+    def samples(self):
+        return [(self.name, tuple(sorted(labels.items())), value) for labels, value in self.fn()]
+
+
+# ========================
+# REGISTRY
+# ========================
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # Modul Streamlit bisa diimpor ulang; metrik dengan nama sama dipakai ulang
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text):
+        return self.register(Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DURATION_BUCKETS):
+        return self.register(Histogram(name, help_text, buckets))
+
+    def callback(self, name, help_text, type, fn):
+        with self._lock:
+            # Callback terbaru menggantikan yang lama (objek cache baru setelah reload)
+            self._metrics[name] = CallbackMetric(name, help_text, type, fn)
+            return self._metrics[name]
+
+    def render(self):
+        """
+        Semua metrik dalam format teks Prometheus
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in sorted(metrics, key=lambda m: m.name):
+            try:
+                samples = metric.samples()
+            except Exception:
+                continue  # Satu callback yang gagal tidak boleh menggagalkan scrape
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+UPLOADS = REGISTRY.counter(
+    "omkaba_uploads_total", "Upload data di dashboard, termasuk upload ulang (mode: dataset/store)"
+)
+UPLOAD_CACHE_HITS = REGISTRY.counter(
+    "omkaba_upload_cache_hits_total",
+    "Upload yang tidak dipreprocessing ulang: dataset dari cache atau file yang sudah pernah diingest ke store"
+)
+ROWS_PROCESSED = REGISTRY.counter("omkaba_rows_processed_total", "Baris yang melewati preprocessing")
+PREPROCESS_SECONDS = REGISTRY.histogram("omkaba_preprocess_seconds", "Durasi preprocessing per upload")
+EXPORTS = REGISTRY.counter("omkaba_exports_total", "Job export selesai per jenis dan status")
+EXPORT_SECONDS = REGISTRY.histogram(
+    "omkaba_export_seconds", "Durasi job export per jenis, sejak worker mulai mengerjakan"
+)
+EXPORT_QUEUE_SECONDS = REGISTRY.histogram(
+    "omkaba_export_queue_seconds", "Waktu tunggu job export di antrian sebelum dikerjakan worker"
+)
+KALEIDO_RENDERS = REGISTRY.counter("omkaba_kaleido_renders_total", "Render chart oleh Kaleido (cache miss)")
+KALEIDO_RESTARTS = REGISTRY.counter(
+    "omkaba_kaleido_restarts_total", "Render Kaleido yang diulang setelah Chromium dipasang ulang"
+)
+
+_CACHE_STATS = {}
+
+
+def register_cache(name, stats):
+    """
+    Daftarkan statistik hit/miss sebuah cache (fungsi stats() -> dict dengan
+    "hits", "misses", opsional "disk_hits" dan "bytes") sebagai metrik per label cache
+    """
+    _CACHE_STATS[name] = stats
+
+
+def _cache_samples(field, **extra):
+    samples = []
+    for name, stats in list(_CACHE_STATS.items()):
+        values = stats()
+        if field in values:
+            samples.append(({"cache": name, **extra}, values[field]))
+    return samples
+
+
+REGISTRY.callback("omkaba_cache_hits_total", "Hit cache per cache", "counter", lambda: _cache_samples("hits"))
+REGISTRY.callback("omkaba_cache_disk_hits_total", "Hit tier disk per cache", "counter",
+                  lambda: _cache_samples("disk_hits"))
+REGISTRY.callback("omkaba_cache_misses_total", "Miss cache per cache", "counter", lambda: _cache_samples("misses"))
+REGISTRY.callback("omkaba_cache_bytes", "Ukuran cache di memori", "gauge", lambda: _cache_samples("bytes"))
+
+
+# ========================
+# EKSPOR
+# ========================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrape berkala tidak perlu mengotori log
+
+
+def serve_metrics(port, host=METRICS_HOST):
+    """
+    Jalankan endpoint /metrics di thread daemon; mengembalikan servernya
+    """
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="omkaba-metrics", daemon=True).start()
+    return server
+
+
+def write_textfile(path):
+    """
+    Tulis metrik ke file secara atomik (untuk textfile collector node_exporter)
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp_path, path)
+
+
+def _textfile_loop(path, interval):
+    while True:
+        try:
+            write_textfile(path)
+        except OSError as e:
+            print(f"⚠️ Gagal menulis file metrik: {e}")
+        time.sleep(interval)
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def start_metrics_export():
+    """
+    Aktifkan endpoint HTTP dan/atau penulisan textfile sesuai environment,
+    sekali per proses (aman dipanggil di setiap rerun Streamlit)
+    """
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+        if METRICS_PORT:
+            try:
+                serve_metrics(METRICS_PORT)
+            except OSError as e:
+                # Port dipakai instance lain di host yang sama
+                print(f"⚠️ Endpoint metrik tidak bisa dibuka di port {METRICS_PORT}: {e}")
+        if METRICS_TEXTFILE:
+            threading.Thread(
+                target=_textfile_loop, args=(METRICS_TEXTFILE, METRICS_INTERVAL),
+                name="omkaba-metrics-textfile", daemon=True
+            ).start()
@@ -0,0 +1,62 @@
+import io
+import os
+
+from reportlab.platypus import Image
+
+from render_cache import safe_write_image
+from telemetry import event
+
+try:
+    from svglib.svglib import svg2rlg
+except ImportError:  # svglib opsional, tanpa svglib chart selalu di-raster
+    svg2rlg = None
+
+
+CHART_MODE_VECTOR = "vector"
+CHART_MODE_RASTER = "raster"
+
+# Mode default bisa dioverride lewat environment variable. Default raster sampai
+# mode vector terverifikasi untuk chart peta (lihat benchmarks/pdf_chart_modes.py)
+DEFAULT_CHART_MODE = os.environ.get("OMKABA_PDF_CHART_MODE", CHART_MODE_RASTER)
+
+
+def vector_supported():
+    """
+    Cek apakah mode vector bisa dipakai (svglib terpasang)
+    """
+    return svg2rlg is not None
+
+
+def svg_to_drawing(svg_bytes, width, height):
+    """
+    Konversi SVG hasil Kaleido menjadi reportlab Drawing dengan ukuran target (points)
+    """
+    drawing = svg2rlg(io.BytesIO(svg_bytes))
+    if drawing is None:
+        raise ValueError("SVG tidak bisa dikonversi menjadi drawing")
+
+    scale_x = width / drawing.width
+    scale_y = height / drawing.height
+    drawing.scale(scale_x, scale_y)
+    drawing.width = width
+    drawing.height = height
+    return drawing
+
+
+def chart_flowable(fig, width, height, mode=DEFAULT_CHART_MODE, render_width=800, render_height=600, scale=2):
+    """
+    Membuat flowable PDF dari plotly figure.
+
+    Mode "vector" mengekspor SVG lalu menyisipkannya sebagai reportlab Drawing
+    (file lebih kecil, tajam saat dicetak). Jika svglib tidak ada atau konversi
+    gagal, otomatis fallback ke mode "raster" (PNG bitmap seperti sebelumnya).
+    """
+    if mode == CHART_MODE_VECTOR and vector_supported():
+        try:
+            svg_bytes = safe_write_image(fig, format="svg", width=render_width, height=render_height, scale=1)
+            return svg_to_drawing(svg_bytes, width, height)
+        except Exception as e:
+            event("pdf_vector_fallback", error=str(e))
+
+    img_bytes = safe_write_image(fig, format="png", width=render_width, height=render_height, scale=scale)
+    return Image(io.BytesIO(img_bytes), width=width, height=height)
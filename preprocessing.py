@@ -1,7 +1,9 @@
 import re
 from collections import Counter
+from functools import lru_cache
 import pandas as pd
-from typing import List, Optional
+import pycountry
+from typing import Dict, List, Optional, Tuple
 
 def comprehensive_clean(text, company_mode=True):
     """
@@ -512,25 +514,302 @@ def extract_city_comprehensive(address: str, city_list: List[str]) -> Optional[s
     
     return "Tidak Diketahui"
 
+# Mapping untuk standardisasi nama kota
+CITY_NAME_ALIASES = {
+    'yogya': 'Yogyakarta',
+    'jogja': 'Yogyakarta', 
+    'solo': 'Surakarta',
+    'jakarta pusat': 'Jakarta',
+    'jakarta selatan': 'Jakarta',
+    'jakarta utara': 'Jakarta',
+    'jakarta barat': 'Jakarta',
+    'jakarta timur': 'Jakarta',
+    'tangerang selatan': 'Tangerang',
+    'bogor selatan': 'Bogor',
+    'bandung barat': 'Bandung',
+}
+
 # Fungsi tambahan untuk membersihkan dan memperbaiki hasil
 def clean_extracted_cities_df(df: pd.DataFrame, city_column: str = 'Kota'):
     """
     Membersihkan dan standardisasi hasil ekstraksi kota
     """
-    # Mapping untuk standardisasi nama kota
-    city_mapping = {
-        'yogya': 'Yogyakarta',
-        'jogja': 'Yogyakarta', 
-        'solo': 'Surakarta',
-        'jakarta pusat': 'Jakarta',
-        'jakarta selatan': 'Jakarta',
-        'jakarta utara': 'Jakarta',
-        'jakarta barat': 'Jakarta',
-        'jakarta timur': 'Jakarta',
-        'tangerang selatan': 'Tangerang',
-        'bogor selatan': 'Bogor',
-        'bandung barat': 'Bandung',
-    }
-    
-    df[city_column] = df[city_column].replace(city_mapping)
+    df[city_column] = df[city_column].replace(CITY_NAME_ALIASES)
     return df
+
+
+# Alias nama negara tujuan (Bahasa Indonesia dan ejaan umum) ke kode ISO3.
+# Kunci ditulis dalam bentuk ternormalisasi (lihat normalize_country_name).
+COUNTRY_ALIASES = {
+    # Asia Timur
+    'jepang': 'JPN',
+    'tiongkok': 'CHN',
+    'cina': 'CHN',
+    'china': 'CHN',
+    'rrc': 'CHN',
+    'rrt': 'CHN',
+    'republik rakyat tiongkok': 'CHN',
+    'republik rakyat china': 'CHN',
+    'prc': 'CHN',
+    'p r china': 'CHN',
+    'peoples republic of china': 'CHN',
+    'hongkong': 'HKG',
+    'hong kong': 'HKG',
+    'hong kong sar': 'HKG',
+    'hong kong china': 'HKG',
+    'hong kong sar china': 'HKG',
+    'makau': 'MAC',
+    'macau': 'MAC',
+    'macao': 'MAC',
+    'macau sar': 'MAC',
+    'macao sar china': 'MAC',
+    'taiwan': 'TWN',
+    'korea': 'KOR',
+    'korea selatan': 'KOR',
+    'south korea': 'KOR',
+    'korea republic of': 'KOR',
+    'republic of korea': 'KOR',
+    'republik korea': 'KOR',
+    'korea republik': 'KOR',
+    'rep of korea': 'KOR',
+    'korea rep': 'KOR',
+    'korea south': 'KOR',
+    'korea utara': 'PRK',
+    'north korea': 'PRK',
+    'korea dpr': 'PRK',
+    'chinese taipei': 'TWN',
+    'taiwan roc': 'TWN',
+
+    # Asia Tenggara & Selatan
+    'singapura': 'SGP',
+    'filipina': 'PHL',
+    'vietnam': 'VNM',
+    'viet nam': 'VNM',
+    'kamboja': 'KHM',
+    'laos': 'LAO',
+    'lao pdr': 'LAO',
+    'thailan': 'THA',
+    'muangthai': 'THA',
+    'brunei': 'BRN',
+    'brunei darussalam': 'BRN',
+    'timor leste': 'TLS',
+    'timor timur': 'TLS',
+    'east timor': 'TLS',
+    'burma': 'MMR',
+    'srilanka': 'LKA',
+    'maladewa': 'MDV',
+    'afganistan': 'AFG',
+
+    # Timur Tengah & Afrika
+    'arab saudi': 'SAU',
+    'saudi arabia': 'SAU',
+    'uni emirat arab': 'ARE',
+    'uea': 'ARE',
+    'uae': 'ARE',
+    'emirat arab': 'ARE',
+    'saudi': 'SAU',
+    'kerajaan arab saudi': 'SAU',
+    'katar': 'QAT',
+    'libanon': 'LBN',
+    'yordania': 'JOR',
+    'irak': 'IRQ',
+    'yaman': 'YEM',
+    'suriah': 'SYR',
+    'turki': 'TUR',
+    'turkey': 'TUR',
+    'turkiye': 'TUR',
+    'mesir': 'EGY',
+    'maroko': 'MAR',
+    'aljazair': 'DZA',
+    'afrika selatan': 'ZAF',
+    'pantai gading': 'CIV',
+    'ivory coast': 'CIV',
+    'etiopia': 'ETH',
+    'madagaskar': 'MDG',
+    'kamerun': 'CMR',
+
+    # Eropa
+    'belanda': 'NLD',
+    'the netherlands': 'NLD',
+    'holland': 'NLD',
+    'jerman': 'DEU',
+    'perancis': 'FRA',
+    'prancis': 'FRA',
+    'inggris': 'GBR',
+    'inggris raya': 'GBR',
+    'britania raya': 'GBR',
+    'great britain': 'GBR',
+    'britain': 'GBR',
+    'england': 'GBR',
+    'skotlandia': 'GBR',
+    'scotland': 'GBR',
+    'uk': 'GBR',
+    'u k': 'GBR',
+    'italia': 'ITA',
+    'spanyol': 'ESP',
+    'belgia': 'BEL',
+    'swiss': 'CHE',
+    'rusia': 'RUS',
+    'russia': 'RUS',
+    'federasi rusia': 'RUS',
+    'swedia': 'SWE',
+    'norwegia': 'NOR',
+    'finlandia': 'FIN',
+    'denmark': 'DNK',
+    'polandia': 'POL',
+    'yunani': 'GRC',
+    'irlandia': 'IRL',
+    'ceko': 'CZE',
+    'republik ceko': 'CZE',
+    'hungaria': 'HUN',
+    'rumania': 'ROU',
+    'ukraina': 'UKR',
+    'hongaria': 'HUN',
+    'kroasia': 'HRV',
+    'slowakia': 'SVK',
+    'lituania': 'LTU',
+    'islandia': 'ISL',
+    'luksemburg': 'LUX',
+    'monako': 'MCO',
+
+    # Amerika & Oseania
+    'amerika serikat': 'USA',
+    'amerika': 'USA',
+    'as': 'USA',
+    'usa': 'USA',
+    'u s a': 'USA',
+    'u s': 'USA',
+    'america': 'USA',
+    'united states of america': 'USA',
+    'kanada': 'CAN',
+    'meksiko': 'MEX',
+    'brasil': 'BRA',
+    'kolombia': 'COL',
+    'chili': 'CHL',
+    'ekuador': 'ECU',
+    'kuba': 'CUB',
+    'jamaika': 'JAM',
+    'republik dominika': 'DOM',
+    'selandia baru': 'NZL',
+    'papua nugini': 'PNG',
+    'papua new guinea': 'PNG',
+    'kaledonia baru': 'NCL',
+}
+
+
+def normalize_country_name(name: str) -> str:
+    """
+    Normalisasi nama negara untuk pencarian alias (huruf kecil, tanpa tanda baca)
+    """
+    name = str(name).lower().strip()
+    name = re.sub(r'[.,()\-_]+', ' ', name)
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+@lru_cache(maxsize=None)
+def resolve_country_iso3(name: str) -> Optional[str]:
+    """
+    Cari kode ISO3 untuk satu ejaan nama negara (hasil di-cache per ejaan)
+    """
+    key = normalize_country_name(name)
+    if not key:
+        return None
+
+    if key in COUNTRY_ALIASES:
+        return COUNTRY_ALIASES[key]
+
+    try:
+        return pycountry.countries.lookup(str(name).strip()).alpha_3
+    except LookupError:
+        pass
+
+    try:
+        return pycountry.countries.lookup(key).alpha_3
+    except LookupError:
+        return None
+
+
+def build_country_lookup(names: pd.Series) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Resolusi semua ejaan negara yang berbeda dalam dataset ke ISO3.
+    Mengembalikan (mapping nama -> ISO3, daftar nama yang tidak dikenali).
+    """
+    mapping = {}
+    unresolved = []
+    for name in pd.unique(names.dropna()):
+        iso3 = resolve_country_iso3(name)
+        if iso3:
+            mapping[name] = iso3
+        else:
+            unresolved.append(name)
+    return mapping, sorted(unresolved, key=str)
+
+
+# Key ternormalisasi untuk alias kota (dihitung sekali)
+_CITY_ALIAS_KEYS = {
+    re.sub(r'\s+', ' ', alias.lower()).strip(): target.lower()
+    for alias, target in CITY_NAME_ALIASES.items()
+}
+
+
+def normalize_city_keys(names: pd.Series) -> pd.Series:
+    """
+    Key pencarian koordinat kota: huruf kecil, tanpa awalan kota/kabupaten,
+    tanpa tanda baca, lalu alias diganti ke nama kota utama (vectorized)
+    """
+    keys = names.astype("string").str.lower()
+    keys = keys.str.replace(r'^\s*(kota|kabupaten|kab\.?)\s+', '', regex=True)
+    keys = keys.str.replace(r'[.,\-_()]+', ' ', regex=True)
+    keys = keys.str.replace(r'\s+', ' ', regex=True).str.strip()
+    return keys.replace(_CITY_ALIAS_KEYS)
+
+
+def build_city_coordinate_index(df_city: pd.DataFrame) -> pd.DataFrame:
+    """
+    Index koordinat kota dengan key ternormalisasi (kolom: Kota, lat, lon)
+    """
+    index = df_city[['Kota', 'lat', 'lon']].copy()
+    index['key'] = normalize_city_keys(index['Kota'])
+    index = index.dropna(subset=['key']).drop_duplicates(subset='key', keep='first')
+    return index.set_index('key')
+
+
+@lru_cache(maxsize=None)
+def load_city_coordinate_index(path: str) -> pd.DataFrame:
+    """
+    Membaca file koordinat kota sekali per proses dan membangun index-nya.
+    Hasilnya dipakai bersama, jangan diubah in-place.
+    """
+    return build_city_coordinate_index(pd.read_excel(path))
+
+
+def lookup_city_coordinates(index: pd.DataFrame, city_counts: pd.Series) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Gabungkan jumlah per kota dengan koordinat lewat reindex pada key ternormalisasi.
+    Mengembalikan (DataFrame Kota/lat/lon/Jumlah, daftar kota hasil ekstraksi tanpa koordinat).
+    """
+    names = pd.Series(city_counts.index, dtype="object")
+    keys = normalize_city_keys(names)
+    coords = index.reindex(keys.to_numpy())
+
+    matched = pd.DataFrame({
+        'Kota': coords['Kota'].to_numpy(),
+        'lat': coords['lat'].to_numpy(),
+        'lon': coords['lon'].to_numpy(),
+        'Jumlah': city_counts.to_numpy(),
+    })
+    found = matched['lat'].notna().to_numpy()
+
+    missing = [
+        name for name in names[~found]
+        if pd.notna(name) and name != "Tidak Diketahui"
+    ]
+
+    # Ejaan berbeda yang mengarah ke kota yang sama digabung
+    df_map = (
+        matched[found]
+        .groupby('Kota', as_index=False, sort=False)
+        .agg(lat=('lat', 'first'), lon=('lon', 'first'), Jumlah=('Jumlah', 'sum'))
+        .sort_values('Jumlah', ascending=False, ignore_index=True)
+    )
+    return df_map, missing
@@ -0,0 +1,134 @@
+"""
+Profiling opsional (cProfile) untuk satu rerun dashboard atau satu export.
+
+Diaktifkan lewat environment variable atau query parameter, mis.:
+
+    OMKABA_PROFILE=pdf streamlit run app.py
+    http://localhost:8501/?profile=rerun,excel
+
+Target: "rerun", "pdf", "excel" (atau "all"). Setiap profil disimpan sebagai
+file .prof bertimestamp di OMKABA_PROFILE_DIR (bisa dibuka dengan snakeviz atau
+pstats) dan ringkasan top-N fungsinya ditampilkan di panel diagnostik.
+Tanpa target aktif tidak ada profiler yang dipasang sama sekali.
+"""
+import cProfile
+import functools
+import os
+import pstats
+import tempfile
+import threading
+from collections import deque
+from datetime import datetime
+
+
+PROFILE_RERUN = "rerun"
+PROFILE_PDF = "pdf"
+PROFILE_EXCEL = "excel"
+PROFILE_TARGETS = (PROFILE_RERUN, PROFILE_PDF, PROFILE_EXCEL)
+
+
+def parse_targets(value):
+    """
+    "pdf,excel" / "all" -> frozenset target yang dikenal
+    """
+    names = {name.strip().lower() for name in (value or "").split(",") if name.strip()}
+    if "all" in names:
+        return frozenset(PROFILE_TARGETS)
+    return frozenset(names & set(PROFILE_TARGETS))
+
+
+ENV_TARGETS = parse_targets(os.environ.get("OMKABA_PROFILE"))
+PROFILE_DIR = os.environ.get("OMKABA_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "omkaba-profiles"))
+PROFILE_TOP_N = int(os.environ.get("OMKABA_PROFILE_TOP", "15"))
+
+# Ringkasan profil terakhir di proses ini, untuk panel diagnostik
+RECENT_PROFILES = deque(maxlen=10)
+_recent_lock = threading.Lock()
+
+
+class ProfileSession:
+    def __init__(self, target, profiler):
+        self.target = target
+        self.profiler = profiler
+        self.started_at = datetime.now()
+
+
+def start_profile(target, requested=frozenset()):
+    """
+    Mulai cProfile untuk target jika diminta (environment atau query parameter).
+    Mengembalikan None jika tidak aktif.
+    """
+    if target not in ENV_TARGETS and target not in requested:
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None  # Profiler lain sedang aktif (Python 3.12+ hanya mengizinkan satu)
+    return ProfileSession(target, profiler)
+
+
+def stop_profile(session, top_n=PROFILE_TOP_N):
+    """
+    Hentikan profil, simpan file .prof bertimestamp dan catat ringkasan top-N.
+    Mengembalikan dict {"target", "path", "started_at", "total_s", "top"}.
+    """
+    session.profiler.disable()
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = session.started_at.strftime("%Y%m%d_%H%M%S_%f")
+    path = os.path.join(PROFILE_DIR, f"omkaba_{session.target}_{stamp}.prof")
+    session.profiler.dump_stats(path)
+
+    stats = pstats.Stats(session.profiler)
+    result = {
+        "target": session.target,
+        "path": path,
+        "started_at": session.started_at,
+        "total_s": round(stats.total_tt, 3),
+        "top": top_functions(stats, top_n),
+    }
+    with _recent_lock:
+        RECENT_PROFILES.appendleft(result)
+    return result
+
+
+def top_functions(stats, top_n=PROFILE_TOP_N):
+    """
+    Fungsi dengan waktu kumulatif terbesar: [{"fungsi", "calls", "tottime_s", "cumtime_s"}]
+    """
+    rows = []
+    for (filename, line, name), (_, n_calls, tottime, cumtime, _) in stats.stats.items():
+        location = f"{os.path.basename(filename)}:{line}" if line else filename
+        rows.append({
+            "fungsi": f"{name} ({location})",
+            "calls": n_calls,
+            "tottime_s": round(tottime, 4),
+            "cumtime_s": round(cumtime, 4),
+        })
+    rows.sort(key=lambda row: row["cumtime_s"], reverse=True)
+    return rows[:top_n]
+
+
+def profiled(target, fn, requested=frozenset()):
+    """
+    Bungkus fn supaya satu pemanggilannya diprofil jika target aktif;
+    jika tidak aktif fn dikembalikan apa adanya
+    """
+    if target not in ENV_TARGETS and target not in requested:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        session = start_profile(target, requested)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if session is not None:
+                stop_profile(session)
+    return wrapper
+
+
+def recent_profiles():
+    with _recent_lock:
+        return list(RECENT_PROFILES)
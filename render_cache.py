@@ -0,0 +1,167 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import plotly.io as pio
+
+from metrics import KALEIDO_RENDERS, KALEIDO_RESTARTS, register_cache
+from telemetry import phase, PHASE_KALEIDO
+
+
+class ImageCache:
+    """
+    Cache content-addressed untuk hasil render chart (PNG/SVG/PDF).
+
+    Kunci cache adalah hash dari JSON figure ditambah width, height, scale
+    dan format, sehingga chart yang sama persis (dari sesi mana pun) cukup
+    dirender sekali oleh Kaleido. Tier memori memakai LRU dengan batas byte,
+    tier disk bersifat opsional dan bertahan antar restart proses.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(fig, format: str, width: int, height: int, scale: float) -> str:
+        """
+        Hash SHA-256 dari JSON figure + parameter render
+        """
+        fig_json = pio.to_json(fig, validate=False)
+        digest = hashlib.sha256(fig_json.encode("utf-8"))
+        digest.update(f"|{format}|{width}|{height}|{scale}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str, format: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.{format}")
+
+    def get(self, key: str, format: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+
+        if self.disk_dir:
+            path = self._disk_path(key, format)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = None
+            if data is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._put_memory(key, data)
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, format: str, data: bytes) -> None:
+        self._put_memory(key, data)
+
+        if self.disk_dir:
+            path = self._disk_path(key, format)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Tulis ke file sementara lalu rename agar atomik
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Gagal menulis cache gambar ke disk: {e}")
+
+    def _put_memory(self, key: str, data: bytes) -> None:
+        size = len(data)
+        if size > self.max_bytes:
+            return  # Terlalu besar untuk tier memori
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+
+            self._entries[key] = data
+            self._size += size
+
+            # Buang entri paling lama tidak dipakai sampai muat di budget
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+# Satu instance per proses, dipakai bersama oleh semua sesi Streamlit.
+# Budget memori (MB) dan direktori disk bisa diatur lewat environment variable.
+IMAGE_CACHE = ImageCache(
+    max_bytes=int(float(os.environ.get("OMKABA_IMAGE_CACHE_MB", "64")) * 1024 * 1024),
+    disk_dir=os.environ.get("OMKABA_IMAGE_CACHE_DIR") or None,
+)
+register_cache("image", IMAGE_CACHE.stats)
+
+
+def safe_write_image(fig, format="png", width=800, height=600, scale=2, use_cache=True):
+    """
+    Wrapper aman untuk pio.to_image.
+    Jika Kaleido error karena Chrome/Chromium tidak ada,
+    otomatis jalankan plotly_get_chrome untuk download Chromium portable.
+    Hasil render disimpan di IMAGE_CACHE sehingga chart yang tidak berubah
+    tidak perlu dirender ulang oleh Kaleido.
+    """
+    import subprocess, sys
+
+    cache_key = None
+    if use_cache:
+        cache_key = IMAGE_CACHE.make_key(fig, format, width, height, scale)
+        cached = IMAGE_CACHE.get(cache_key, format)
+        if cached is not None:
+            return cached
+
+    with phase(PHASE_KALEIDO):
+        try:
+            img_bytes = pio.to_image(fig, format=format, width=width, height=height, scale=scale)
+        except RuntimeError as e:
+            if "Kaleido requires Google Chrome" in str(e):
+                print("⚠️ Chrome/Chromium tidak ditemukan. Menjalankan plotly_get_chrome...")
+                subprocess.check_call([sys.executable, "-m", "plotly.io._utils", "plotly_get_chrome"])
+                KALEIDO_RESTARTS.inc()
+                # coba ulangi export setelah Chromium terpasang
+                img_bytes = pio.to_image(fig, format=format, width=width, height=height, scale=scale)
+            else:
+                raise
+    KALEIDO_RENDERS.inc(format=format)
+
+    if cache_key is not None:
+        IMAGE_CACHE.put(cache_key, format, img_bytes)
+    return img_bytes
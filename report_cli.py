@@ -0,0 +1,115 @@
+"""
+Generate laporan OMKABA (PDF/Excel) tanpa membuka dashboard.
+
+Contoh:
+
+    # Satu periode
+    python report_cli.py data.xlsx --start 2024-01-01 --end 2024-03-31 --output-dir laporan/
+
+    # Laporan bulanan untuk setiap bulan di dataset (misalnya dari cron)
+    python report_cli.py data.xlsx --monthly --output-dir laporan/bulanan --format pdf
+
+    # Satu laporan per negara tujuan (10 teratas), paralel, dikumpulkan dalam zip
+    python report_cli.py data.xlsx --segment-by negara --top 10 --zip laporan/per_negara.zip
+
+Tanpa --start/--end seluruh rentang data dipakai. Dataset hanya dibaca dan
+dipreprocessing sekali; semua periode memakai cache yang sama (lookup negara,
+koordinat kota, logo, render chart).
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+from engine import REPORT_FORMATS, generate_reports, load_dataset, month_periods
+from bulk_reports import SEGMENT_DIMENSIONS, generate_bulk_reports
+from pdf_charts import CHART_MODE_RASTER, CHART_MODE_VECTOR, DEFAULT_CHART_MODE
+from charts import DEFAULT_COUNTRY_LABELS
+import telemetry
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="+", help="File data CSV/Excel (beberapa file digabung)")
+    parser.add_argument("--start", type=date.fromisoformat, help="Tanggal mulai (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Tanggal akhir (YYYY-MM-DD)")
+    parser.add_argument("--output-dir", default=".", help="Folder tujuan laporan (default: folder aktif)")
+    parser.add_argument("--monthly", action="store_true", help="Satu laporan per bulan kalender dalam rentang")
+    parser.add_argument("--format", dest="formats", choices=REPORT_FORMATS, action="append",
+                        help="Jenis laporan, bisa diulang (default: pdf dan excel)")
+    parser.add_argument("--chart-mode", choices=(CHART_MODE_VECTOR, CHART_MODE_RASTER), default=DEFAULT_CHART_MODE,
+                        help="Chart PDF sebagai vector (SVG) atau raster (PNG)")
+    parser.add_argument("--country-labels", type=int, default=DEFAULT_COUNTRY_LABELS,
+                        help="Jumlah negara teratas yang diberi label di peta")
+    parser.add_argument("--segment-by", choices=list(SEGMENT_DIMENSIONS),
+                        help="Laporan massal: satu laporan per segmen, diproses paralel dan dikumpulkan dalam zip")
+    parser.add_argument("--top", type=int, help="Batasi laporan massal ke N segmen dengan data terbanyak")
+    parser.add_argument("--workers", type=int, help="Jumlah proses untuk laporan massal (default: jumlah CPU)")
+    parser.add_argument("--zip", dest="zip_path", help="Path file zip laporan massal "
+                                                       "(default: <output-dir>/Laporan_OMKABA_<segmen>.zip)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    t0 = time.perf_counter()
+    with telemetry.run("load", files=len(args.input)):
+        dataset = load_dataset(args.input)
+    if dataset["min_date"] is None:
+        print("Tidak ada data valid pada kolom tanggal setelah preprocessing", file=sys.stderr)
+        return 1
+    print(f"Dataset: {len(dataset['df']):,} baris ({time.perf_counter() - t0:.1f} s)")
+
+    start_date = args.start or dataset["min_date"]
+    end_date = args.end or dataset["max_date"]
+    if start_date > end_date:
+        print("Tanggal mulai tidak boleh lebih besar dari tanggal akhir", file=sys.stderr)
+        return 2
+
+    formats = tuple(args.formats or REPORT_FORMATS)
+
+    if args.segment_by:
+        return run_bulk(args, dataset, start_date, end_date, formats)
+
+    periods = month_periods(start_date, end_date) if args.monthly else [(start_date, end_date)]
+
+    n_written = 0
+    for period_start, period_end in periods:
+        t0 = time.perf_counter()
+        paths = generate_reports(
+            dataset, period_start, period_end, args.output_dir,
+            formats=formats, n_country_labels=args.country_labels, chart_mode=args.chart_mode
+        )
+        label = f"{period_start:%d-%m-%Y} - {period_end:%d-%m-%Y}"
+        if not paths:
+            print(f"{label}: tidak ada data, dilewati")
+            continue
+        n_written += len(paths)
+        print(f"{label}: {', '.join(paths)} ({time.perf_counter() - t0:.1f} s)")
+
+    print(f"Selesai: {n_written} file laporan")
+    return 0
+
+
+def run_bulk(args, dataset, start_date, end_date, formats):
+    zip_path = args.zip_path or os.path.join(args.output_dir, f"Laporan_OMKABA_{args.segment_by}.zip")
+    os.makedirs(os.path.dirname(os.path.abspath(zip_path)), exist_ok=True)
+
+    t0 = time.perf_counter()
+    names = generate_bulk_reports(
+        dataset, args.segment_by, zip_path, start_date=start_date, end_date=end_date,
+        formats=formats, max_workers=args.workers, top=args.top,
+        progress=lambda fraction, message: print(message),
+        n_country_labels=args.country_labels, chart_mode=args.chart_mode
+    )
+    if not names:
+        print("Tidak ada segmen dengan data dalam rentang tanggal", file=sys.stderr)
+        return 1
+    print(f"Selesai: {len(names)} file laporan di {zip_path} ({time.perf_counter() - t0:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
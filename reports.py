@@ -0,0 +1,479 @@
+import io
+import base64
+import os
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, BaseDocTemplate, PageTemplate, Frame
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.enums import TA_CENTER
+from reportlab.platypus import HRFlowable
+from reportlab.pdfgen import canvas
+from openpyxl.utils import get_column_letter
+try:
+    import xlsxwriter
+except ImportError:  # xlsxwriter opsional, tanpa itu Excel selalu ditulis via openpyxl
+    xlsxwriter = None
+
+from pdf_charts import chart_flowable, DEFAULT_CHART_MODE
+from assets import draw_pdf_logo, pdf_logo_reader
+from telemetry import event, timed, PHASE_PDF, PHASE_EXCEL
+
+
+# ========================
+# LAPORAN PDF
+# ========================
+class LogoCanvas(canvas.Canvas):
+    """Canvas yang benar untuk menambahkan logo"""
+    
+    def __init__(self, *args, logo_path=None, **kwargs):
+        canvas.Canvas.__init__(self, *args, **kwargs)
+        self.logo_path = logo_path
+        self._saved = False  # Flag untuk mencegah duplikasi
+    
+    def save(self):
+        """Override save untuk memastikan logo digambar terakhir"""
+        if not self._saved:
+            self.draw_logo()
+            self._saved = True
+        canvas.Canvas.save(self)
+    
+    def showPage(self):
+        """Override showPage - ini yang paling penting"""
+        # Gambar logo SEBELUM showPage dipanggil
+        if self.logo_path and os.path.exists(self.logo_path):
+            self.draw_logo_immediate()
+        canvas.Canvas.showPage(self)
+    
+    def draw_logo_immediate(self):
+        """Menggambar logo langsung tanpa pengecekan berulang"""
+        try:
+            logo_x = 35  # Sedikit lebih ke kanan
+            logo_y = A4[1] - 85  # Sedikit lebih ke bawah
+            logo_width = 110
+            logo_height = 55
+            
+            # Gambar langsung
+            self.drawImage(
+                self.logo_path, 
+                logo_x, logo_y, 
+                width=logo_width, 
+                height=logo_height,
+                mask='auto'
+            )
+            
+        except Exception as e:
+            event("pdf_logo_error", error=str(e))
+    
+    def draw_logo(self):
+        """Metode fallback"""
+        if self.logo_path and os.path.exists(self.logo_path):
+            self.draw_logo_immediate()
+
+def create_logo_page_template(logo_path):
+    """Membuat page template dengan logo"""
+    def draw_logo_on_canvas(canvas, doc):
+        """Fungsi untuk menggambar logo pada setiap halaman"""
+        try:
+            # Logo diperkecil dan di-cache sekali, lalu dipakai ulang sebagai form XObject
+            draw_pdf_logo(canvas, 35, A4[1] - 85, path=logo_path)
+        except Exception as e:
+            event("pdf_logo_error", error=str(e))
+    
+    # Buat frame untuk konten (sisakan ruang untuk logo)
+    frame = Frame(
+        x1=72, y1=18, 
+        width=A4[0]-144, height=A4[1]-125,  # Kurangi tinggi untuk logo
+        leftPadding=0, rightPadding=0, 
+        topPadding=0, bottomPadding=0
+    )
+    
+    # Buat page template
+    template = PageTemplate(
+        id='logo_template',
+        frames=[frame],
+        onPage=draw_logo_on_canvas
+    )
+    
+    return template
+
+@timed(PHASE_PDF)
+def create_pdf_report(figures_dict, date_range, total_records, filtered_records, logo_path=None,
+                      chart_mode=DEFAULT_CHART_MODE, progress=None, segment=None):
+    """
+    Membuat laporan PDF dari semua chart yang ada di dashboard.
+    chart_mode "vector" menyisipkan chart sebagai drawing SVG,
+    "raster" menyisipkan PNG bitmap.
+    progress: callback opsional progress(fraction, message) untuk job background.
+    segment: keterangan segmen opsional (laporan massal), mis. "Negara Tujuan: Japan".
+    """
+    # Buffer untuk menyimpan PDF
+    buffer = io.BytesIO()
+
+    # Buat dokumen PDF dengan page template logo HANYA jika logo bisa dibaca
+    if logo_path and pdf_logo_reader(logo_path) is not None:
+        # Gunakan BaseDocTemplate untuk kontrol penuh
+        doc = BaseDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=90,  # Beri ruang untuk logo
+            bottomMargin=18
+        )
+        
+        # Tambahkan page template dengan logo
+        logo_template = create_logo_page_template(logo_path)
+        doc.addPageTemplates([logo_template])
+        
+    else:
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=18
+        )
+    
+    # Style untuk dokumen
+    styles = getSampleStyleSheet()
+
+     # Style untuk header utama dengan emoji
+    header_style = ParagraphStyle(
+        'CustomHeader',
+        parent=styles['Heading1'],
+        fontSize=28,
+        spaceAfter=20,
+        spaceBefore=10,
+        alignment=TA_CENTER,
+        textColor='#3EADB3',
+        fontName='Helvetica-Bold'
+    )
+    
+    # Style untuk subtitle
+    subtitle_style = ParagraphStyle(
+        'SubtitleStyle',
+        parent=styles['Normal'],
+        fontSize=14,
+        spaceAfter=20,
+        alignment=TA_CENTER,
+        textColor='#9E6B2B',
+        fontName='Helvetica-Oblique'
+    )
+
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor='#1f4e79'
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceAfter=12,
+        spaceBefore=20,
+        textColor='#2c5aa0'
+    )
+    
+    normal_style = ParagraphStyle(
+        'CustomNormal',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=12,
+    )
+    
+    # Konten PDF
+    story = []
+    
+    # Judul laporan
+    story.append(Paragraph("Dashboard BBKK Surabaya", header_style))
+    story.append(Paragraph("Analisis Ekspor OMKABA BBKK Surabaya", subtitle_style))
+    story.append(Spacer(1, 30))
+
+    story.append(HRFlowable(width="100%", thickness=1, lineCap='round', color='#e9ecef'))
+    story.append(Spacer(1, 20))
+    
+    # Informasi laporan
+    info_text = f"""
+    <b>Tanggal Laporan:</b> {datetime.now().strftime('%d %B %Y, %H:%M WIB')}<br/>
+    <b>Periode Data:</b> {date_range}<br/>
+    {f"<b>Segmen:</b> {segment}<br/>" if segment else ""}
+    <b>Total Records:</b> {filtered_records:,} dari {total_records:,} data
+    """
+    story.append(Paragraph(info_text, normal_style))
+    story.append(Spacer(1, 30))
+    
+    # Tambahkan setiap chart ke PDF
+    n_charts = len(figures_dict)
+    for i, (title, fig) in enumerate(figures_dict.items()):
+        if progress:
+            progress(i / (n_charts + 1), f"Merender chart {i + 1}/{n_charts}: {title}")
+
+        try:
+            # Konversi plotly figure ke gambar
+            if "Sebaran Kota Perusahaan Eksportir" in title:
+                # Extract lat, lon, kota dari fig scatter_mapbox
+                lats = fig.data[0].lat
+                lons = fig.data[0].lon
+                hovertext = getattr(fig.data[0], "hovertext", ["Kota"]*len(lats))
+            
+                df_geo = pd.DataFrame({
+                    "lat": lats,
+                    "lon": lons,
+                    "Kota": hovertext,
+                })
+                
+                fig = px.scatter_geo(
+                    df_geo,
+                    lat="lat", lon="lon",
+                    hover_name="Kota",
+                    title="Sebaran Kota Perusahaan Eksportir"
+                )
+
+            chart = chart_flowable(fig, width=6.5*inch, height=4.875*inch, mode=chart_mode)
+
+            # Tambahkan judul chart
+            story.append(Paragraph(title, heading_style))
+            story.append(Spacer(1, 12))
+            
+            # Tambahkan chart ke PDF (drawing vector atau gambar raster)
+            story.append(chart)
+            story.append(Spacer(1, 20))
+
+            # Page break kecuali untuk chart terakhir
+            if i < n_charts - 1:
+                story.append(PageBreak())
+        
+        except Exception as e:
+            # Jika ada error, tambahkan pesan error
+            error_msg = f"Error saat memproses {title}: {str(e)}"
+            story.append(Paragraph(error_msg, normal_style))
+            story.append(Spacer(1, 20))
+
+            if "mapbox" in str(e).lower():
+                story.append(Paragraph(f"{title}: Tidak bisa diexport ke PDF karena membutuhkan Mapbox API.", normal_style))
+            else:
+                story.append(Paragraph(f"Error saat memproses {title}: {str(e)}", normal_style))
+            story.append(Spacer(1, 20))
+    
+    # Footer
+    story.append(Spacer(1, 30))
+    footer_text = "Laporan ini dibuat secara otomatis oleh Dashboard BBKK Surabaya"
+    footer_style = ParagraphStyle(
+        'Footer',
+        parent=styles['Normal'],
+        fontSize=9,
+        alignment=TA_CENTER,
+        textColor='gray'
+    )
+    story.append(Paragraph(footer_text, footer_style))
+    
+    # Build PDF
+    if progress:
+        progress(n_charts / (n_charts + 1), "Menyusun dokumen PDF...")
+    doc.build(story)
+    
+    # Return buffer
+    buffer.seek(0)
+    return buffer
+
+
+def get_download_link(buffer, filename):
+    """
+    Membuat link download untuk file PDF
+    """
+    b64 = base64.b64encode(buffer.getvalue()).decode()
+    return f'<a href="data:application/pdf;base64,{b64}" download="{filename}">📄 Download PDF Report</a>'
+
+# ========================
+# FUNGSI EXPORT EXCEL
+# ========================
+# Kolom data utama yang diekspor ke sheet Data_Ekspor
+EXCEL_COLUMNS = [
+    'Diterbitkan Tanggal',
+    'Nama Exportir/Importir', 
+    'Alamat Perusahaan',
+    'Kota',
+    'Jenis Komoditi',
+    'Negara Tujuan'
+]
+
+# Sheet summary: (kolom sumber, nama sheet, label kolom di sheet)
+EXCEL_SUMMARY_SHEETS = [
+    ('Jenis Komoditi', 'Summary_Komoditas', 'Jenis Komoditi'),
+    ('Negara Tujuan', 'Summary_Negara', 'Negara Tujuan'),
+    ('Kota', 'Summary_Kota', 'Kota'),
+    ('Nama Exportir/Importir', 'Summary_Perusahaan', 'Nama Perusahaan'),
+]
+
+# Di atas jumlah baris ini Excel ditulis secara streaming (constant memory)
+STREAMING_EXCEL_THRESHOLD = 50_000
+EXCEL_DATE_FORMAT = 'dd-mm-yyyy'
+
+
+def build_summary_frame(counts, label):
+    """
+    Membuat tabel summary (Jumlah + Persentase) dari hasil value_counts
+    """
+    summary = counts.reset_index()
+    summary.columns = [label, 'Jumlah']
+    summary['Persentase (%)'] = (summary['Jumlah'] / summary['Jumlah'].sum() * 100).round(2)
+    return summary
+
+
+def build_info_frame(date_range, total_records, filtered_records, segment=None):
+    """
+    Membuat tabel info laporan
+    """
+    info_data = {
+        'Keterangan': [
+            'Tanggal Generate',
+            'Periode Data',
+            'Total Records Asli',
+            'Records Setelah Filter',
+            'Persentase Data Ditampilkan (%)'
+        ],
+        'Nilai': [
+            datetime.now().strftime('%d %B %Y, %H:%M WIB'),
+            date_range,
+            f"{total_records:,}",
+            f"{filtered_records:,}",
+            f"{(filtered_records/total_records*100):.2f}%" if total_records > 0 else "0%"
+        ]
+    }
+    if segment:
+        info_data['Keterangan'].insert(2, 'Segmen')
+        info_data['Nilai'].insert(2, segment)
+    return pd.DataFrame(info_data)
+
+
+def write_sheet_streaming(workbook, sheet_name, df, date_format, header_format, progress=None):
+    """
+    Menulis DataFrame baris per baris ke worksheet xlsxwriter (mode constant_memory).
+    Kolom datetime ditulis sebagai sel tanggal native Excel, kolom teks selalu
+    sebagai string (teks berawalan "=" atau "http" tidak dijadikan formula/URL).
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, list(df.columns), header_format)
+
+    date_columns = {
+        i for i, col in enumerate(df.columns)
+        if pd.api.types.is_datetime64_any_dtype(df[col])
+    }
+    text_columns = {
+        i for i, col in enumerate(df.columns)
+        if not pd.api.types.is_numeric_dtype(df[col]) and i not in date_columns
+    }
+
+    n_rows = len(df)
+    for row_idx, row in enumerate(df.itertuples(index=False, name=None), start=1):
+        if progress and row_idx % 10_000 == 0:
+            progress(row_idx / n_rows, f"Menulis {sheet_name}: {row_idx:,}/{n_rows:,} baris")
+        for col_idx, value in enumerate(row):
+            if pd.isna(value):
+                continue
+            if col_idx in date_columns:
+                worksheet.write_datetime(row_idx, col_idx, value.to_pydatetime(), date_format)
+            elif col_idx in text_columns:
+                worksheet.write_string(row_idx, col_idx, str(value))
+            else:
+                worksheet.write(row_idx, col_idx, value)
+
+    if date_columns:
+        for col_idx in date_columns:
+            worksheet.set_column(col_idx, col_idx, 12)
+
+
+def format_openpyxl_sheet(worksheet, df, date_format=EXCEL_DATE_FORMAT):
+    """
+    Samakan worksheet openpyxl hasil to_excel dengan mode streaming: format tanggal
+    Excel pada kolom datetime dan teks berawalan "=" tetap string, bukan formula
+    """
+    for col_idx, col in enumerate(df.columns, start=1):
+        is_date = pd.api.types.is_datetime64_any_dtype(df[col])
+        if pd.api.types.is_numeric_dtype(df[col]) and not is_date:
+            continue
+        for (cell,) in worksheet.iter_rows(min_row=2, min_col=col_idx, max_col=col_idx):
+            if is_date:
+                cell.number_format = date_format
+            elif cell.data_type == 'f':
+                cell.data_type = 's'
+        if is_date:
+            worksheet.column_dimensions[get_column_letter(col_idx)].width = 12
+
+
+@timed(PHASE_EXCEL)
+def create_excel_report(df_filtered, date_range, total_records, filtered_records, summaries=None, streaming=None,
+                        progress=None, segment=None):
+    """
+    Membuat laporan Excel dari data yang sudah difilter dan dipreprocessing.
+
+    summaries: dict {kolom: hasil value_counts} yang sudah dihitung sebelumnya
+    (misalnya untuk chart), supaya sheet summary tidak menghitung ulang.
+    streaming: True/False untuk memaksa mode, None = otomatis berdasarkan jumlah baris.
+    progress: callback opsional progress(fraction, message) untuk job background.
+    segment: keterangan segmen opsional (laporan massal), ditulis di sheet Info_Laporan.
+    """
+    summaries = summaries or {}
+
+    # Filter hanya kolom yang ada di dataframe
+    available_columns = [col for col in EXCEL_COLUMNS if col in df_filtered.columns]
+    df_export = df_filtered[available_columns]
+
+    # Urutkan berdasarkan tanggal (datetime asli, bukan string hasil format)
+    if 'Diterbitkan Tanggal' in df_export.columns:
+        df_export = df_export.sort_values('Diterbitkan Tanggal', ascending=False, kind='stable')
+
+    summary_frames = []
+    for column, sheet_name, label in EXCEL_SUMMARY_SHEETS:
+        if column in df_filtered.columns:
+            counts = summaries.get(column)
+            if counts is None:
+                counts = df_filtered[column].value_counts()
+            summary_frames.append((sheet_name, build_summary_frame(counts, label)))
+
+    info_df = build_info_frame(date_range, total_records, filtered_records, segment=segment)
+
+    if streaming is None:
+        streaming = xlsxwriter is not None and len(df_export) >= STREAMING_EXCEL_THRESHOLD
+
+    # Buffer untuk menyimpan Excel
+    buffer = io.BytesIO()
+
+    if streaming:
+        # Workbook ditulis per baris ke file sementara, memori tetap konstan
+        workbook = xlsxwriter.Workbook(buffer, {'constant_memory': True})
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+        date_format = workbook.add_format({'num_format': EXCEL_DATE_FORMAT})
+
+        write_sheet_streaming(workbook, 'Data_Ekspor', df_export, date_format, header_format, progress=progress)
+        for sheet_name, summary_df in summary_frames:
+            write_sheet_streaming(workbook, sheet_name, summary_df, date_format, header_format)
+        write_sheet_streaming(workbook, 'Info_Laporan', info_df, date_format, header_format)
+        workbook.close()
+    else:
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+            if progress:
+                progress(0.1, "Menulis Data_Ekspor...")
+            df_export.to_excel(writer, sheet_name='Data_Ekspor', index=False)
+            # Writer openpyxl mengabaikan date_format/datetime_format dan menjadikan
+            # teks berawalan "=" formula, jadi setiap sheet dirapikan langsung di sel
+            # supaya sama dengan mode streaming
+            format_openpyxl_sheet(writer.sheets['Data_Ekspor'], df_export)
+            if progress:
+                progress(0.8, "Menulis sheet summary...")
+            for sheet_name, sheet_df in summary_frames + [('Info_Laporan', info_df)]:
+                sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+                format_openpyxl_sheet(writer.sheets[sheet_name], sheet_df)
+    
+    # Return buffer
+    buffer.seek(0)
+    return buffer
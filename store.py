@@ -0,0 +1,260 @@
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+import pandas as pd
+
+from timeseries import fill_daily
+
+
+# Kolom dataset -> kolom tabel records
+STORE_COLUMNS = {
+    "Diterbitkan Tanggal": "tanggal",
+    "Nama Exportir/Importir": "perusahaan",
+    "Alamat Perusahaan": "alamat",
+    "Kota": "kota",
+    "Jenis Komoditi": "komoditi",
+    "Negara Tujuan": "negara",
+}
+
+# Jumlah hasil query agregat yang di-cache (dikosongkan saat ada data baru,
+# termasuk data yang ditulis proses lain ke file SQLite yang sama)
+QUERY_CACHE_SIZE = 256
+
+# Tanggal disimpan sebagai teks ISO supaya perbandingan string = urutan waktu
+STORE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    tanggal TEXT NOT NULL,
+    perusahaan TEXT,
+    alamat TEXT,
+    kota TEXT,
+    komoditi TEXT,
+    negara TEXT,
+    record_key INTEGER,
+    row_key INTEGER,
+    row_hash INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_records_tanggal ON records (tanggal);
+CREATE TABLE IF NOT EXISTS ingests (
+    content_hash TEXT PRIMARY KEY,
+    name TEXT,
+    n_rows INTEGER,
+    ingested_at REAL
+);
+"""
+
+# Kolom sidik jari baris (ingest inkremental, lihat ingest.row_fingerprints); store lama
+# ditambah kolomnya saat dibuka. Record dari sebelum ada sidik jari memiliki kolom NULL
+# dan tidak ikut dedup.
+FINGERPRINT_COLUMNS = ("record_key", "row_key", "row_hash")
+FINGERPRINT_INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_records_row_key ON records (row_key)",
+    "CREATE INDEX IF NOT EXISTS idx_records_record_key ON records (record_key)",
+)
+
+
+def _date_bounds(start_date, end_date):
+    """
+    Batas query [start, end) untuk rentang tanggal inklusif per hari
+    """
+    start = pd.Timestamp(start_date).strftime(STORE_DATE_FORMAT)
+    end = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime(STORE_DATE_FORMAT)
+    return start, end
+
+
+class RecordStore:
+    """
+    Penyimpanan historis (SQLite) untuk record izin yang sudah dipreprocessing.
+
+    Upload digabung per baris lewat sidik jari (lihat ingest.py): hanya record
+    baru/berubah yang dipreprocessing dan ditulis. Filter tanggal dan top-N
+    dijalankan sebagai SQL sehingga sesi dashboard hanya memuat agregat.
+    Baris mentah baru dibaca saat export Excel.
+    Hasil query agregat di-cache sampai ada data baru; tulisan dari koneksi/proses
+    lain (beberapa instance dashboard dengan satu file) dideteksi lewat PRAGMA data_version.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._data_version = None
+
+    def _query(self, sql, params=()):
+        key = (sql, params)
+        with self._lock:
+            # data_version berubah jika koneksi lain meng-commit ke file ini;
+            # commit dari koneksi ini sendiri sudah mengosongkan cache di upsert/record_ingest
+            (data_version,), = self._conn.execute("PRAGMA data_version").fetchall()
+            if data_version != self._data_version:
+                self._cache.clear()
+                self._data_version = data_version
+            if key not in self._cache:
+                if len(self._cache) >= QUERY_CACHE_SIZE:
+                    self._cache.clear()
+                self._cache[key] = self._conn.execute(sql, params).fetchall()
+            return self._cache[key]
+
+    def _migrate(self):
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(records)")}
+        with self._conn:
+            for column in FINGERPRINT_COLUMNS:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE records ADD COLUMN {column} INTEGER")
+            for index_sql in FINGERPRINT_INDEXES:
+                self._conn.execute(index_sql)
+
+    # ========================
+    # INGEST
+    # ========================
+    def has_ingest(self, content_hash):
+        return bool(self._query("SELECT 1 FROM ingests WHERE content_hash = ?", (content_hash,)))
+
+    def known_fingerprints(self, record_keys):
+        """
+        Sidik jari semua record tersimpan dengan identitas (record_key) yang ada di
+        upload: DataFrame [record_key, row_key, row_hash]
+        """
+        with self._lock:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS incoming_keys (record_key INTEGER PRIMARY KEY)")
+            self._conn.execute("DELETE FROM incoming_keys")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO incoming_keys (record_key) VALUES (?)", ((int(k),) for k in record_keys)
+            )
+            rows = self._conn.execute(
+                "SELECT r.record_key, r.row_key, r.row_hash FROM records r JOIN incoming_keys USING (record_key)"
+            ).fetchall()
+            self._conn.execute("DELETE FROM incoming_keys")
+            self._conn.commit()
+        return pd.DataFrame(rows, columns=list(FINGERPRINT_COLUMNS), dtype="int64")
+
+    def upsert(self, df, fingerprints, replaced=()):
+        """
+        Simpan record hasil preprocessing beserta sidik jarinya.
+        replaced: row_key record lama yang digantikan versi barunya (status "updated"),
+        dihapus dalam transaksi yang sama.
+        Mengembalikan jumlah baris yang ditulis.
+        """
+        columns = [col for col in STORE_COLUMNS if col in df.columns]
+        rows = df[columns].copy()
+        rows["Diterbitkan Tanggal"] = rows["Diterbitkan Tanggal"].dt.strftime(STORE_DATE_FORMAT)
+        rows = rows.astype(object).where(rows.notna(), None)
+        for column in FINGERPRINT_COLUMNS:
+            rows[column] = fingerprints.loc[df.index, column].to_numpy().tolist()
+
+        sql_columns = [STORE_COLUMNS[c] for c in columns] + list(FINGERPRINT_COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in sql_columns if c != "row_key")
+        sql = (
+            f"INSERT INTO records ({', '.join(sql_columns)}) VALUES ({', '.join('?' * len(sql_columns))}) "
+            f"ON CONFLICT (row_key) DO UPDATE SET {updates}"
+        )
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "DELETE FROM records WHERE row_key = ?", ((int(k),) for k in replaced)
+                )
+                self._conn.executemany(sql, rows.itertuples(index=False, name=None))
+            self._cache.clear()
+        return len(rows)
+
+    def record_ingest(self, content_hash, name=None, n_rows=0):
+        """
+        Catat file yang sudah diproses supaya upload ulang file yang sama langsung dilewati
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ingests (content_hash, name, n_rows, ingested_at) VALUES (?, ?, ?, ?)",
+                    (content_hash, name, n_rows, time.time())
+                )
+            self._cache.clear()
+
+    # ========================
+    # QUERY AGREGAT
+    # ========================
+    def revision(self):
+        """
+        Penanda isi store; berubah setiap ada data baru
+        """
+        (max_rowid, n_ingests), = self._query("SELECT MAX(rowid), (SELECT COUNT(*) FROM ingests) FROM records")
+        return f"{max_rowid}-{n_ingests}"
+
+    def date_range(self):
+        (min_date, max_date), = self._query("SELECT MIN(tanggal), MAX(tanggal) FROM records")
+        if min_date is None:
+            return None, None
+        return pd.Timestamp(min_date).date(), pd.Timestamp(max_date).date()
+
+    def count(self, start_date=None, end_date=None):
+        if start_date is None:
+            (n,), = self._query("SELECT COUNT(*) FROM records")
+            return n
+        (n,), = self._query(
+            "SELECT COUNT(*) FROM records WHERE tanggal >= ? AND tanggal < ?", _date_bounds(start_date, end_date)
+        )
+        return n
+
+    def value_counts(self, column, start_date, end_date, limit=None):
+        """
+        Setara df[column].value_counts() untuk rentang tanggal, dihitung di SQL
+        """
+        sql_column = STORE_COLUMNS[column]
+        sql = (
+            f"SELECT {sql_column}, COUNT(*) AS n FROM records "
+            f"WHERE tanggal >= ? AND tanggal < ? AND {sql_column} IS NOT NULL "
+            f"GROUP BY {sql_column} ORDER BY n DESC, {sql_column}"
+        )
+        params = _date_bounds(start_date, end_date)
+        if limit:
+            sql += " LIMIT ?"
+            params += (int(limit),)
+        rows = self._query(sql, params)
+        return pd.Series(
+            [n for _, n in rows], index=pd.Index([v for v, _ in rows], name=column), name="count", dtype="int64"
+        )
+
+    def distinct(self, column):
+        sql_column = STORE_COLUMNS[column]
+        rows = self._query(f"SELECT DISTINCT {sql_column} FROM records WHERE {sql_column} IS NOT NULL")
+        return pd.Series([v for v, in rows], name=column, dtype=object)
+
+    def daily_counts(self):
+        """
+        Jumlah record per hari (indeks harian lengkap), seperti timeseries.daily_counts
+        """
+        rows = self._query("SELECT substr(tanggal, 1, 10) AS hari, COUNT(*) FROM records GROUP BY hari")
+        counts = pd.Series(
+            [n for _, n in rows], index=pd.DatetimeIndex([d for d, _ in rows]), dtype="int64"
+        )
+        return fill_daily(counts)
+
+    def fetch(self, start_date, end_date):
+        """
+        Baris mentah untuk rentang tanggal (hanya untuk export)
+        """
+        columns = ", ".join(f'{sql_col} AS "{col}"' for col, sql_col in STORE_COLUMNS.items())
+        with self._lock:
+            df = pd.read_sql_query(
+                f"SELECT {columns} FROM records WHERE tanggal >= ? AND tanggal < ? ORDER BY tanggal",
+                self._conn, params=_date_bounds(start_date, end_date)
+            )
+        df["Diterbitkan Tanggal"] = pd.to_datetime(df["Diterbitkan Tanggal"], format=STORE_DATE_FORMAT)
+        return df
+
+
+@lru_cache(maxsize=None)
+def get_record_store(path=None):
+    """
+    Store historis bersama per proses; None jika OMKABA_STORE_PATH tidak diset
+    """
+    path = path or os.environ.get("OMKABA_STORE_PATH")
+    if not path:
+        return None
+    return RecordStore(path)
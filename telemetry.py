@@ -0,0 +1,186 @@
+import contextvars
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+# ========================
+# KONFIGURASI
+# ========================
+# Log JSON lines per run (rerun dashboard, job export, CLI); "off" = tidak ditulis
+TELEMETRY_LOG = os.environ.get("OMKABA_TELEMETRY_LOG", os.path.join(tempfile.gettempdir(), "omkaba_telemetry.jsonl"))
+
+# Puncak memori per fase lewat tracemalloc; memperlambat proses, jadi hanya jika diminta.
+# Puncak tracemalloc berlaku untuk seluruh proses dan di-reset per fase, jadi peak_kb
+# hanya valid jika satu pengguna saja yang aktif (tanpa sesi lain/job export berjalan)
+TRACEMALLOC = os.environ.get("OMKABA_TRACEMALLOC", "").lower() in ("1", "true", "yes")
+
+# Nama fase yang dipakai di seluruh aplikasi
+PHASE_PARSE = "parse"
+PHASE_NAME_CLEANING = "name_cleaning"
+PHASE_CITY_EXTRACTION = "city_extraction"
+PHASE_DATE_PARSING = "date_parsing"
+PHASE_FILTERING = "filtering"
+PHASE_AGGREGATION = "aggregation"
+PHASE_FIGURES = "figures"
+PHASE_KALEIDO = "kaleido_render"
+PHASE_PDF = "pdf_build"
+PHASE_EXCEL = "excel_write"
+
+_current_run = contextvars.ContextVar("omkaba_telemetry_run", default=None)
+_log_lock = threading.Lock()
+
+
+class Run:
+    """
+    Kumpulan fase untuk satu unit kerja (satu rerun dashboard, satu job export).
+
+    Fase yang sama bisa tercatat beberapa kali (mis. render Kaleido per chart);
+    summary() menjumlahkan durasi per nama fase.
+    """
+
+    def __init__(self, kind, **fields):
+        self.kind = kind
+        self.fields = fields
+        self.phases = []
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.total_ms = None
+        self._stack = []
+
+    def summary(self):
+        """
+        Fase per nama: [{"phase", "calls", "ms", "peak_kb"}] sesuai urutan pertama kali muncul
+        """
+        totals = {}
+        for name, ms, peak in self.phases:
+            entry = totals.setdefault(name, {"phase": name, "calls": 0, "ms": 0.0, "peak_kb": None})
+            entry["calls"] += 1
+            entry["ms"] += ms
+            if peak is not None:
+                entry["peak_kb"] = max(entry["peak_kb"] or 0, peak / 1024)
+        return [
+            dict(entry, ms=round(entry["ms"], 1), peak_kb=entry["peak_kb"] and round(entry["peak_kb"], 1))
+            for entry in totals.values()
+        ]
+
+    def to_record(self):
+        return {
+            "ts": self.started_at,
+            "kind": self.kind,
+            "total_ms": self.total_ms,
+            "phases": self.summary(),
+            **self.fields,
+        }
+
+
+def current_run():
+    return _current_run.get()
+
+
+def start_run(kind, **fields):
+    """
+    Mulai run baru untuk konteks (thread) ini; fase berikutnya dicatat di run ini
+    """
+    run = Run(kind, **fields)
+    if TRACEMALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _current_run.set(run)
+    return run
+
+
+def finish_run(run):
+    """
+    Tutup run, tulis ke log JSON lines dan lepas dari konteks
+    """
+    run.total_ms = round((time.perf_counter() - run._started) * 1000, 1)
+    if _current_run.get() is run:
+        _current_run.set(None)
+    write_record(run.to_record())
+    return run
+
+
+@contextmanager
+def run(kind, **fields):
+    previous = _current_run.get()
+    active = start_run(kind, **fields)
+    try:
+        yield active
+    finally:
+        finish_run(active)
+        _current_run.set(previous)
+
+
+@contextmanager
+def phase(name):
+    """
+    Catat durasi (dan puncak memori jika OMKABA_TRACEMALLOC aktif) satu fase
+    ke run yang sedang aktif. Tanpa run aktif fase tidak dicatat.
+
+    tracemalloc.reset_peak() mereset puncak seluruh proses: fase yang berjalan
+    bersamaan di sesi atau thread export lain saling mengacaukan peak_kb.
+    """
+    active = _current_run.get()
+    if active is None:
+        yield
+        return
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        # Puncak sebelum reset tetap diperhitungkan untuk fase induk
+        for frame in active._stack:
+            frame[1] = max(frame[1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]
+        active._stack.append(frame)
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        peak_bytes = None
+        if tracing:
+            active._stack.pop()
+            peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+            if active._stack:
+                active._stack[-1][1] = max(active._stack[-1][1], peak)
+            peak_bytes = peak - frame[0]
+        active.phases.append((name, ms, peak_bytes))
+
+
+def timed(name):
+    """
+    Decorator: seluruh pemanggilan fungsi dicatat sebagai satu fase
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def event(name, **fields):
+    """
+    Catat kejadian (mis. error non-fatal) sebagai satu baris di log telemetri
+    """
+    write_record({"ts": time.time(), "kind": "event", "event": name, **fields})
+
+
+def write_record(record):
+    if not TELEMETRY_LOG or TELEMETRY_LOG == "off":
+        return
+    line = json.dumps(record, default=str, ensure_ascii=False)
+    try:
+        with _log_lock, open(TELEMETRY_LOG, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError:
+        pass  # Telemetri tidak boleh menggagalkan dashboard/export
@@ -0,0 +1,22 @@
+import pandas as pd
+
+from bulk_reports import list_segments
+from engine import load_dataset
+
+
+def test_list_segments_skips_categories_without_rows(tmp_path):
+    path = tmp_path / "izin.csv"
+    pd.DataFrame({
+        "No": [1, 2, 3, 4],
+        "Diterbitkan Tanggal": ["05/01/2024", "06/01/2024", "20/02/2024", "21/02/2024"],
+        "Nama Exportir/Importir": ["PT. Mina Jaya", "PT. Bahari", "PT. Samudra", "PT. Samudra"],
+        "Alamat Perusahaan": ["Jl. Raya 1, Sidoarjo", "Jl. Raya 2, Gresik", "Jl. Raya 3, Pasuruan", "Jl. Raya 3, Pasuruan"],
+        "Jenis Komoditi": ["Udang Beku", "Ikan Hias", "Mutiara", "Mutiara"],
+        "Negara Tujuan": ["Japan", "Singapore", "China", "China"],
+    }).to_csv(path, index=False)
+    dataset = load_dataset([str(path)])
+
+    # Hanya Februari: kategori Januari tetap ada di dtype categorical tetapi tanpa baris
+    segments = list_segments(dataset, "komoditi", pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-29"))
+
+    assert [segment for _, segment, _, _ in segments] == [("Jenis Komoditi", "Mutiara")]
@@ -0,0 +1,40 @@
+import threading
+
+from export_jobs import ExportJobRunner, JOB_CANCELLED
+
+
+def wait_for_cancel(started, progress):
+    started.set()
+    while True:
+        progress(0.5)
+        threading.Event().wait(0.01)
+
+
+def test_cancel_after_double_submit_from_same_session():
+    runner = ExportJobRunner(max_workers=1, artifacts=None, retention_seconds=60)
+    started = threading.Event()
+
+    job = runner.submit("key", "pdf", "a.pdf", "application/pdf", wait_for_cancel, started, subscriber="sesi-1")
+    again = runner.submit("key", "pdf", "a.pdf", "application/pdf", wait_for_cancel, started, subscriber="sesi-1")
+    assert again is job
+    started.wait(5)
+
+    job.cancel("sesi-1")
+
+    assert job.cancel_requested
+    runner._executor.shutdown(wait=True)
+    assert job.status == JOB_CANCELLED
+
+
+def test_shared_job_runs_until_every_session_cancels():
+    runner = ExportJobRunner(max_workers=1, artifacts=None, retention_seconds=60)
+    started = threading.Event()
+
+    job = runner.submit("key", "pdf", "a.pdf", "application/pdf", wait_for_cancel, started, subscriber="sesi-1")
+    runner.submit("key", "pdf", "a.pdf", "application/pdf", wait_for_cancel, started, subscriber="sesi-2")
+
+    job.cancel("sesi-1")
+    assert not job.cancel_requested
+    job.cancel("sesi-2")
+    assert job.cancel_requested
+    runner._executor.shutdown(wait=True)
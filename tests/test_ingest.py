@@ -0,0 +1,53 @@
+import pandas as pd
+
+from engine import ingest_upload
+from ingest import row_fingerprints, classify_rows
+from store import RecordStore
+
+
+def permit(company, commodity, country, date="05/01/2024"):
+    return {
+        "No": 1,
+        "Diterbitkan Tanggal": date,
+        "Nama Exportir/Importir": company,
+        "Alamat Perusahaan": "Jl. Raya Waru No 5, Sidoarjo, Jawa Timur",
+        "Jenis Komoditi": commodity,
+        "Negara Tujuan": country,
+    }
+
+
+def test_same_company_and_date_with_different_content_is_kept(tmp_path):
+    # Dua upload per pelabuhan: perusahaan dan tanggal sama, izin berbeda
+    store = RecordStore(str(tmp_path / "store.db"))
+    first = pd.DataFrame([permit("PT. Mina Jaya", "Udang Beku", "Japan")])
+    second = pd.DataFrame([permit("PT. Mina Jaya", "Ikan Hias", "Singapore")])
+
+    assert ingest_upload(store, first, "a")["new"] == 1
+    counts = ingest_upload(store, second, "b")
+
+    assert counts["new"] == 1
+    assert counts["updated"] == 0
+    assert store.count() == 2
+
+
+def test_reupload_is_duplicate(tmp_path):
+    store = RecordStore(str(tmp_path / "store.db"))
+    df = pd.DataFrame([permit("PT. Mina Jaya", "Udang Beku", "Japan"), permit("PT. Mina Jaya", "Ikan Hias", "Japan")])
+
+    ingest_upload(store, df, "a")
+    counts = ingest_upload(store, df.assign(No=[7, 8]), "b")
+
+    assert counts["duplicate"] == 2
+    assert store.count() == 2
+
+
+def test_updated_only_with_unique_key():
+    stored = pd.DataFrame([permit("PT. Mina Jaya", "Udang Beku", "Japan")])
+    corrected = pd.DataFrame([permit("PT. Mina Jaya", "Udang Beku", "Korea")])
+    known = row_fingerprints(stored)
+
+    assert classify_rows(row_fingerprints(corrected), known)["status"].tolist() == ["new"]
+
+    classified = classify_rows(row_fingerprints(corrected), known, unique_key=True)
+    assert classified["status"].tolist() == ["updated"]
+    assert classified["replaces"].tolist() == known["row_key"].tolist()
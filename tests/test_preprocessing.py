@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from preprocessing import resolve_country_iso3, build_country_lookup
+
+
+@pytest.mark.parametrize("name, iso3", [
+    ("Republic of Korea", "KOR"),
+    ("Korea, Republic of", "KOR"),
+    ("Korea Selatan", "KOR"),
+    ("Inggris Raya", "GBR"),
+    ("Inggris", "GBR"),
+    ("U.K.", "GBR"),
+    ("United Kingdom", "GBR"),
+    ("Amerika Serikat", "USA"),
+    ("U.S.A.", "USA"),
+    ("Tiongkok", "CHN"),
+    ("P.R. China", "CHN"),
+    ("Hong Kong, China", "HKG"),
+    ("Chinese Taipei", "TWN"),
+    ("Viet Nam", "VNM"),
+    ("Federasi Rusia", "RUS"),
+    ("Turkiye", "TUR"),
+    ("The Netherlands", "NLD"),
+    ("Uni Emirat Arab", "ARE"),
+    ("Pantai Gading", "CIV"),
+    ("  jepang ", "JPN"),
+])
+def test_country_aliases(name, iso3):
+    assert resolve_country_iso3(name) == iso3
+
+
+def test_country_lookup_reports_unresolved_names():
+    mapping, unresolved = build_country_lookup(pd.Series(["Inggris Raya", "Republic of Korea", "Negeri Antah"]))
+
+    assert mapping == {"Inggris Raya": "GBR", "Republic of Korea": "KOR"}
+    assert unresolved == ["Negeri Antah"]
@@ -0,0 +1,37 @@
+import io
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from reports import create_excel_report
+
+
+def sheet_cells(workbook):
+    return {
+        sheet.title: [[(cell.value, cell.data_type, cell.number_format) for cell in row] for row in sheet.iter_rows()]
+        for sheet in workbook.worksheets
+    }
+
+
+def test_excel_writers_produce_identical_cells():
+    # Nama berawalan "=" harus tetap teks di semua sheet, termasuk sheet summary
+    df = pd.DataFrame({
+        "Diterbitkan Tanggal": pd.to_datetime(["2024-01-05", "2024-01-06", "2024-01-06"]),
+        "Nama Exportir/Importir": ["=HYPERLINK(\"http://x\")", "PT. Mina Jaya", "PT. Mina Jaya"],
+        "Alamat Perusahaan": ["Jl. Raya 1, Sidoarjo", "=1+1", "Jl. Raya 2, Gresik"],
+        "Kota": ["Sidoarjo", "Gresik", "Gresik"],
+        "Jenis Komoditi": ["Udang Beku", "Ikan Hias", "=SUM(A1)"],
+        "Negara Tujuan": ["=Japan", "Singapore", "Japan"],
+    })
+    args = (df, "05-01-2024 s/d 06-01-2024", 3, 3)
+
+    streaming = sheet_cells(load_workbook(io.BytesIO(create_excel_report(*args, streaming=True).getvalue())))
+    openpyxl = sheet_cells(load_workbook(io.BytesIO(create_excel_report(*args, streaming=False).getvalue())))
+
+    assert list(openpyxl) == list(streaming)
+    assert "Summary_Perusahaan" in openpyxl
+    for sheet_name, rows in streaming.items():
+        assert openpyxl[sheet_name] == rows, sheet_name
+    assert all(
+        data_type != "f" for rows in openpyxl.values() for row in rows for _, data_type, _ in row
+    )
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+
+BUCKET_DAY = "D"
+BUCKET_WEEK = "W"
+BUCKET_MONTH = "M"
+
+BUCKET_LABELS = {
+    BUCKET_DAY: "Harian",
+    BUCKET_WEEK: "Mingguan",
+    BUCKET_MONTH: "Bulanan",
+}
+
+# Batas rentang (hari) untuk pemilihan bucket otomatis
+DAILY_MAX_SPAN_DAYS = 92
+WEEKLY_MAX_SPAN_DAYS = 731
+
+# Jumlah titik maksimum yang dikirim ke browser/PDF sebelum di-downsample (LTTB)
+MAX_TREND_POINTS = 400
+
+
+def daily_counts(dates: pd.Series) -> pd.Series:
+    """
+    Jumlah record per hari dengan indeks harian lengkap (hari tanpa data = 0).
+    Cukup dihitung sekali per dataset; filter tanggal cukup memotong seri ini.
+    """
+    return fill_daily(dates.dropna().dt.normalize().value_counts())
+
+
+def fill_daily(counts: pd.Series) -> pd.Series:
+    """
+    Lengkapi jumlah per hari (indeks tanggal) menjadi indeks harian tanpa celah
+    """
+    counts = counts.sort_index()
+    if counts.empty:
+        return counts.astype("int64")
+    full_range = pd.date_range(counts.index.min(), counts.index.max(), freq="D")
+    return counts.reindex(full_range, fill_value=0).rename("Jumlah").rename_axis("Diterbitkan Tanggal")
+
+
+def slice_daily(daily: pd.Series, start_date, end_date) -> pd.Series:
+    """
+    Potong seri harian sesuai rentang filter (inklusif)
+    """
+    return daily.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+
+
+def choose_bucket(start_date, end_date) -> str:
+    """
+    Pilih granularitas berdasarkan panjang rentang tanggal
+    """
+    span_days = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days
+    if span_days <= DAILY_MAX_SPAN_DAYS:
+        return BUCKET_DAY
+    if span_days <= WEEKLY_MAX_SPAN_DAYS:
+        return BUCKET_WEEK
+    return BUCKET_MONTH
+
+
+def resample_counts(daily: pd.Series, bucket: str) -> pd.Series:
+    """
+    Agregasi seri harian ke bucket hari/minggu/bulan.
+    Bucket harian hanya menyimpan hari yang ada datanya (seperti chart sebelumnya).
+    """
+    if bucket == BUCKET_DAY:
+        return daily[daily > 0]
+    if bucket == BUCKET_WEEK:
+        return daily.resample("W-MON", label="left", closed="left").sum()
+    return daily.resample("MS").sum()
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: pilih n_out indeks titik yang paling
+    mempertahankan bentuk visual seri (titik pertama dan terakhir selalu ikut)
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    selected = np.empty(n_out, dtype="int64")
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Batas bucket untuk titik-titik di antara titik pertama dan terakhir
+    edges = np.linspace(1, n - 1, n_out - 1).astype("int64")
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Titik rata-rata bucket berikutnya sebagai titik ketiga segitiga
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs(
+            (x[prev] - avg_x) * (bucket_y - y[prev])
+            - (x[prev] - bucket_x) * (avg_y - y[prev])
+        )
+        prev = start + int(area.argmax())
+        selected[i + 1] = prev
+
+    return selected
+
+
+def downsample_lttb(series: pd.Series, max_points: int = MAX_TREND_POINTS) -> pd.Series:
+    """
+    Downsample seri waktu dengan LTTB jika jumlah titik melebihi max_points
+    """
+    if len(series) <= max_points:
+        return series
+    x = series.index.asi8 if isinstance(series.index, pd.DatetimeIndex) else np.arange(len(series))
+    return series.iloc[lttb_indices(x, series.to_numpy(), max_points)]
+
+
+def trend_series(daily: pd.Series, start_date, end_date, bucket=None, max_points: int = MAX_TREND_POINTS):
+    """
+    Seri tren siap plot untuk rentang filter.
+    bucket None = otomatis (dengan LTTB bila masih terlalu padat);
+    bucket eksplisit = resolusi penuh sesuai bucket tersebut.
+    Mengembalikan (seri, bucket yang dipakai).
+    """
+    window = slice_daily(daily, start_date, end_date)
+    if bucket is None:
+        bucket = choose_bucket(start_date, end_date)
+        return downsample_lttb(resample_counts(window, bucket), max_points), bucket
+    return resample_counts(window, bucket), bucket